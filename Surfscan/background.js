@@ -27,12 +27,106 @@ const normalizeData = (data) => {
     normalizedData[field] = (value && value.trim()) ? value.trim() : 'null';
   });
   
+  // Which extractor found each field (feeds the backend's domain profiles)
+  if (data.sources) {
+    normalizedData.sources = data.sources;
+  }
+  
   console.log('✅ Normalized data:', normalizedData);
   return normalizedData;
 };
 
+// Scans are retried with the same Idempotency-Key, so a retry after a lost
+// response or timeout never stores the record twice
+const SCAN_TIMEOUT_MS = 10000;
+const SCAN_MAX_ATTEMPTS = 3;
+
+const postScan = async (body) => {
+  const idempotencyKey = crypto.randomUUID();
+  let lastError = null;
+  
+  for (let attempt = 1; attempt <= SCAN_MAX_ATTEMPTS; attempt++) {
+    const controller = new AbortController();
+    const timer = setTimeout(() => controller.abort(), SCAN_TIMEOUT_MS);
+    try {
+      const response = await fetch(`${API_ENDPOINT}/scan`, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          "X-Extension-Version": chrome.runtime.getManifest().version,
+          "Idempotency-Key": idempotencyKey
+        },
+        body: JSON.stringify(body),
+        signal: controller.signal
+      });
+      
+      // 409: the first attempt is still running; 5xx: nothing was stored
+      if (response.status !== 409 && response.status < 500) {
+        if (!response.ok) {
+          throw new Error(`Server responded with ${response.status}`);
+        }
+        return await response.json();
+      }
+      lastError = new Error(`Server responded with ${response.status}`);
+    } catch (error) {
+      // Timeouts and network errors are retried; other errors are final
+      if (error.name !== 'AbortError' && error.name !== 'TypeError') {
+        throw error;
+      }
+      lastError = error.name === 'AbortError' ? new Error('Request timed out') : error;
+    } finally {
+      clearTimeout(timer);
+    }
+    
+    if (attempt < SCAN_MAX_ATTEMPTS) {
+      await new Promise(resolve => setTimeout(resolve, 500 * 2 ** (attempt - 1)));
+    }
+  }
+  throw lastError;
+};
+
+// Extraction profiles are cached per domain and revalidated with ETags
+const PROFILE_MAX_AGE_MS = 60 * 60 * 1000;
+
+const getProfile = async (domain) => {
+  domain = (domain || '').replace(/^www\./, '');
+  if (!domain) return null;
+  
+  const key = `profile:${domain}`;
+  const cached = (await chrome.storage.local.get([key]))[key];
+  if (cached && Date.now() - cached.fetchedAt < PROFILE_MAX_AGE_MS) {
+    return cached.profile;
+  }
+  
+  try {
+    const headers = cached && cached.etag ? { "If-None-Match": cached.etag } : {};
+    const response = await fetch(`${API_ENDPOINT}/profiles/${encodeURIComponent(domain)}`, { headers });
+    
+    let entry;
+    if (response.status === 304 && cached) {
+      entry = { ...cached, fetchedAt: Date.now() };
+    } else if (response.ok) {
+      entry = { profile: await response.json(), etag: response.headers.get('ETag'), fetchedAt: Date.now() };
+    } else {
+      // No profile yet: remember that too, so every page does not ask again
+      entry = { profile: null, etag: null, fetchedAt: Date.now() };
+    }
+    await chrome.storage.local.set({ [key]: entry });
+    return entry.profile;
+  } catch (error) {
+    console.log('Profile not available:', error.message);
+    return cached ? cached.profile : null;
+  }
+};
+
 // Message handler
 chrome.runtime.onMessage.addListener((msg, sender, sendResponse) => {
+  // Extraction hints for the content script
+  if (msg.action === "get_profile") {
+    getProfile(msg.domain).then(profile => sendResponse({ profile }));
+    return true;
+  }
+  
   // Xử lý toggle auto-scan
   if (msg.action === "toggle_auto_scan") {
     autoScanEnabled = msg.enabled;
@@ -79,34 +173,73 @@ chrome.runtime.onMessage.addListener((msg, sender, sendResponse) => {
         const normalizedData = normalizeData(msg.data);
         
         // Send to backend
-        const response = await fetch(`${API_ENDPOINT}/scan`, {
+        const result = await postScan({
+          data: normalizedData,
+          timestamp: new Date().toISOString(),
+          source: sender.tab?.url || 'unknown'
+        });
+        
+        sendResponse({
+          success: true,
+          result: {
+            ...result,
+            downloadUrl: `${API_ENDPOINT}/download/${result.fileId}`
+          }
+        });
+      } catch (error) {
+        console.error('Error processing data:', error);
+        sendResponse({
+          success: false,
+          error: error.message
+        });
+      }
+    })();
+    
+    return true; // Keep the message channel open for async response
+  }
+  
+  // Server-side export: backend builds the file from its stored data
+  if (msg.action === "start_export") {
+    (async () => {
+      try {
+        const response = await fetch(`${API_ENDPOINT}/exports`, {
           method: "POST",
           headers: {
             "Content-Type": "application/json",
             "X-Extension-Version": chrome.runtime.getManifest().version
           },
-          body: JSON.stringify({
-            data: normalizedData,
-            timestamp: new Date().toISOString(),
-            source: sender.tab?.url || 'unknown'
-          })
+          body: JSON.stringify(msg.params || {})
         });
         
         if (!response.ok) {
           throw new Error(`Server responded with ${response.status}`);
         }
         
-        const result = await response.json();
+        let { job } = await response.json();
+        
+        // Poll job progress until it finishes
+        while (job.status === 'queued' || job.status === 'running') {
+          await new Promise(resolve => setTimeout(resolve, 1000));
+          const poll = await fetch(`${API_ENDPOINT}/exports/${job.id}`);
+          if (!poll.ok) {
+            throw new Error(`Server responded with ${poll.status}`);
+          }
+          ({ job } = await poll.json());
+        }
+        
+        if (job.status !== 'completed') {
+          throw new Error(job.error || 'Export failed');
+        }
         
         sendResponse({
           success: true,
           result: {
-            ...result,
-            downloadUrl: `${API_ENDPOINT}/download/${result.fileId}`
+            ...job,
+            downloadUrl: `${API_ENDPOINT}/download/${job.id}`
           }
         });
       } catch (error) {
-        console.error('Error processing data:', error);
+        console.error('Error exporting data:', error);
         sendResponse({
           success: false,
           error: error.message
@@ -151,20 +284,7 @@ const sendToBackend = async (data) => {
     // Normalize data before sending
     const normalizedData = normalizeData(data);
     
-    const response = await fetch(`${API_ENDPOINT}/scan`, {
-      method: "POST",
-      headers: {
-        "Content-Type": "application/json",
-        "X-Extension-Version": chrome.runtime.getManifest().version
-      },
-      body: JSON.stringify(normalizedData)
-    });
-    
-    if (!response.ok) {
-      throw new Error(`Server responded with ${response.status}`);
-    }
-    
-    const result = await response.json();
+    const result = await postScan(normalizedData);
     console.log('✅ Data sent to backend successfully:', result);
     return { success: true, result };
     
@@ -12,34 +12,80 @@ const extractDate = (text) => {
   return match ? match[0] : '';
 };
 
+// Candidate extractors per field, tried in order: [name, extract]
+const EXTRACTORS = {
+  title: [
+    ["h1", () => document.querySelector("h1")?.innerText.trim()],
+    ["title", () => document.querySelector("title")?.innerText.trim()],
+    ["meta:og:title", () => getMeta("og:title")]
+  ],
+  author: [
+    ["meta:author", () => getMeta("author")],
+    ["class:author", () => document.querySelector("[class*='author']")?.innerText.trim()],
+    ["rel:author", () => document.querySelector("[rel='author']")?.innerText.trim()]
+  ],
+  publisher: [
+    ["meta:og:site_name", () => getMeta("og:site_name")],
+    ["class:publisher", () => document.querySelector("[class*='publisher']")?.innerText.trim()],
+    ["domain", () => document.domain]
+  ],
+  date: [
+    ["meta:article:published_time", () => getMeta("article:published_time")],
+    ["meta:datePublished", () => getMeta("datePublished")],
+    ["meta:date", () => getMeta("date")],
+    ["meta:displayPublicationDate", () => getMeta("displayPublicationDate")],
+    ["text", () => extractDate(document.body.innerText)]
+  ],
+  abstract: [
+    ["meta:description", () => getMeta("description")],
+    ["meta:og:description", () => getMeta("og:description")],
+    ["class:abstract", () => document.querySelector("[class*='abstract']")?.innerText.trim()],
+    ["class:summary", () => document.querySelector("[class*='summary']")?.innerText.trim()]
+  ]
+};
+
+// Extraction hints for this site from the backend (/api/profiles/<domain>)
+let profileHints = null;
+
+const loadProfileHints = () => {
+  chrome.runtime.sendMessage({ action: "get_profile", domain: window.location.hostname }, (response) => {
+    if (response && response.profile) {
+      profileHints = response.profile.fields;
+    }
+  });
+};
+
+// Extract one field; returns [value, extractor name]
+const extractField = (field) => {
+  let candidates = EXTRACTORS[field];
+  const hint = profileHints && profileHints[field];
+  if (hint) {
+    // Never found on this site: skip the (possibly expensive) lookups
+    if (hint.rate === 0) return ["", null];
+    // Try the extractor that usually works on this site first
+    if (hint.source) {
+      candidates = [...candidates].sort((a, b) => (b[0] === hint.source) - (a[0] === hint.source));
+    }
+  }
+  for (const [name, extract] of candidates) {
+    const value = extract();
+    if (value) return [value, name];
+  }
+  return ["", null];
+};
+
 // Main extraction function
 const extractData = () => {
-  return {
-    title: document.querySelector("h1")?.innerText.trim() || 
-           document.querySelector("title")?.innerText.trim() || 
-           getMeta("og:title") || "",
-           
-    author: getMeta("author") || 
-            document.querySelector("[class*='author']")?.innerText.trim() ||
-            document.querySelector("[rel='author']")?.innerText.trim() || "",
-            
-    publisher: getMeta("og:site_name") || 
-               document.querySelector("[class*='publisher']")?.innerText.trim() ||
-               document.domain || "",
-               
-    date: getMeta("article:published_time") ||
-          getMeta("datePublished") ||
-          getMeta("date") ||
-          getMeta("displayPublicationDate") ||
-          extractDate(document.body.innerText) || "",
-          
-    abstract: getMeta("description") ||
-              getMeta("og:description") ||
-              document.querySelector("[class*='abstract']")?.innerText.trim() ||
-              document.querySelector("[class*='summary']")?.innerText.trim() || "",
-              
-    url: window.location.href
-  };
+  const data = {};
+  const sources = {};
+  Object.keys(EXTRACTORS).forEach(field => {
+    const [value, source] = extractField(field);
+    data[field] = value;
+    if (source) sources[field] = source;
+  });
+  data.url = window.location.href;
+  data.sources = sources;
+  return data;
 };
 
 // Biến theo dõi trạng thái auto-scan
@@ -92,6 +138,7 @@ const observeUrlChange = () => {
 
 // Khởi tạo observer
 let urlObserver = observeUrlChange();
+loadProfileHints();
 
 // Listen for messages
 chrome.runtime.onMessage.addListener((msg, sender, sendResponse) => {
@@ -509,10 +509,18 @@ exportAllBtn.addEventListener('click', async () => {
   try {
     updateStatus("Exporting data...", false);
     
-    // Gửi dữ liệu đến backend để xuất
+    // Backend xuất từ dữ liệu đã lưu - chỉ gửi khoảng ngày
+    const dates = scannedData
+      .map(item => (item.timestamp || '').slice(0, 10))
+      .filter(Boolean)
+      .sort();
+    const params = dates.length > 0
+      ? { from: dates[0], to: dates[dates.length - 1], format: 'csv' }
+      : { format: 'csv' };
+    
     const response = await new Promise((resolve) => {
       chrome.runtime.sendMessage(
-        { action: "send_to_backend", data: { exportAll: true, data: scannedData } },
+        { action: "start_export", params },
         resolve
       );
     });
@@ -747,13 +755,12 @@ document.addEventListener('DOMContentLoaded', () => {
   setTimeout(initializeDragAndDrop, 100);
 });
 
-// Theo dõi thay đổi dữ liệu từ storage
-setInterval(async () => {
-  if (autoScanEnabled) {
-    const result = await chrome.storage.local.get(['autoScanResults']);
-    if (result.autoScanResults && result.autoScanResults.length !== scannedData.length) {
-      scannedData = result.autoScanResults;
-      updateDataTable();
-    }
+// Theo dõi thay đổi dữ liệu từ storage (pushed by chrome, no polling)
+chrome.storage.onChanged.addListener((changes, areaName) => {
+  if (areaName !== 'local' || !autoScanEnabled || !changes.autoScanResults) return;
+  const results = changes.autoScanResults.newValue;
+  if (results && results.length !== scannedData.length) {
+    scannedData = results;
+    updateDataTable();
   }
-}, 2000);
\ No newline at end of file
+});
\ No newline at end of file
@@ -4,6 +4,7 @@ Flask application factory and configuration
 """
 
 from flask import Flask
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import logging
 import os
@@ -13,6 +14,7 @@ from datetime import datetime
 def create_app(config_name='development'):
     """Application factory pattern"""
     app = Flask(__name__)
+    app.json = SurfScanJSONProvider(app)
     
     # Enable CORS for Chrome Extension
     CORS(app)
@@ -23,14 +25,33 @@ def create_app(config_name='development'):
     # Setup logging
     setup_logging(app)
     
+    # Create necessary directories
+    create_directories(app)
+    
+    # Register app-scoped services (created on first use)
+    setup_services(app)
+    
     # Register blueprints
     register_blueprints(app)
     
-    # Create necessary directories
-    create_directories(app)
+    # Start periodic maintenance
+    setup_scheduler(app)
+    
+    # Sample requests under the profiler (opt-in)
+    setup_profiling(app)
     
     return app
 
+class SurfScanJSONProvider(DefaultJSONProvider):
+    """JSON provider that serializes ScanRecord objects"""
+    
+    @staticmethod
+    def default(o):
+        from app.services.scan_record import ScanRecord
+        if isinstance(o, ScanRecord):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
+
 def get_config(config_name):
     """Get configuration based on environment"""
     configs = {
@@ -75,10 +96,234 @@ def register_blueprints(app):
 
 def create_directories(app):
     """Create necessary directories"""
-    directories = ['data', 'data/exports', 'logs']
+    data_dir = app.config['DATA_DIR']
+    directories = [data_dir, os.path.join(data_dir, 'exports'), app.config['LOG_DIR']]
     for directory in directories:
         os.makedirs(directory, exist_ok=True)
 
+def setup_services(app):
+    """Register service factories; each service is built on first use"""
+    from app.services.registry import ServiceRegistry
+    
+    config = app.config
+    services = ServiceRegistry()
+    
+    def file_service(registry):
+        import atexit
+        from app.services.file_service import FileService
+        service = FileService(config['DATA_DIR'])
+        service.configure_writer(config)
+        atexit.register(service.writer.close)
+        return service
+    
+    def parse_service(registry):
+        from app.services.parse_service import ParseService
+        if not config['PUBLISHER_CANONICALIZE']:
+            return ParseService()
+        return ParseService(registry.get('publisher_service'))
+    
+    def publisher_service(registry):
+        from app.services.publisher_service import PublisherService
+        return PublisherService(config['DATA_DIR'], cache_size=config['PUBLISHER_CACHE_SIZE'])
+    
+    def export_service(registry):
+        from app.services.export_service import ExportService
+        return ExportService(registry.get('file_service'))
+    
+    def duplicate_service(registry):
+        import threading
+        from app.services.dedup_service import DuplicateService
+        service = DuplicateService(
+            max_entries=config['DEDUP_MAX_ENTRIES'],
+            max_distance=config['DEDUP_MAX_DISTANCE'],
+            min_tokens=config['DEDUP_MIN_TOKENS']
+        )
+        # Index recent history without delaying the first request
+        threading.Thread(
+            target=service.warm,
+            args=(registry.get('file_service'), registry.get('parse_service'), config['DEDUP_WARM_DAYS']),
+            name='dedup-warm',
+            daemon=True
+        ).start()
+        return service
+    
+    def profile_service(registry):
+        import atexit
+        import threading
+        from app.services.profile_service import ProfileService
+        service = ProfileService(
+            config['DATA_DIR'],
+            max_domains=config['PROFILE_MAX_DOMAINS'],
+            min_samples=config['PROFILE_MIN_SAMPLES']
+        )
+        atexit.register(service.save)
+        # Seed a new store from recent history in the background
+        threading.Thread(
+            target=service.rebuild,
+            args=(registry.get('file_service'), registry.get('parse_service'), config['PROFILE_REBUILD_DAYS']),
+            name='profile-rebuild',
+            daemon=True
+        ).start()
+        return service
+    
+    def idempotency_service(registry):
+        from app.services.idempotency_service import IdempotencyService
+        return IdempotencyService(
+            config['DATA_DIR'],
+            max_entries=config['IDEMPOTENCY_MAX_ENTRIES'],
+            ttl=config['IDEMPOTENCY_TTL']
+        )
+    
+    def recent_service(registry):
+        from collections import deque
+        from app.services.recent_service import RecentService
+        service = RecentService(config['RECENT_CAPACITY'])
+        # Today's tail survives restarts; older days are not "recent"
+        file_service = registry.get('file_service')
+        today = file_service.writer.get_current_date()
+        service.warm(deque(file_service.iter_records(today, today), maxlen=service.capacity))
+        return service
+    
+    def profiler_service(registry):
+        from app.services.profiler_service import ProfilerService
+        return ProfilerService(
+            mode=config['PROFILING_MODE'],
+            sample_rate=config['PROFILING_SAMPLE_RATE'],
+            interval=config['PROFILING_INTERVAL'],
+            max_stacks=config['PROFILING_MAX_STACKS'],
+            max_depth=config['PROFILING_MAX_DEPTH']
+        )
+    
+    def event_hub(registry):
+        from app.services.event_hub import EventHub
+        return EventHub(
+            max_subscribers=config['STREAM_MAX_SUBSCRIBERS'],
+            max_queue=config['STREAM_QUEUE_SIZE']
+        )
+    
+    def retention_service(registry):
+        from app.services.retention_service import RetentionService
+        return RetentionService(
+            registry.get('file_service'),
+            data_days=config['MAX_FILE_AGE_DAYS'],
+            export_days=config['EXPORT_MAX_AGE_DAYS'],
+            indexes=config['RETENTION_INDEXES'],
+            archive=config['RETENTION_ARCHIVE'],
+            batch_size=config['RETENTION_BATCH_SIZE'],
+            batch_pause=config['RETENTION_BATCH_PAUSE'],
+            max_bytes_per_second=config['RETENTION_MAX_BYTES_PER_SECOND']
+        )
+    
+    services.register('file_service', file_service)
+    services.register('parse_service', parse_service)
+    services.register('publisher_service', publisher_service)
+    services.register('export_service', export_service)
+    services.register('duplicate_service', duplicate_service)
+    services.register('profile_service', profile_service)
+    services.register('idempotency_service', idempotency_service)
+    services.register('recent_service', recent_service)
+    services.register('event_hub', event_hub)
+    services.register('profiler_service', profiler_service)
+    services.register('retention_service', retention_service)
+    app.extensions['services'] = services
+
+def setup_scheduler(app):
+    """Register maintenance tasks and start the in-process scheduler"""
+    from app.services.scheduler_service import SchedulerService
+    
+    config = app.config
+    services = app.extensions['services']
+    jitter = config['SCHEDULER_JITTER']
+    scheduler = SchedulerService()
+    
+    def retention():
+        result = services.get('retention_service').run()
+        return {'deleted': result.get('count', 0), 'bytes': result.get('bytes', 0)}
+    
+    def export_eviction():
+        result = services.get('file_service').evict_exports(config['MAX_EXPORT_FILES'])
+        return {'deleted': result.get('count', 0)}
+    
+    def index_compaction():
+        result = services.get('file_service').compact_index()
+        return {'removed': result.get('removed', 0), 'entries': result.get('entries', 0)}
+    
+    def stats_refresh():
+        stats = services.get('file_service').refresh_statistics()
+        return {'total_files': stats.get('total_files', 0), 'total_records': stats.get('total_records', 0)}
+    
+    def journal_checkpoint():
+        if not services.is_initialized('file_service'):
+            return {'checkpointed': False}
+        writer = services.get('file_service').writer
+        if writer.journal is None:
+            return {'checkpointed': False}
+        writer.checkpoint()
+        return {'checkpointed': True}
+    
+    def stream_stats():
+        if not services.is_initialized('event_hub'):
+            return {'published': False}
+        return {'published': services.get('event_hub').publish_stats()}
+    
+    def profile_flush():
+        # Nothing to persist until a request has created the store
+        if not services.is_initialized('profile_service'):
+            return {'saved': False}
+        result = services.get('profile_service').save()
+        return {'saved': result.get('saved', False), 'domains': result.get('domains', 0)}
+    
+    def idempotency_purge():
+        if not services.is_initialized('idempotency_service'):
+            return {'removed': 0}
+        result = services.get('idempotency_service').purge()
+        return {'removed': result.get('removed', 0)}
+    
+    scheduler.add_task('retention', retention, config['RETENTION_INTERVAL'], jitter)
+    scheduler.add_task('export_eviction', export_eviction, config['EXPORT_EVICTION_INTERVAL'], jitter)
+    scheduler.add_task('index_compaction', index_compaction, config['INDEX_COMPACTION_INTERVAL'], jitter)
+    scheduler.add_task('journal_checkpoint', journal_checkpoint, config['JOURNAL_CHECKPOINT_INTERVAL'], jitter)
+    scheduler.add_task('stream_stats', stream_stats, config['STREAM_STATS_INTERVAL'], jitter)
+    scheduler.add_task('profile_flush', profile_flush, config['PROFILE_FLUSH_INTERVAL'], jitter)
+    scheduler.add_task('idempotency_purge', idempotency_purge, config['IDEMPOTENCY_PURGE_INTERVAL'], jitter)
+    scheduler.add_task('stats_refresh', stats_refresh, config['STATS_REFRESH_INTERVAL'], jitter,
+                       initial_delay=0)
+    app.extensions['scheduler'] = scheduler
+    
+    # With the debug reloader, only the child process that serves requests runs tasks
+    reloader_parent = app.debug and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+    if config['SCHEDULER_ENABLED'] and not reloader_parent:
+        scheduler.start()
+
+def setup_profiling(app):
+    """Profile a sample of requests per route (hooks exist only when enabled)"""
+    if not app.config['PROFILING_ENABLED']:
+        return
+    from flask import g, request
+    
+    services = app.extensions['services']
+    # Long-lived streams and the report itself are never sampled
+    excluded = {'api.stream_events', 'api.get_profiling', 'api.configure_profiling',
+                'api.reset_profiling', 'static'}
+    
+    @app.before_request
+    def start_profiling():
+        if request.endpoint in excluded:
+            return None
+        route = f"{request.method} {request.url_rule.rule}" if request.url_rule else f"{request.method} <unmatched>"
+        g.profiling = services.get('profiler_service').start(route)
+        return None
+    
+    @app.teardown_request
+    def stop_profiling(error=None):
+        # Runs after a streamed body has been sent, so it is included
+        token = g.pop('profiling', None)
+        if token is not None:
+            services.get('profiler_service').stop(token)
+    
+    app.logger.info(f"Request profiling enabled ({app.config['PROFILING_MODE']}, "
+                    f"sample rate {app.config['PROFILING_SAMPLE_RATE']})")
+
 class Config:
     """Base configuration"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'surfscan-secret-key'
@@ -88,6 +333,98 @@ class Config:
     MAX_FILE_AGE_DAYS = int(os.environ.get('MAX_FILE_AGE_DAYS', 30))
     MAX_EXPORT_FILES = int(os.environ.get('MAX_EXPORT_FILES', 100))
 
+    # Retention by the date in filenames (0 days disables a policy)
+    EXPORT_MAX_AGE_DAYS = int(os.environ.get('EXPORT_MAX_AGE_DAYS', 30))
+    RETENTION_INDEXES = os.environ.get('RETENTION_INDEXES', 'True').lower() == 'true'
+    RETENTION_ARCHIVE = os.environ.get('RETENTION_ARCHIVE', 'False').lower() == 'true'
+    RETENTION_BATCH_SIZE = int(os.environ.get('RETENTION_BATCH_SIZE', 100))
+    RETENTION_BATCH_PAUSE = float(os.environ.get('RETENTION_BATCH_PAUSE', 0.05))
+    RETENTION_MAX_BYTES_PER_SECOND = int(os.environ.get('RETENTION_MAX_BYTES_PER_SECOND', 0))
+
+    # Transport compression
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
+    MAX_DECOMPRESSED_SIZE = int(os.environ.get('MAX_DECOMPRESSED_SIZE', 64 * 1024 * 1024))
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', 6))
+
+    # Export downloads
+    DOWNLOAD_MAX_AGE = int(os.environ.get('DOWNLOAD_MAX_AGE', 3600))
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', 'False').lower() == 'true'
+    EXPORT_ACCEL_REDIRECT = os.environ.get('EXPORT_ACCEL_REDIRECT')
+
+    # Range queries (/api/records)
+    RECORDS_DEFAULT_LIMIT = int(os.environ.get('RECORDS_DEFAULT_LIMIT', 1000))
+    RECORDS_MAX_LIMIT = int(os.environ.get('RECORDS_MAX_LIMIT', 100000))
+
+    # Duplicate detection
+    DEDUP_ENABLED = os.environ.get('DEDUP_ENABLED', 'True').lower() == 'true'
+    DEDUP_MAX_ENTRIES = int(os.environ.get('DEDUP_MAX_ENTRIES', 100000))
+    DEDUP_MAX_DISTANCE = int(os.environ.get('DEDUP_MAX_DISTANCE', 6))
+    DEDUP_MIN_TOKENS = int(os.environ.get('DEDUP_MIN_TOKENS', 8))
+    DEDUP_WARM_DAYS = int(os.environ.get('DEDUP_WARM_DAYS', 7))
+
+    # Publisher canonicalization (data/publishers.jsonl)
+    PUBLISHER_CANONICALIZE = os.environ.get('PUBLISHER_CANONICALIZE', 'True').lower() == 'true'
+    PUBLISHER_CACHE_SIZE = int(os.environ.get('PUBLISHER_CACHE_SIZE', 4096))
+
+    # Daily partition rotation and durability
+    ROTATION_TIMEZONE = os.environ.get('ROTATION_TIMEZONE') or None
+    # always: a request is acked only once its row is fsynced (to the journal
+    # when enabled, where concurrent requests share one fsync); batch and
+    # interval ack earlier and can lose the last rows on a crash
+    FSYNC_POLICY = os.environ.get('FSYNC_POLICY', 'always')  # always | batch | interval | never
+    FSYNC_BATCH_SIZE = int(os.environ.get('FSYNC_BATCH_SIZE', 100))
+    FSYNC_INTERVAL = float(os.environ.get('FSYNC_INTERVAL', 1.0))
+    # Split hot days into hourly files or files of at most SEGMENT_MAX_BYTES
+    PARTITION_SEGMENTS = os.environ.get('PARTITION_SEGMENTS', 'daily')  # daily | hourly | size
+    SEGMENT_MAX_BYTES = int(os.environ.get('SEGMENT_MAX_BYTES', 64 * 1024 * 1024))
+    
+    # Write-ahead journal: rows are journaled (and fsynced per FSYNC_POLICY)
+    # before they reach the partition, and replayed after a crash
+    JOURNAL_ENABLED = os.environ.get('JOURNAL_ENABLED', 'True').lower() == 'true'
+    JOURNAL_MAX_SIZE = int(os.environ.get('JOURNAL_MAX_SIZE', 64 * 1024 * 1024))
+
+    # Per-domain extraction profiles (/api/profiles)
+    PROFILE_MAX_DOMAINS = int(os.environ.get('PROFILE_MAX_DOMAINS', 10000))
+    PROFILE_MIN_SAMPLES = int(os.environ.get('PROFILE_MIN_SAMPLES', 3))
+    PROFILE_MAX_AGE = int(os.environ.get('PROFILE_MAX_AGE', 3600))
+    PROFILE_REBUILD_DAYS = int(os.environ.get('PROFILE_REBUILD_DAYS', 30))
+
+    # Recent records ring buffer (/api/recent)
+    RECENT_CAPACITY = int(os.environ.get('RECENT_CAPACITY', 1000))
+    RECENT_MAX_LIMIT = int(os.environ.get('RECENT_MAX_LIMIT', 500))
+
+    # Live ingestion stream (/api/stream, Server-Sent Events)
+    STREAM_MAX_SUBSCRIBERS = int(os.environ.get('STREAM_MAX_SUBSCRIBERS', 100))
+    STREAM_QUEUE_SIZE = int(os.environ.get('STREAM_QUEUE_SIZE', 100))
+    STREAM_HEARTBEAT = float(os.environ.get('STREAM_HEARTBEAT', 15))
+    STREAM_RETRY_MS = int(os.environ.get('STREAM_RETRY_MS', 3000))
+
+    # Idempotent ingestion (Idempotency-Key / record_id)
+    IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', 24 * 60 * 60))
+    IDEMPOTENCY_MAX_ENTRIES = int(os.environ.get('IDEMPOTENCY_MAX_ENTRIES', 10000))
+
+    # Request profiling (/api/profiling); off unless enabled
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False').lower() == 'true'
+    PROFILING_MODE = os.environ.get('PROFILING_MODE', 'sampler')  # sampler | cprofile
+    PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0.01))
+    PROFILING_INTERVAL = float(os.environ.get('PROFILING_INTERVAL', 0.005))
+    PROFILING_MAX_STACKS = int(os.environ.get('PROFILING_MAX_STACKS', 2000))
+    PROFILING_MAX_DEPTH = int(os.environ.get('PROFILING_MAX_DEPTH', 64))
+    PROFILING_TOP_N = int(os.environ.get('PROFILING_TOP_N', 30))
+
+    # Maintenance scheduler (intervals in seconds)
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'True').lower() == 'true'
+    SCHEDULER_JITTER = float(os.environ.get('SCHEDULER_JITTER', 0.1))
+    RETENTION_INTERVAL = int(os.environ.get('RETENTION_INTERVAL', 6 * 60 * 60))
+    EXPORT_EVICTION_INTERVAL = int(os.environ.get('EXPORT_EVICTION_INTERVAL', 15 * 60))
+    INDEX_COMPACTION_INTERVAL = int(os.environ.get('INDEX_COMPACTION_INTERVAL', 60 * 60))
+    STATS_REFRESH_INTERVAL = int(os.environ.get('STATS_REFRESH_INTERVAL', 60))
+    PROFILE_FLUSH_INTERVAL = int(os.environ.get('PROFILE_FLUSH_INTERVAL', 5 * 60))
+    STREAM_STATS_INTERVAL = int(os.environ.get('STREAM_STATS_INTERVAL', 5))
+    JOURNAL_CHECKPOINT_INTERVAL = int(os.environ.get('JOURNAL_CHECKPOINT_INTERVAL', 60))
+    IDEMPOTENCY_PURGE_INTERVAL = int(os.environ.get('IDEMPOTENCY_PURGE_INTERVAL', 60 * 60))
+
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
@@ -103,3 +440,4 @@ class TestingConfig(Config):
     DEBUG = True
     TESTING = True
     DATA_DIR = 'test_data'
+    SCHEDULER_ENABLED = False
@@ -3,26 +3,179 @@ API routes for SurfScan Backend
 Main API endpoints for data processing
 """
 
-from flask import Blueprint, request, jsonify, send_file, current_app
+from flask import Blueprint, request, jsonify, send_file, current_app, Response, stream_with_context, make_response
+from werkzeug.local import LocalProxy
+from werkzeug.wsgi import get_input_stream
 from datetime import datetime
+from functools import wraps
+from io import BytesIO
+from itertools import islice
+import json
 import logging
+import mimetypes
 import os
 
-from app.services.file_service import FileService
-from app.services.parse_service import ParseService
+from app.services.event_hub import DROPPED, format_event
+from app.services.export_formats import EXPORT_WRITERS, get_export_writer
+from app.services.idempotency_service import request_fingerprint
+from app.services.profile_service import profile_etag
+from app.services.recent_service import parse_cursor
+from app.services.registry import get_service
 from app.utils.auth import validate_api_key
-# from app.utils.validators import validate_scan_data  # Not needed - extension handles validation
+from app.utils.compression import (
+    BodyTooLarge, decompress_body, accepts_gzip,
+    should_compress_response, compress_response
+)
+from app.utils.validators import validate_scan_data, validate_export_data
 
 logger = logging.getLogger(__name__)
 
 # Create blueprint
 api_bp = Blueprint('api', __name__)
 
-# Initialize services
-file_service = FileService()
-parse_service = ParseService()
+# Not in every platform's mimetypes table
+mimetypes.add_type('application/x-ndjson', '.jsonl')
+
+# App-scoped services, created on first use (see setup_services in create_app)
+file_service = LocalProxy(lambda: get_service('file_service'))
+parse_service = LocalProxy(lambda: get_service('parse_service'))
+export_service = LocalProxy(lambda: get_service('export_service'))
+duplicate_service = LocalProxy(lambda: get_service('duplicate_service'))
+profile_service = LocalProxy(lambda: get_service('profile_service'))
+idempotency_service = LocalProxy(lambda: get_service('idempotency_service'))
+recent_service = LocalProxy(lambda: get_service('recent_service'))
+event_hub = LocalProxy(lambda: get_service('event_hub'))
+publisher_service = LocalProxy(lambda: get_service('publisher_service'))
+profiler_service = LocalProxy(lambda: get_service('profiler_service'))
+retention_service = LocalProxy(lambda: get_service('retention_service'))
+
+def flag_duplicate(record):
+    """Index a saved record and report near-duplicates (None if disabled)"""
+    try:
+        if not current_app.config.get('DEDUP_ENABLED', True):
+            return None
+        report = duplicate_service.add(record, parse_service.canonicalize_url(record.url))
+        if report['duplicate']:
+            logger.info(f"Duplicate ({report['reason']}) of {report['duplicate_of']['url']}: {record.url}")
+        return report
+    except Exception as e:
+        logger.warning(f"Error checking duplicates: {str(e)}")
+        return None
+
+def observe_profile(data, record):
+    """Count which fields the client found on this record's domain"""
+    try:
+        profile_service.observe(parse_service.extract_domain(record.url), data, data.get('sources'))
+    except Exception as e:
+        logger.warning(f"Error updating extraction profile: {str(e)}")
+
+def record_saved(record, filename):
+    """Feed a stored record to the in-memory readers (recent records, live stream)"""
+    try:
+        sequence = recent_service.add(record)
+        cursor = recent_service.cursor(sequence) if sequence else None
+        event_hub.publish_record(record, filename, cursor, sequence or 0)
+    except Exception as e:
+        logger.warning(f"Error publishing saved record: {str(e)}")
+
+def get_idempotency_key():
+    """Idempotency-Key header, or a client-generated record_id in the body"""
+    key = request.headers.get('Idempotency-Key')
+    if not key:
+        body = request.get_json(silent=True)
+        if isinstance(body, dict):
+            key = body.get('record_id')
+            if not key and isinstance(body.get('data'), dict):
+                key = body['data'].get('record_id')
+    if not isinstance(key, str) or not key.strip() or len(key) > 255:
+        return None
+    return f"{request.endpoint}:{key.strip()}"
+
+def idempotent(view):
+    """
+    Run a write at most once per idempotency key
+    A retry with the same key and body gets the original response back
+    (with Idempotent-Replayed: true) without writing again
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = get_idempotency_key()
+        if key is None:
+            return view(*args, **kwargs)
+        
+        fingerprint = request_fingerprint(request.get_data())
+        state, entry = idempotency_service.begin(key, fingerprint)
+        if state == 'replay':
+            response = Response(entry[3], status=entry[2], mimetype='application/json')
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+        if state == 'in_progress':
+            response = jsonify({'error': 'A request with this idempotency key is still in progress'})
+            response.status_code = 409
+            response.headers['Retry-After'] = '1'
+            return response
+        if state == 'mismatch':
+            return jsonify({'error': 'Idempotency key was already used for a different request'}), 422
+        
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            idempotency_service.release(key)
+            raise
+        
+        # Server errors are not remembered, so the client can retry them
+        if response.status_code < 500:
+            idempotency_service.complete(key, fingerprint, response.status_code, response.get_data(as_text=True))
+        else:
+            idempotency_service.release(key)
+        return response
+    return wrapper
+
+# Endpoints that accept compressed request bodies
+INGESTION_ENDPOINTS = {'api.receive_scan_data', 'api.process_data'}
+
+@api_bp.before_request
+def decode_request_body():
+    """Inflate gzip/deflate request bodies on ingestion routes"""
+    encoding = request.headers.get('Content-Encoding', '').strip().lower()
+    if not encoding or encoding == 'identity' or request.endpoint not in INGESTION_ENDPOINTS:
+        return None
+
+    environ = request.environ
+    stream = get_input_stream(
+        environ, max_content_length=current_app.config.get('MAX_CONTENT_LENGTH')
+    )
+    try:
+        body = decompress_body(
+            stream, encoding, current_app.config.get('MAX_DECOMPRESSED_SIZE', 64 * 1024 * 1024)
+        )
+    except BodyTooLarge as e:
+        logger.warning(f"Rejected compressed body: {str(e)}")
+        return jsonify({'error': 'Decompressed request body too large'}), 413
+    except ValueError as e:
+        logger.warning(f"Rejected compressed body: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+
+    # Hand the inflated body to the regular JSON parsing path
+    environ['wsgi.input'] = BytesIO(body)
+    environ['CONTENT_LENGTH'] = str(len(body))
+    environ.pop('HTTP_CONTENT_ENCODING', None)
+    return None
+
+@api_bp.after_request
+def encode_response(response):
+    """Gzip JSON/CSV responses when the client accepts it"""
+    try:
+        if accepts_gzip(request) and should_compress_response(
+            response, current_app.config.get('COMPRESSION_MIN_SIZE', 1024)
+        ):
+            compress_response(response, current_app.config.get('COMPRESSION_LEVEL', 6))
+    except Exception as e:
+        logger.warning(f"Error compressing response: {str(e)}")
+    return response
 
 @api_bp.route('/scan', methods=['POST'])
+@idempotent
 def receive_scan_data():
     """
     Expected JSON format:
@@ -52,18 +205,30 @@ def receive_scan_data():
         # Log received data
         logger.info(f"Received scan data from: {data.get('url', 'unknown')}")
         logger.info(f"Full data: {data}")
+        
+        validation_result = validate_scan_data(data)
+        if not validation_result['valid']:
+            logger.warning(f"Rejected scan data: {validation_result['errors']}")
+            return jsonify({
+                'error': 'Invalid data format',
+                'details': validation_result['errors']
+            }), 400
+        
         # Parse and clean data
         cleaned_data = parse_service.clean_scan_data(data)
+        observe_profile(data, cleaned_data)
         # Save to CSV file
         result = file_service.save_scan_data(cleaned_data)
         
         if result['success']:
+            record_saved(cleaned_data, result['file'])
             logger.info(f"Data saved successfully to: {result['file']}")
             return jsonify({
                 'status': 'success',
                 'file': result['file'],
                 'timestamp': datetime.now().isoformat(),
-                'message': 'Data saved successfully'
+                'message': 'Data saved successfully',
+                'duplicate': flag_duplicate(cleaned_data)
             })
         else:
             logger.error(f"Failed to save data: {result['error']}")
@@ -74,6 +239,7 @@ def receive_scan_data():
         return jsonify({'error': 'Internal server error'}), 500
 
 @api_bp.route('/process', methods=['POST'])
+@idempotent
 def process_data():
     """
     Process data endpoint for export functionality
@@ -86,8 +252,23 @@ def process_data():
         
         # Handle export all data
         if request_data.get('exportAll') and request_data.get('data'):
-            logger.info(f"Exporting {len(request_data['data'])} records")
-            result = file_service.export_all_data(request_data['data'])
+            export_format = (request_data.get('format') or 'csv').lower()
+            if get_export_writer(export_format) is None:
+                return jsonify({
+                    'success': False,
+                    'error': f"Unsupported format '{export_format}'. Use one of: {', '.join(EXPORT_WRITERS)}"
+                }), 400
+            logger.info(f"Exporting {len(request_data['data'])} records as {export_format}")
+            validation_result = validate_export_data(request_data['data'], max_records=None)
+            if not validation_result['valid']:
+                return jsonify({
+                    'success': False,
+                    'error': 'Invalid data format',
+                    'details': validation_result['errors'],
+                    'invalidCount': validation_result['invalid_count']
+                }), 400
+            
+            result = file_service.export_all_data(request_data['data'], export_format)
             
             if result['success']:
                 return jsonify({
@@ -96,7 +277,8 @@ def process_data():
                         'fileId': result['file_id'],
                         'filename': result['filename'],
                         'downloadUrl': f"/api/download/{result['file_id']}",
-                        'recordCount': len(request_data['data'])
+                        'recordCount': len(request_data['data']),
+                        'format': export_format
                     }
                 })
             else:
@@ -108,24 +290,26 @@ def process_data():
         else:
             data = request_data
         
-        # Skip validation (extension handles formatting)
-        # validation_result = validate_scan_data(data)
-        # if not validation_result['valid']:
-        #     return jsonify({
-        #         'success': False,
-        #         'error': 'Invalid data format',
-        #         'details': validation_result['errors']
-        #     }), 400
+        validation_result = validate_scan_data(data)
+        if not validation_result['valid']:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid data format',
+                'details': validation_result['errors']
+            }), 400
         
         cleaned_data = parse_service.clean_scan_data(data)
+        observe_profile(data, cleaned_data)
         result = file_service.save_scan_data(cleaned_data)
         
         if result['success']:
+            record_saved(cleaned_data, result['file'])
             return jsonify({
                 'success': True,
                 'result': {
                     'file': result['file'],
-                    'timestamp': datetime.now().isoformat()
+                    'timestamp': datetime.now().isoformat(),
+                    'duplicate': flag_duplicate(cleaned_data)
                 }
             })
         else:
@@ -135,6 +319,71 @@ def process_data():
         logger.error(f"Error processing data: {str(e)}")
         return jsonify({'success': False, 'error': 'Internal server error'}), 500
 
+def format_export_job(job):
+    """Add client-facing URLs to an export job snapshot"""
+    job['statusUrl'] = f"/api/exports/{job['id']}"
+    job['downloadUrl'] = f"/api/download/{job['id']}" if job['status'] == 'completed' else None
+    return job
+
+@api_bp.route('/exports', methods=['POST'])
+def create_export():
+    """
+    Start a server-side export job from stored data
+    Expected JSON format:
+    {
+        "from": "2025-10-01",
+        "to": "2025-10-09",
+        "publisher": ["Nature", "Springer"],
+        "q": "machine learning",
+        "columns": ["title", "url"],
+        "format": "csv" | "jsonl" | "xlsx"
+    }
+    """
+    try:
+        params = request.get_json(silent=True) or {}
+        result = export_service.create_job(params)
+        if not result['success']:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid export parameters',
+                'details': result['errors']
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'job': format_export_job(result['job'])
+        }), 202
+    except Exception as e:
+        logger.error(f"Error creating export job: {str(e)}")
+        return jsonify({'success': False, 'error': 'Internal server error'}), 500
+
+@api_bp.route('/exports', methods=['GET'])
+def list_exports():
+    """List export jobs and their progress"""
+    try:
+        jobs = [format_export_job(job) for job in export_service.list_jobs()]
+        return jsonify({
+            'status': 'success',
+            'jobs': jobs,
+            'count': len(jobs),
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"Error listing export jobs: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api_bp.route('/exports/<job_id>', methods=['GET'])
+def get_export(job_id):
+    """Get export job progress"""
+    job = export_service.get_job(job_id)
+    if job is None:
+        return jsonify({'error': f'Export job not found: {job_id}'}), 404
+    return jsonify({
+        'status': 'success',
+        'job': format_export_job(job),
+        'timestamp': datetime.now().isoformat()
+    })
+
 @api_bp.route('/files', methods=['GET'])
 def list_files():
     """List all available CSV files"""
@@ -175,11 +424,356 @@ def get_file_data(date):
         logger.error(f"Error getting file data for {date}: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@api_bp.route('/records', methods=['GET'])
+def query_records():
+    """
+    Stream records across a date range in time_received order
+    Query: from, to (YYYY-MM-DD), since, until (ISO timestamps on time_received),
+    publisher (repeatable or comma list), q, limit
+    """
+    try:
+        date_from = request.args.get('from') or None
+        date_to = request.args.get('to') or None
+        for value in (date_from, date_to):
+            if value is not None:
+                try:
+                    datetime.strptime(value, '%Y-%m-%d')
+                except ValueError:
+                    return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        if date_from and date_to and date_from > date_to:
+            return jsonify({'error': "'from' must not be after 'to'"}), 400
+        
+        bounds = {}
+        for name in ('since', 'until'):
+            value = request.args.get(name)
+            if value:
+                try:
+                    moment = datetime.fromisoformat(value)
+                except ValueError:
+                    return jsonify({'error': f"Invalid {name}. Use an ISO timestamp (YYYY-MM-DDTHH:MM:SS)"}), 400
+                # time_received is stored as naive server-local time
+                if moment.tzinfo is not None:
+                    moment = moment.astimezone().replace(tzinfo=None)
+                bounds[name] = moment.isoformat()
+        if 'since' in bounds and 'until' in bounds and bounds['since'] > bounds['until']:
+            return jsonify({'error': "'since' must not be after 'until'"}), 400
+        
+        max_limit = current_app.config.get('RECORDS_MAX_LIMIT', 100000)
+        try:
+            limit = int(request.args.get('limit', current_app.config.get('RECORDS_DEFAULT_LIMIT', 1000)))
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        if limit < 1 or limit > max_limit:
+            return jsonify({'error': f'limit must be between 1 and {max_limit}'}), 400
+        
+        publishers = [
+            p.strip() for value in request.args.getlist('publisher')
+            for p in value.split(',') if p.strip()
+        ]
+        q = (request.args.get('q') or '').strip() or None
+        
+        records = islice(file_service.iter_records(date_from, date_to, publishers, q, **bounds), limit)
+        
+        def generate():
+            # Emit the JSON document piece by piece so rows are never buffered
+            yield json.dumps({'status': 'success', 'from': date_from, 'to': date_to})[:-1]
+            yield ', "records": ['
+            count = 0
+            for record in records:
+                yield (', ' if count else '') + json.dumps(record.to_dict(), ensure_ascii=False)
+                count += 1
+            yield f'], "count": {count}, "limit": {limit}, "timestamp": "{datetime.now().isoformat()}"}}'
+        
+        return Response(stream_with_context(generate()), mimetype='application/json')
+    except Exception as e:
+        logger.error(f"Error querying records: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api_bp.route('/recent', methods=['GET'])
+def get_recent():
+    """
+    Latest ingested records from memory
+    Query: since (cursor from the previous response), limit
+    Returns only records newer than the cursor; reset=true means the cursor
+    was unknown (first call, restart, other worker) and records holds the latest ones
+    """
+    try:
+        max_limit = current_app.config.get('RECENT_MAX_LIMIT', 500)
+        try:
+            limit = int(request.args.get('limit', 100))
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        if limit < 1 or limit > max_limit:
+            return jsonify({'error': f'limit must be between 1 and {max_limit}'}), 400
+        
+        result = recent_service.since(request.args.get('since'), limit)
+        return jsonify({
+            'status': 'success',
+            'records': [record.to_dict() for record in result['records']],
+            'count': len(result['records']),
+            'cursor': result['cursor'],
+            'reset': result['reset'],
+            'more': result['more'],
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"Error getting recent records: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api_bp.route('/stream', methods=['GET'])
+def stream_events():
+    """
+    Server-Sent Events feed of live ingestion
+    Events: 'record' (id is a /api/recent cursor), 'stats' (ingestion counts
+    since the previous stats event), 'reset' (missed events could not be
+    replayed; refetch /api/recent) and 'dropped' (client fell behind)
+    Reconnects with Last-Event-ID (or ?since=) replay missed records from memory
+    """
+    hub = event_hub._get_current_object()
+    recent = recent_service._get_current_object()
+    subscription = hub.subscribe()
+    if subscription is None:
+        response = jsonify({'error': 'Too many stream subscribers'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '30'
+        return response
+    
+    # Subscribed first, so nothing published while replaying is missed
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('since')
+    replay = recent.since(last_event_id, current_app.config.get('RECENT_MAX_LIMIT', 500)) if last_event_id else None
+    heartbeat = current_app.config.get('STREAM_HEARTBEAT', 15)
+    
+    def generate():
+        try:
+            yield f"retry: {current_app.config.get('STREAM_RETRY_MS', 3000)}\n\n"
+            replayed_until = 0
+            if replay is not None:
+                if replay['reset'] or replay['more']:
+                    yield format_event('reset', {'cursor': replay['cursor']})
+                else:
+                    replayed_until = parse_cursor(replay['cursor'])[1]
+                    first = replayed_until - len(replay['records']) + 1
+                    for sequence, record in enumerate(replay['records'], first):
+                        yield format_event('record', record.to_dict(), recent.cursor(sequence))
+            
+            while True:
+                item = subscription.get(heartbeat)
+                if item is None:
+                    # Comment line: keeps proxies from closing an idle stream
+                    yield ': keepalive\n\n'
+                    continue
+                if item is DROPPED:
+                    yield format_event('dropped', {'reason': 'Client fell too far behind'})
+                    return
+                sequence, message = item
+                if not sequence or sequence > replayed_until:
+                    yield message
+        finally:
+            hub.unsubscribe(subscription)
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Disable proxy buffering (nginx) so events are delivered immediately
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@api_bp.route('/duplicates', methods=['GET'])
+def get_duplicates():
+    """Report clusters of duplicate / near-duplicate articles"""
+    try:
+        try:
+            min_size = max(int(request.args.get('min_size', 2)), 2)
+            limit = max(int(request.args.get('limit', 100)), 1)
+        except ValueError:
+            return jsonify({'error': 'min_size and limit must be integers'}), 400
+        
+        clusters = duplicate_service.get_clusters(min_size, limit)
+        return jsonify({
+            'status': 'success',
+            'clusters': clusters,
+            'count': len(clusters),
+            'index': duplicate_service.get_stats(),
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"Error getting duplicates: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api_bp.route('/profiles', methods=['GET'])
+def list_profiles():
+    """List domains that have published extraction profiles"""
+    try:
+        try:
+            limit = max(int(request.args.get('limit', 100)), 1)
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        
+        profiles = profile_service.list_profiles(limit)
+        return jsonify({
+            'status': 'success',
+            'profiles': profiles,
+            'count': len(profiles),
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"Error listing profiles: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api_bp.route('/profiles/<domain>', methods=['GET'])
+def get_profile(domain):
+    """
+    Extraction hints for a domain: per-field hit rate and best extractor
+    Cached by content: clients revalidate with If-None-Match and get 304
+    while the hints are unchanged
+    """
+    try:
+        profile = profile_service.get_profile(domain)
+        if profile is None:
+            return jsonify({'error': 'No profile for this domain yet'}), 404
+        
+        response = jsonify(profile)
+        response.set_etag(profile_etag(profile))
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config.get('PROFILE_MAX_AGE', 3600)
+        return response.make_conditional(request)
+    except Exception as e:
+        logger.error(f"Error getting profile for {domain}: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api_bp.route('/publishers', methods=['GET'])
+def list_publishers():
+    """Canonical publishers with their aliases, domains and stored record counts"""
+    try:
+        counts = file_service.get_publisher_counts()
+        publishers = [
+            dict(publisher, records=counts.get(publisher['id'], 0))
+            for publisher in publisher_service.list_publishers()
+        ]
+        return jsonify({
+            'status': 'success',
+            'publishers': publishers,
+            'count': len(publishers),
+            'uncanonicalized_records': counts.get(0, 0),
+            'stats': publisher_service.get_stats(),
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"Error listing publishers: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api_bp.route('/publishers/<int:publisher_id>/aliases', methods=['POST'])
+def add_publisher_alias(publisher_id):
+    """
+    Map another name and/or domain to a canonical publisher (admin endpoint)
+    Body: {"alias": "...", "domain": "..."}; applies to records ingested from now on
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        alias = data.get('alias') or ''
+        domain = data.get('domain') or ''
+        if not isinstance(alias, str) or not isinstance(domain, str):
+            return jsonify({'error': 'alias and domain must be strings'}), 400
+        
+        result = publisher_service.add_alias(publisher_id, alias, domain)
+        if not result['success']:
+            status = 404 if result['error'].startswith('Unknown publisher') else 400
+            return jsonify({'error': result['error']}), status
+        return jsonify({
+            'status': 'success',
+            'publisher': result['publisher'],
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"Error adding publisher alias: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+def profiling_unavailable():
+    """Error response for profiling admin requests, or None to proceed"""
+    if not validate_api_key(request):
+        return jsonify({'error': 'Invalid API key'}), 401
+    if not current_app.config.get('PROFILING_ENABLED', False):
+        return jsonify({'error': 'Profiling is disabled (set PROFILING_ENABLED=True)'}), 404
+    return None
+
+@api_bp.route('/profiling', methods=['GET'])
+def get_profiling():
+    """
+    Profiles of sampled requests (admin endpoint, requires X-API-Key)
+    Query: route (e.g. "POST /api/scan"), limit (top functions),
+    format=collapsed for flamegraph input (flamegraph.pl, speedscope)
+    """
+    try:
+        unavailable = profiling_unavailable()
+        if unavailable:
+            return unavailable
+        
+        route = request.args.get('route') or None
+        if request.args.get('format') == 'collapsed':
+            return Response(profiler_service.collapsed(route), mimetype='text/plain')
+        try:
+            limit = max(int(request.args.get('limit', current_app.config.get('PROFILING_TOP_N', 30))), 1)
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        
+        return jsonify({
+            'status': 'success',
+            'profiling': profiler_service.get_report(route, limit),
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"Error getting profiles: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api_bp.route('/profiling', methods=['POST'])
+def configure_profiling():
+    """Change the sampled fraction of requests at runtime: {"sample_rate": 0.05}"""
+    try:
+        unavailable = profiling_unavailable()
+        if unavailable:
+            return unavailable
+        
+        data = request.get_json(silent=True) or {}
+        sample_rate = data.get('sample_rate')
+        if isinstance(sample_rate, bool) or not isinstance(sample_rate, (int, float)) or not 0 <= sample_rate <= 1:
+            return jsonify({'error': 'sample_rate must be a number between 0 and 1'}), 400
+        
+        profiler_service.configure(sample_rate)
+        return jsonify({
+            'status': 'success',
+            'sample_rate': profiler_service.sample_rate,
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"Error configuring profiling: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api_bp.route('/profiling', methods=['DELETE'])
+def reset_profiling():
+    """Discard collected profiles"""
+    try:
+        unavailable = profiling_unavailable()
+        if unavailable:
+            return unavailable
+        
+        profiler_service.reset()
+        return jsonify({'status': 'success', 'timestamp': datetime.now().isoformat()})
+    except Exception as e:
+        logger.error(f"Error resetting profiles: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @api_bp.route('/stats', methods=['GET'])
 def get_stats():
     """Get statistics about collected data"""
     try:
-        stats = file_service.get_statistics()
+        stats = file_service.get_cached_statistics(
+            current_app.config.get('STATS_REFRESH_INTERVAL', 60)
+        )
+        if current_app.config.get('PUBLISHER_CANONICALIZE', True) and stats.get('publishers'):
+            # Rollups are kept by ID; names are attached on the way out
+            stats = dict(stats, publishers=[
+                dict(entry, name=publisher_service.get_name(entry['id']))
+                for entry in stats['publishers']
+            ])
         return jsonify({
             'status': 'success',
             'stats': stats,
@@ -189,6 +783,45 @@ def get_stats():
         logger.error(f"Error getting stats: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+def send_export_file(file_path, download_name, content_encoding=None):
+    """
+    Send an export file with Range/If-Range support
+
+    Werkzeug answers Range requests with 206 Partial Content and honours
+    If-Range against the file's ETag/Last-Modified. Files are streamed
+    through wsgi.file_wrapper, which servers such as gunicorn turn into
+    sendfile(). When EXPORT_ACCEL_REDIRECT is set, the transfer (including
+    ranges) is handed to nginx through X-Accel-Redirect instead.
+    """
+    mimetype, encoding = mimetypes.guess_type(download_name)
+    if encoding == 'gzip':
+        # A .csv.gz/.jsonl.gz export is the gzip file itself, not an encoded CSV
+        mimetype = 'application/gzip'
+    mimetype = mimetype or 'application/octet-stream'
+    accel_prefix = current_app.config.get('EXPORT_ACCEL_REDIRECT')
+    if accel_prefix:
+        response = current_app.response_class(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = (
+            accel_prefix.rstrip('/') + '/' + os.path.basename(file_path)
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+    else:
+        response = send_file(
+            file_path,
+            mimetype=mimetype,
+            as_attachment=True,
+            download_name=download_name,
+            conditional=True,
+            etag=True,
+            max_age=current_app.config.get('DOWNLOAD_MAX_AGE', 3600)
+        )
+        response.accept_ranges = 'bytes'
+
+    if content_encoding:
+        response.headers['Content-Encoding'] = content_encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
 @api_bp.route('/download/<file_id>', methods=['GET'])
 def download_file(file_id):
     """Download exported file"""
@@ -196,11 +829,15 @@ def download_file(file_id):
         file_path = file_service.get_export_file_path(file_id)
         if file_path and os.path.exists(file_path):
             logger.info(f"Downloading file: {file_path}")
-            return send_file(
-                file_path,
-                as_attachment=True,
-                download_name=os.path.basename(file_path)
-            )
+            # send_file resolves relative paths against the app package
+            file_path = os.path.abspath(file_path)
+            gz_path = file_path + '.gz'
+            if accepts_gzip(request) and os.path.exists(gz_path):
+                # Serve the copy compressed at export time
+                return send_export_file(
+                    gz_path, os.path.basename(file_path), content_encoding='gzip'
+                )
+            return send_export_file(file_path, os.path.basename(file_path))
         else:
             return jsonify({'error': 'File not found'}), 404
     except Exception as e:
@@ -209,22 +846,41 @@ def download_file(file_id):
 
 @api_bp.route('/cleanup', methods=['POST'])
 def cleanup_old_files():
-    """Clean up old files (admin endpoint)"""
+    """
+    Apply retention by the dates in filenames (admin endpoint)
+    Body: days (daily data to keep), export_days, indexes, archive, dry_run;
+    omitted values use the configured policies, 0 days skips a policy
+    """
     try:
-        # Get days parameter from request
-        data = request.get_json() or {}
-        days_to_keep = data.get('days', current_app.config.get('MAX_FILE_AGE_DAYS', 30))
+        data = request.get_json(silent=True) or {}
+        for name in ('days', 'export_days'):
+            value = data.get(name)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < 0):
+                return jsonify({'error': f'{name} must be a non-negative integer'}), 400
+        for name in ('indexes', 'archive', 'dry_run'):
+            if name in data and not isinstance(data[name], bool):
+                return jsonify({'error': f'{name} must be a boolean'}), 400
         
-        result = file_service.cleanup_old_files(days_to_keep)
+        dry_run = data.get('dry_run', False)
+        result = retention_service.run(
+            data_days=data.get('days'),
+            export_days=data.get('export_days'),
+            indexes=data.get('indexes'),
+            archive=data.get('archive'),
+            dry_run=dry_run
+        )
         
         if result['success']:
-            logger.info(f"Cleaned up {result['count']} old files")
-            return jsonify({
-                'status': 'success',
-                'message': f"Cleaned up {result['count']} files older than {days_to_keep} days",
-                'deleted_files': result['deleted_files'],
-                'count': result['count']
-            })
+            if not dry_run:
+                logger.info(f"Retention removed {result['count']} files ({result['bytes']} bytes)")
+            verb = 'Would remove' if dry_run else 'Removed'
+            result.pop('success')
+            return jsonify(dict(
+                result,
+                status='success',
+                message=f"{verb} {result['count']} files ({result['bytes']} bytes)",
+                timestamp=datetime.now().isoformat()
+            ))
         else:
             return jsonify({'error': result['error']}), 500
             
@@ -3,7 +3,7 @@ Main routes for SurfScan Backend
 Health check and general endpoints
 """
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, current_app
 from datetime import datetime
 import logging
 
@@ -27,11 +27,13 @@ def health_check():
 def detailed_status():
     """Detailed status endpoint"""
     import os
-    from app.services.file_service import FileService
+    from app.services.registry import get_service
     
     try:
-        file_service = FileService()
-        stats = file_service.get_statistics()
+        stats = get_service('file_service').get_cached_statistics(
+            current_app.config.get('STATS_REFRESH_INTERVAL', 60)
+        )
+        scheduler = current_app.extensions.get('scheduler')
         
         return jsonify({
             'status': 'running',
@@ -47,9 +49,11 @@ def detailed_status():
                 'total_files': stats.get('total_files', 0),
                 'total_records': stats.get('total_records', 0),
                 'latest_file': stats.get('latest_file'),
-                'data_directory': 'data/',
-                'logs_directory': 'logs/'
-            }
+                'data_directory': f"{current_app.config['DATA_DIR']}/",
+                'logs_directory': f"{current_app.config['LOG_DIR']}/"
+            },
+            'services': current_app.extensions['services'].get_status(),
+            'scheduler': scheduler.get_status() if scheduler else None
         })
     except Exception as e:
         logger.error(f"Error getting detailed status: {str(e)}")
@@ -3,7 +3,21 @@ Services package for SurfScan Backend
 Business logic and data processing services
 """
 
-from .file_service import FileService
-from .parse_service import ParseService
+import importlib
 
-__all__ = ['FileService', 'ParseService']
+# Exported names are imported from their module on first access
+_EXPORTS = {
+    'FileService': '.file_service',
+    'ParseService': '.parse_service',
+    'ExportService': '.export_service',
+    'ServiceRegistry': '.registry',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Dedup Service - Near-duplicate detection for scanned articles
+Canonical URL matching plus SimHash fingerprints with an LSH band index
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+FINGERPRINT_BITS = 64
+
+HASH_MASK = (1 << FINGERPRINT_BITS) - 1
+
+def feature_hash(feature: str) -> int:
+    """
+    64-bit hash of a feature
+    Uses the interpreter's string hash, so fingerprints are only comparable
+    within one process; the index is in-memory and rebuilt by warm()
+    """
+    return hash(feature) & HASH_MASK
+
+def simhash(tokens: List[str]) -> int:
+    """64-bit SimHash over word unigrams and bigrams"""
+    features = set(tokens)
+    features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+
+    # Bit-sliced counters: counters[i] holds bit i of the per-position
+    # count of set bits, so each feature costs a few 64-bit operations
+    total = len(features)
+    counters = [0] * max(total.bit_length(), 1)
+    for feature in features:
+        carry = feature_hash(feature)
+        i = 0
+        while carry:
+            counters[i], carry = counters[i] ^ carry, counters[i] & carry
+            i += 1
+
+    # A bit is set when more features had it set than not, i.e. its count
+    # exceeds total // 2; compared for all 64 positions at once, from the
+    # most significant counter bit down
+    threshold = total // 2
+    greater, equal = 0, HASH_MASK
+    for i in range(len(counters) - 1, -1, -1):
+        if (threshold >> i) & 1:
+            equal &= counters[i]
+        else:
+            greater |= equal & counters[i]
+            equal &= ~counters[i]
+    return greater
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+class DuplicateService:
+    def __init__(self, max_entries: int = 100000, max_distance: int = 6, min_tokens: int = 8):
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.configure(max_entries, max_distance, min_tokens)
+
+    def configure(self, max_entries: int = 100000, max_distance: int = 6, min_tokens: int = 8):
+        """Set index limits and reset the index"""
+        with self.lock:
+            self.max_entries = max_entries
+            self.max_distance = max_distance
+            self.min_tokens = min_tokens
+
+            # Two fingerprints within max_distance bits differ in at most one
+            # bit of some band when there are max_distance // 2 + 1 bands
+            # (pigeonhole), so lookups probe each band's value and its
+            # one-bit neighbours. Bands are twice as wide as with exact band
+            # matches, which keeps buckets small in a large index.
+            band_count = min(max_distance // 2 + 1, FINGERPRINT_BITS)
+            edges = [FINGERPRINT_BITS * band // band_count for band in range(band_count + 1)]
+            # (shift, width) of each band
+            self.band_shapes = [(edges[i], edges[i + 1] - edges[i]) for i in range(band_count)]
+
+            self.entries = OrderedDict()
+            self.record_keys = {}
+            self.url_index = {}
+            self.band_index = {}
+            # entry ID -> {'root', 'members'} of its duplicate cluster
+            # (entries without duplicates have none)
+            self.clusters = {}
+            self.next_id = 1
+            self.loaded = False
+
+    def bands(self, fingerprint: int):
+        """Index keys of a fingerprint: (band, value of its bits)"""
+        for band, (shift, width) in enumerate(self.band_shapes):
+            yield band, (fingerprint >> shift) & ((1 << width) - 1)
+
+    def probes(self, fingerprint: int):
+        """Keys to look up: each band's value and every value one bit away"""
+        for band, value in self.bands(fingerprint):
+            yield band, value
+            for bit in range(self.band_shapes[band][1]):
+                yield band, value ^ (1 << bit)
+
+    def find(self, entry_id: int) -> int:
+        """Cluster root of an entry: its oldest indexed member"""
+        cluster = self.clusters.get(entry_id)
+        return cluster['root'] if cluster else entry_id
+
+    def union(self, a: int, b: int) -> int:
+        """Merge the clusters of two entries (the smaller one is relabelled)"""
+        cluster_a, cluster_b = self.clusters.get(a), self.clusters.get(b)
+        if cluster_a is None and cluster_b is None:
+            cluster = {'root': min(a, b), 'members': {a, b}}
+            self.clusters[a] = self.clusters[b] = cluster
+            return cluster['root']
+        if cluster_a is cluster_b:
+            return cluster_a['root']
+        if cluster_a is None or (cluster_b is not None and len(cluster_b['members']) > len(cluster_a['members'])):
+            a, b, cluster_a, cluster_b = b, a, cluster_b, cluster_a
+        moved = cluster_b['members'] if cluster_b else {b}
+        for member in moved:
+            self.clusters[member] = cluster_a
+        cluster_a['members'] |= moved
+        # The older entry stays the cluster root
+        cluster_a['root'] = min(cluster_a['root'], cluster_b['root'] if cluster_b else b)
+        return cluster_a['root']
+
+    def fingerprint(self, record) -> Optional[int]:
+        """SimHash of title + abstract, or None when the text is too short"""
+        text = f"{record.get('title') or ''} {record.get('abstract') or ''}".lower()
+        tokens = TOKEN_PATTERN.findall(text)
+        if len(tokens) < self.min_tokens:
+            return None
+        return simhash(tokens)
+
+    def evict(self):
+        """Drop the oldest entries beyond max_entries (caller holds lock)"""
+        while len(self.entries) > self.max_entries:
+            entry_id, entry = self.entries.popitem(last=False)
+            self.record_keys.pop(entry['key'], None)
+            if self.url_index.get(entry['canonical_url']) == entry_id:
+                del self.url_index[entry['canonical_url']]
+            if entry['simhash'] is not None:
+                for key in self.bands(entry['simhash']):
+                    bucket = self.band_index.get(key)
+                    if bucket:
+                        bucket.remove(entry_id)
+                        if not bucket:
+                            del self.band_index[key]
+            cluster = self.clusters.pop(entry_id, None)
+            if cluster:
+                # Remaining members keep their cluster, rooted at the oldest one left
+                cluster['members'].discard(entry_id)
+                if len(cluster['members']) == 1:
+                    self.clusters.pop(cluster['members'].pop(), None)
+                elif cluster['root'] == entry_id:
+                    cluster['root'] = min(cluster['members'])
+
+    def add(self, record, canonical_url: str) -> Dict:
+        """
+        Index a record and report whether it duplicates an earlier one
+        Adding the same stored record (time_received + url) again is a no-op
+        Returns: {'duplicate': bool, 'duplicate_of': dict, 'reason': str, 'distance': int, 'cluster': int}
+        """
+        key = (record.get('time_received') or '', record.get('url') or '')
+
+        with self.lock:
+            # Warm-up and live ingest may both see the same stored record
+            if key[0] and key in self.record_keys:
+                return self.result(self.record_keys[key])
+
+        fingerprint = self.fingerprint(record)
+
+        with self.lock:
+            if key[0] and key in self.record_keys:
+                return self.result(self.record_keys[key])
+
+            match_id, reason, distance = None, None, None
+
+            if canonical_url and canonical_url in self.url_index:
+                match_id, reason, distance = self.url_index[canonical_url], 'url', 0
+            elif fingerprint is not None:
+                entries = self.entries
+                for band_key in self.probes(fingerprint):
+                    for candidate_id in self.band_index.get(band_key, ()):
+                        # Inlined hamming_distance: this loop runs ~100 times per add
+                        candidate_distance = bin(fingerprint ^ entries[candidate_id]['simhash']).count('1')
+                        if candidate_distance <= self.max_distance and (
+                            distance is None or candidate_distance < distance
+                        ):
+                            match_id, reason, distance = candidate_id, 'content', candidate_distance
+
+            entry_id = self.next_id
+            self.next_id += 1
+            self.entries[entry_id] = {
+                'key': key,
+                'title': record.get('title') or '',
+                'url': record.get('url') or '',
+                'canonical_url': canonical_url,
+                'time_received': record.get('time_received') or '',
+                'simhash': fingerprint,
+                'match': (match_id, reason, distance)
+            }
+            if key[0]:
+                self.record_keys[key] = entry_id
+            if canonical_url and canonical_url not in self.url_index:
+                self.url_index[canonical_url] = entry_id
+            if fingerprint is not None:
+                for band_key in self.bands(fingerprint):
+                    self.band_index.setdefault(band_key, []).append(entry_id)
+
+            if match_id:
+                self.union(match_id, entry_id)
+            result = self.result(entry_id)
+            self.evict()
+
+        return result
+
+    def result(self, entry_id: int) -> Dict:
+        """Duplicate report for an indexed entry (caller holds lock)"""
+        match_id, reason, distance = self.entries[entry_id]['match']
+        if match_id not in self.entries:
+            match_id = None
+        return {
+            'duplicate': match_id is not None,
+            'duplicate_of': self.public_entry(match_id) if match_id else None,
+            'reason': reason if match_id else None,
+            'distance': distance if match_id else None,
+            'cluster': self.find(entry_id)
+        }
+
+    def public_entry(self, entry_id: int) -> Dict:
+        entry = self.entries[entry_id]
+        return {
+            'id': entry_id,
+            'title': entry['title'],
+            'url': entry['url'],
+            'canonical_url': entry['canonical_url'],
+            'time_received': entry['time_received']
+        }
+
+    def warm(self, file_service, parse_service, days: int = 7) -> int:
+        """Index the last few days of stored records once"""
+        with self.lock:
+            if self.loaded:
+                return 0
+            self.loaded = True
+
+        start = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        count = 0
+        for record in file_service.iter_records(start):
+            self.add(record, parse_service.canonicalize_url(record.url))
+            count += 1
+        logger.info(f"Duplicate index warmed with {count} records")
+        return count
+
+    def get_clusters(self, min_size: int = 2, limit: int = 100) -> List[Dict]:
+        """Duplicate clusters (largest first)"""
+        with self.lock:
+            clusters = {}
+            for entry_id in self.entries:
+                clusters.setdefault(self.find(entry_id), []).append(entry_id)
+            result = [
+                {
+                    'cluster': root,
+                    'size': len(members),
+                    'records': [self.public_entry(member) for member in members]
+                }
+                for root, members in clusters.items() if len(members) >= min_size
+            ]
+
+        result.sort(key=lambda c: c['size'], reverse=True)
+        return result[:limit]
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'urls': len(self.url_index),
+                'bands': len(self.band_index)
+            }
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Event Hub - In-process pub/sub for live ingestion events
+Fans new records and periodic stats deltas out to /api/stream subscribers
+"""
+
+import json
+import queue
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Queued for a subscriber that fell too far behind
+DROPPED = object()
+
+def format_event(event: str, data: Dict, event_id: Optional[str] = None) -> str:
+    """Render one Server-Sent Events message"""
+    message = f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+    return f"id: {event_id}\n{message}" if event_id else message
+
+class Subscription:
+    """Bounded queue of (sequence, message) for one stream client"""
+    def __init__(self, max_queue: int = 100):
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = False
+
+    def offer(self, item) -> bool:
+        """Queue an item without blocking; False when the queue is full"""
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            return False
+
+    def get(self, timeout: float):
+        """Next (sequence, message), DROPPED, or None on timeout"""
+        if self.dropped:
+            return DROPPED
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+class EventHub:
+    """
+    Publishers never block: each message is formatted once and offered to
+    every subscriber's bounded queue. A subscriber whose queue is full is
+    dropped (its stream ends with a 'dropped' event) so one slow client
+    cannot hold back ingestion or grow memory.
+    """
+    def __init__(self, max_subscribers: int = 100, max_queue: int = 100):
+        self.max_subscribers = max_subscribers
+        self.max_queue = max_queue
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        # Ingestion counts since the last stats event
+        self.delta = {'records': 0, 'publishers': Counter(), 'files': Counter()}
+        self.stats = {'published': 0, 'dropped': 0, 'total_records': 0}
+
+    def subscribe(self) -> Optional[Subscription]:
+        """New subscription, or None when the hub is full"""
+        with self.lock:
+            if len(self.subscribers) >= self.max_subscribers:
+                return None
+            subscription = Subscription(self.max_queue)
+            self.subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+    def publish(self, event: str, data: Dict, event_id: Optional[str] = None, sequence: int = 0):
+        """Send an event to every subscriber (no-op without subscribers)"""
+        with self.lock:
+            if not self.subscribers:
+                return
+            item = (sequence, format_event(event, data, event_id))
+            for subscription in list(self.subscribers):
+                if not subscription.offer(item):
+                    subscription.dropped = True
+                    self.subscribers.discard(subscription)
+                    self.stats['dropped'] += 1
+                    logger.warning(f"Dropped slow stream subscriber ({self.max_queue} events behind)")
+            self.stats['published'] += 1
+
+    def publish_record(self, record, filename: str, cursor: Optional[str] = None, sequence: int = 0):
+        """Announce a stored record and count it for the next stats delta"""
+        with self.lock:
+            self.stats['total_records'] += 1
+            if not self.subscribers:
+                return
+            self.delta['records'] += 1
+            self.delta['publishers'][record.publisher] += 1
+            self.delta['files'][filename] += 1
+        self.publish('record', record.to_dict(), cursor, sequence)
+
+    def publish_stats(self) -> bool:
+        """Send accumulated ingestion counts as a 'stats' event (if any)"""
+        with self.lock:
+            if not self.delta['records']:
+                return False
+            delta = {
+                'records': self.delta['records'],
+                'publishers': dict(self.delta['publishers']),
+                'files': dict(self.delta['files']),
+                'total_records': self.stats['total_records'],
+                'timestamp': datetime.now().isoformat()
+            }
+            self.delta = {'records': 0, 'publishers': Counter(), 'files': Counter()}
+        self.publish('stats', delta)
+        return True
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            return dict(self.stats, subscribers=len(self.subscribers))
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Export Formats - Streaming writers for export files
+Each writer appends one row at a time so exports never sit in memory
+(CSV, JSONL, their gzip variants and XLSX)
+"""
+
+import csv
+import gzip
+import json
+from typing import Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rows per worksheet, including the header (Excel's limit)
+XLSX_MAX_ROWS = 1048576
+
+
+def open_export_file(file_path: str, compressed: bool = False, newline=None):
+    """Open an export file for text writing, gzip-compressed on the fly if asked"""
+    if compressed:
+        return gzip.open(file_path, 'wt', encoding='utf-8', newline=newline, compresslevel=6)
+    return open(file_path, 'w', encoding='utf-8', newline=newline)
+
+
+class CsvExportWriter:
+    """Write rows as CSV with a header line"""
+    extension = '.csv'
+    compressed = False
+    # Plain text exports get a .gz copy for Accept-Encoding downloads
+    precompress = True
+
+    def __init__(self, file_path: str, columns: List[str]):
+        self.columns = columns
+        self.file = open_export_file(file_path, self.compressed, newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write_row(self, row: Dict):
+        self.writer.writerow([row.get(column, '') for column in self.columns])
+
+    def close(self):
+        self.file.close()
+
+
+class CsvGzipExportWriter(CsvExportWriter):
+    """CSV compressed while it is written (downloaded as a .csv.gz file)"""
+    extension = '.csv.gz'
+    compressed = True
+    precompress = False
+
+
+class JsonlExportWriter:
+    """Write rows as one JSON object per line"""
+    extension = '.jsonl'
+    compressed = False
+    precompress = True
+
+    def __init__(self, file_path: str, columns: List[str]):
+        self.columns = columns
+        self.file = open_export_file(file_path, self.compressed)
+
+    def write_row(self, row: Dict):
+        record = {column: row.get(column, '') for column in self.columns}
+        self.file.write(json.dumps(record, ensure_ascii=False))
+        self.file.write('\n')
+
+    def close(self):
+        self.file.close()
+
+
+class JsonlGzipExportWriter(JsonlExportWriter):
+    """JSONL compressed while it is written (downloaded as a .jsonl.gz file)"""
+    extension = '.jsonl.gz'
+    compressed = True
+    precompress = False
+
+
+class XlsxExportWriter:
+    """
+    Write rows to an XLSX workbook using openpyxl's write-only mode
+    Rows are streamed to a temporary worksheet file instead of being kept
+    as cells, so memory stays flat however large the export is
+    """
+    extension = '.xlsx'
+    precompress = False
+
+    def __init__(self, file_path: str, columns: List[str]):
+        try:
+            from openpyxl import Workbook
+            from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+        except ImportError:
+            raise RuntimeError('XLSX export requires openpyxl (pip install openpyxl)')
+
+        self.file_path = file_path
+        self.columns = columns
+        self.illegal_characters = ILLEGAL_CHARACTERS_RE
+        self.workbook = Workbook(write_only=True)
+        self.sheets = 0
+        self.add_sheet()
+
+    def add_sheet(self):
+        """Start a new worksheet (with header) once the current one is full"""
+        self.sheets += 1
+        self.sheet = self.workbook.create_sheet('SurfScan' if self.sheets == 1 else f'SurfScan {self.sheets}')
+        self.sheet.append(self.columns)
+        self.sheet_rows = 1
+
+    def write_row(self, row: Dict):
+        if self.sheet_rows >= XLSX_MAX_ROWS:
+            self.add_sheet()
+        # Control characters are valid in CSV/JSON but rejected by XLSX
+        self.sheet.append([
+            self.illegal_characters.sub('', value) if isinstance(value, str) else value
+            for value in (row.get(column, '') for column in self.columns)
+        ])
+        self.sheet_rows += 1
+
+    def close(self):
+        self.workbook.save(self.file_path)
+
+
+EXPORT_WRITERS = {
+    'csv': CsvExportWriter,
+    'csv.gz': CsvGzipExportWriter,
+    'jsonl': JsonlExportWriter,
+    'jsonl.gz': JsonlGzipExportWriter,
+    'xlsx': XlsxExportWriter,
+}
+
+
+def get_export_writer(export_format: str):
+    """Get writer class for an export format (None if unsupported)"""
+    return EXPORT_WRITERS.get((export_format or '').lower())
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Export Service - Server-side export jobs
+Builds export files from the stored daily CSVs in a background worker
+"""
+
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+
+from app.services.export_formats import get_export_writer, EXPORT_WRITERS
+from app.utils.compression import precompress_file
+
+logger = logging.getLogger(__name__)
+
+class ExportService:
+    def __init__(self, file_service, max_workers: int = 2, max_jobs: int = 100):
+        self.file_service = file_service
+        self.max_jobs = max_jobs
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='export')
+
+    def validate_params(self, params: Dict) -> Dict:
+        """
+        Validate export job parameters
+        Returns: {'valid': bool, 'errors': list, 'params': dict}
+        """
+        errors = []
+        params = params or {}
+
+        date_from = params.get('from') or None
+        date_to = params.get('to') or None
+        for name, value in (('from', date_from), ('to', date_to)):
+            if value is not None:
+                try:
+                    datetime.strptime(value, '%Y-%m-%d')
+                except (TypeError, ValueError):
+                    errors.append(f"Invalid '{name}' date. Use YYYY-MM-DD")
+        if date_from and date_to and not errors and date_from > date_to:
+            errors.append("'from' must not be after 'to'")
+
+        export_format = (params.get('format') or 'csv').lower()
+        if get_export_writer(export_format) is None:
+            errors.append(f"Unsupported format '{export_format}'. Use one of: {', '.join(EXPORT_WRITERS)}")
+
+        columns = params.get('columns') or list(self.file_service.csv_headers)
+        if isinstance(columns, str):
+            columns = [c.strip() for c in columns.split(',') if c.strip()]
+        if not isinstance(columns, list) or not all(isinstance(c, str) for c in columns):
+            errors.append("'columns' must be a list of column names or a comma-separated string")
+            columns = []
+        unknown = [c for c in columns if c not in self.file_service.csv_headers]
+        if unknown:
+            errors.append(f"Unknown columns: {', '.join(unknown)}")
+
+        publishers = params.get('publisher') or []
+        if isinstance(publishers, str):
+            publishers = [p.strip() for p in publishers.split(',') if p.strip()]
+        if not isinstance(publishers, list) or not all(isinstance(p, str) for p in publishers):
+            errors.append("'publisher' must be a list of names or a comma-separated string")
+            publishers = []
+
+        q = params.get('q') or ''
+        if not isinstance(q, str):
+            errors.append("'q' must be a string")
+            q = ''
+
+        return {
+            'valid': len(errors) == 0,
+            'errors': errors,
+            'params': {
+                'from': date_from,
+                'to': date_to,
+                'publisher': [p.lower() for p in publishers],
+                'q': q.strip().lower(),
+                'columns': columns,
+                'format': export_format
+            }
+        }
+
+    def create_job(self, params: Dict) -> Dict:
+        """
+        Queue a new export job
+        Returns: {'success': bool, 'job': dict, 'errors': list}
+        """
+        validation = self.validate_params(params)
+        if not validation['valid']:
+            return {'success': False, 'job': None, 'errors': validation['errors']}
+
+        job_id = str(uuid.uuid4())
+        job = {
+            'id': job_id,
+            'status': 'queued',
+            'params': validation['params'],
+            'created_at': datetime.now().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'partitions_total': 0,
+            'partitions_done': 0,
+            'rows_scanned': 0,
+            'rows_written': 0,
+            'progress': 0.0,
+            'filename': None,
+            'error': None
+        }
+
+        with self.lock:
+            self.jobs[job_id] = job
+            self.prune_jobs()
+
+        self.executor.submit(self.run_job, job_id)
+        logger.info(f"Queued export job {job_id}: {validation['params']}")
+        return {'success': True, 'job': dict(job), 'errors': []}
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Get a snapshot of an export job"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list_jobs(self) -> List[Dict]:
+        """List export jobs (newest first)"""
+        with self.lock:
+            jobs = [dict(job) for job in self.jobs.values()]
+        jobs.sort(key=lambda j: j['created_at'], reverse=True)
+        return jobs
+
+    def prune_jobs(self):
+        """Drop the oldest finished jobs beyond max_jobs (caller holds lock)"""
+        finished = [j for j in self.jobs.values() if j['status'] in ('completed', 'failed')]
+        excess = len(self.jobs) - self.max_jobs
+        if excess <= 0:
+            return
+        finished.sort(key=lambda j: j['created_at'])
+        for job in finished[:excess]:
+            del self.jobs[job['id']]
+
+    def update_job(self, job_id: str, **fields):
+        """Update job fields under the lock"""
+        with self.lock:
+            if job_id in self.jobs:
+                self.jobs[job_id].update(fields)
+
+    def run_job(self, job_id: str):
+        """Stream matching rows from storage into a new export file"""
+        job = self.get_job(job_id)
+        if job is None:
+            return
+        params = job['params']
+        writer_class = get_export_writer(params['format'])
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"export_{timestamp}_{job_id}{writer_class.extension}"
+        file_path = os.path.join(self.file_service.export_dir, filename)
+        tmp_path = file_path + '.tmp'
+
+        try:
+            dates = self.file_service.list_partition_dates(params['from'], params['to'])
+            self.update_job(
+                job_id, status='running', started_at=datetime.now().isoformat(),
+                partitions_total=len(dates)
+            )
+
+            rows_scanned = 0
+            rows_written = 0
+            writer = writer_class(tmp_path, params['columns'])
+            try:
+                for index, date in enumerate(dates, 1):
+                    # Filters run on raw CSV rows, before records are built
+                    for row in self.file_service.iter_csv_rows(date, params['publisher'], params['q'] or None):
+                        writer.write_row(row)
+                        rows_written += 1
+                    # Rows read, from the partition index
+                    for segment in self.file_service.get_segments(date):
+                        stat = os.stat(self.file_service.get_file_path(segment))
+                        rows_scanned += self.file_service.count_rows(segment, stat)
+                    self.update_job(
+                        job_id, partitions_done=index, rows_scanned=rows_scanned,
+                        rows_written=rows_written, progress=round(index / len(dates), 4)
+                    )
+            finally:
+                writer.close()
+
+            # Publish atomically so downloads never see a partial file
+            os.replace(tmp_path, file_path)
+            if writer_class.precompress:
+                precompress_file(file_path)
+
+            self.update_job(
+                job_id, status='completed', finished_at=datetime.now().isoformat(),
+                rows_scanned=rows_scanned, rows_written=rows_written,
+                progress=1.0, filename=filename
+            )
+            logger.info(f"Export job {job_id} wrote {rows_written} rows to {filename}")
+
+        except Exception as e:
+            error_msg = f"Error running export job: {str(e)}"
+            logger.error(error_msg)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            self.update_job(
+                job_id, status='failed', finished_at=datetime.now().isoformat(), error=error_msg
+            )
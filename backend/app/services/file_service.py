@@ -5,15 +5,30 @@ Manages daily CSV files for scan data storage
 """
 
 import csv
+import heapq
+import io
 import os
 import json
-from datetime import datetime
-from typing import Dict, List, Optional
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional
 import logging
+import threading
+import time
 import uuid
 
+from app.services.export_formats import EXPORT_WRITERS, get_export_writer
+from app.services.journal import WriteAheadJournal
+from app.services.partition_writer import DailyPartitionWriter, list_segments, read_manifest
+from app.services.scan_record import SCAN_FIELDS, ScanRecord, read_header, read_records, schema_version
+from app.utils.compression import precompress_file
+
 logger = logging.getLogger(__name__)
 
+# A row's time_received is taken just before it is appended, so it can
+# predate the start of the segment it lands in by a little
+SEGMENT_SLACK = timedelta(seconds=60)
+
 class FileService:
     def __init__(self, data_dir: str = "data"):
         self.data_dir = data_dir
@@ -24,26 +39,67 @@ class FileService:
         os.makedirs(self.export_dir, exist_ok=True)
         
         # CSV headers
-        self.csv_headers = [
-            "title",
-            "author", 
-            "publisher",
-            "date",
-            "abstract",
-            "url",
-            "time_received"
-        ]
+        self.csv_headers = list(SCAN_FIELDS)
+        
+        # Writer for the current day's partition
+        self.writer = DailyPartitionWriter(self.data_dir, self.csv_headers)
+        
+        # Partition index: cached row counts keyed by file size/mtime
+        self.index_path = os.path.join(data_dir, "index.json")
+        self.index = None
+        self.index_dirty = False
+        self.index_lock = threading.Lock()
+        
+        # Statistics cache refreshed by the maintenance scheduler
+        self.stats_cache = None
+        self.stats_cache_time = 0.0
+    
+    def configure_writer(self, config) -> None:
+        """
+        Apply rotation/fsync settings from app config, repair torn rows and
+        replay journals left by crashed workers
+        """
+        self.writer.configure(
+            timezone=config.get('ROTATION_TIMEZONE'),
+            fsync_policy=config.get('FSYNC_POLICY', 'always'),
+            fsync_batch_size=config.get('FSYNC_BATCH_SIZE', 100),
+            fsync_interval=config.get('FSYNC_INTERVAL', 1.0),
+            segments=config.get('PARTITION_SEGMENTS', 'daily'),
+            segment_max_bytes=config.get('SEGMENT_MAX_BYTES', 64 * 1024 * 1024)
+        )
+        self.writer.recover()
+        
+        if config.get('JOURNAL_ENABLED', False):
+            journal = WriteAheadJournal(
+                self.data_dir,
+                fsync_policy=config.get('FSYNC_POLICY', 'always'),
+                fsync_batch_size=config.get('FSYNC_BATCH_SIZE', 100),
+                fsync_interval=config.get('FSYNC_INTERVAL', 1.0),
+                max_size=config.get('JOURNAL_MAX_SIZE', 64 * 1024 * 1024)
+            )
+            replayed = journal.recover()
+            if replayed:
+                logger.warning(f"Recovered {replayed} rows from write-ahead journals")
+            journal.open()
+            self.writer.attach_journal(journal)
     
     def get_daily_filename(self, date: Optional[str] = None) -> str:
         """Get CSV filename for specific date (default: today)"""
         if date is None:
-            date = datetime.now().strftime("%Y-%m-%d")
+            date = self.writer.get_current_date()
         return f"{date}.csv"
     
     def get_file_path(self, filename: str) -> str:
         """Get full file path"""
         return os.path.join(self.data_dir, filename)
     
+    def get_segments(self, date: str) -> List[str]:
+        """Files holding a day's rows: the whole-day file and/or its segments"""
+        try:
+            return list_segments(self.data_dir).get(date, [])
+        except FileNotFoundError:
+            return []
+    
     def create_csv_file(self, file_path: str) -> bool:
         """Create new CSV file with headers"""
         try:
@@ -56,40 +112,25 @@ class FileService:
             logger.error(f"Error creating CSV file {file_path}: {str(e)}")
             return False
     
-    def save_scan_data(self, data: Dict) -> Dict:
+    def save_scan_data(self, data) -> Dict:
         """
         Save scan data to daily CSV file
         Returns: {'success': bool, 'file': str, 'error': str}
         """
         try:
-            # Get today's filename
-            filename = self.get_daily_filename()
-            file_path = self.get_file_path(filename)
+            # Prepare data row
+            record = data if isinstance(data, ScanRecord) else ScanRecord.from_dict(data)
             
-            # Create file if it doesn't exist
-            if not os.path.exists(file_path):
-                if not self.create_csv_file(file_path):
-                    return {
-                        'success': False,
-                        'error': 'Failed to create CSV file'
-                    }
+            def stamped_row():
+                # Taken under the partition lock, so rows land in time order
+                record.time_received = datetime.now().isoformat()
+                return record.to_row()
             
-            # Prepare data row
-            current_time = datetime.now().isoformat()
-            row_data = [
-                data.get("title", ""),
-                data.get("author", ""),
-                data.get("publisher", ""),
-                data.get("date", ""),
-                data.get("abstract", ""),
-                data.get("url", ""),
-                current_time
-            ]
+            # Append to today's partition (created with its header atomically)
+            filename = self.writer.append(stamped_row)
             
-            # Append data to CSV
-            with open(file_path, "a", encoding="utf-8", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow(row_data)
+            # Statistics are stale after a write
+            self.stats_cache = None
             
             logger.info(f"Data saved to {filename}")
             return {
@@ -106,25 +147,29 @@ class FileService:
                 'error': error_msg
             }
     
-    def export_all_data(self, data_list: List[Dict]) -> Dict:
+    def export_all_data(self, data_list: List[Dict], export_format: str = 'csv') -> Dict:
         """
-        Export all data to a single CSV file
+        Export all data to a single file in the requested format
         Returns: {'success': bool, 'file_id': str, 'error': str}
         """
+        tmp_path = None
         try:
+            writer_class = get_export_writer(export_format)
+            if writer_class is None:
+                raise ValueError(f"Unsupported format '{export_format}'. Use one of: {', '.join(EXPORT_WRITERS)}")
+            
             # Generate unique file ID
             file_id = str(uuid.uuid4())
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"export_{timestamp}_{file_id[:8]}.csv"
+            filename = f"export_{timestamp}_{file_id}{writer_class.extension}"
             file_path = os.path.join(self.export_dir, filename)
+            tmp_path = file_path + '.tmp'
             
             # Create export file
-            with open(file_path, "w", encoding="utf-8", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow(self.csv_headers)
-                
+            writer = writer_class(tmp_path, self.csv_headers)
+            try:
                 for item in data_list:
-                    row_data = [
+                    record = ScanRecord(
                         item.get("title", ""),
                         item.get("author", ""),
                         item.get("publisher", ""),
@@ -132,8 +177,15 @@ class FileService:
                         item.get("abstract", ""),
                         item.get("url", ""),
                         item.get("timestamp", datetime.now().isoformat())
-                    ]
-                    writer.writerow(row_data)
+                    )
+                    writer.write_row(record)
+            finally:
+                writer.close()
+            os.replace(tmp_path, file_path)
+            
+            # Pre-compress so downloads cost no CPU per request
+            if writer_class.precompress:
+                precompress_file(file_path)
             
             logger.info(f"Exported {len(data_list)} records to {filename}")
             return {
@@ -146,70 +198,358 @@ class FileService:
         except Exception as e:
             error_msg = f"Error exporting data: {str(e)}"
             logger.error(error_msg)
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
             return {
                 'success': False,
                 'error': error_msg
             }
     
     def list_csv_files(self) -> List[Dict]:
-        """List all CSV files in data directory"""
+        """List daily CSV partitions (a segmented day is listed once, as the sum of its segments)"""
         files = []
         try:
-            for filename in os.listdir(self.data_dir):
-                if filename.endswith('.csv') and not filename.startswith('export_'):
-                    file_path = self.get_file_path(filename)
-                    stat = os.stat(file_path)
-                    
+            for date, segments in list_segments(self.data_dir).items():
+                size = 0
+                row_count = 0
+                modified = 0.0
+                versions = []
+                for filename in segments:
+                    stat = os.stat(self.get_file_path(filename))
+                    size += stat.st_size
+                    modified = max(modified, stat.st_mtime)
                     # Count rows (excluding header)
-                    row_count = 0
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            row_count = sum(1 for line in f) - 1  # Exclude header
-                    except:
-                        row_count = 0
-                    
-                    files.append({
-                        'filename': filename,
-                        'date': filename.replace('.csv', ''),
-                        'size': stat.st_size,
-                        'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                        'row_count': row_count
-                    })
+                    row_count += self.count_rows(filename, stat)
+                    versions.append(self.get_schema_version(filename))
+                
+                known = [v for v in versions if v is not None]
+                files.append({
+                    'filename': f"{date}.csv",
+                    'date': date,
+                    'size': size,
+                    'modified': datetime.fromtimestamp(modified).isoformat(),
+                    'row_count': row_count,
+                    # Oldest schema among the segments
+                    'schema_version': min(known) if known else None,
+                    'segments': len(segments)
+                })
             
             # Sort by date (newest first)
             files.sort(key=lambda x: x['date'], reverse=True)
             
+            if self.index_dirty:
+                self.save_index()
+            
         except Exception as e:
             logger.error(f"Error listing CSV files: {str(e)}")
         
         return files
     
-    def get_csv_data(self, date: str) -> Optional[List[Dict]]:
+    def load_index(self) -> Dict:
+        """Load the partition index from disk once (caller holds index_lock)"""
+        if self.index is None:
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self.index = json.load(f).get('partitions', {})
+            except FileNotFoundError:
+                self.index = {}
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable index {self.index_path}: {str(e)}")
+                self.index = {}
+        return self.index
+    
+    def save_index(self) -> bool:
+        """Persist the partition index atomically"""
+        with self.index_lock:
+            index = self.load_index()
+            tmp_path = self.index_path + '.tmp'
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'partitions': index}, f)
+                os.replace(tmp_path, self.index_path)
+                self.index_dirty = False
+                return True
+            except Exception as e:
+                logger.error(f"Error saving index {self.index_path}: {str(e)}")
+                return False
+
+    def drop_index_entries(self, filenames: Iterable[str]) -> bool:
+        """Forget cached counts of files that were removed or rewritten"""
+        with self.index_lock:
+            index = self.load_index()
+            for filename in filenames:
+                index.pop(filename, None)
+            self.index_dirty = True
+        # Totals in the statistics cache include the dropped files
+        self.stats_cache = None
+        return self.save_index()
+
+    def count_newlines(self, file_path: str, offset: int = 0) -> int:
+        """Count newline bytes from offset to end of file"""
+        count = 0
+        with open(file_path, 'rb') as f:
+            f.seek(offset)
+            while True:
+                chunk = f.read(1024 * 1024)
+                if not chunk:
+                    break
+                count += chunk.count(b'\n')
+        return count
+    
+    def count_rows(self, filename: str, stat) -> int:
+        """
+        Count data rows of a partition, reusing the index when unchanged
+        Appends only grow a file, so growth is counted from the old size;
+        a file replaced by a rewrite (new inode) is recounted from scratch
+        """
+        with self.index_lock:
+            entry = self.load_index().get(filename)
+        same_file = bool(entry) and entry.get('ino') == stat.st_ino
+        
+        if same_file and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            return entry['row_count']
+        
+        grown = same_file and 0 < entry['size'] < stat.st_size
+        file_path = self.get_file_path(filename)
+        try:
+            if grown:
+                newlines = entry['newlines'] + self.count_newlines(file_path, entry['size'])
+            else:
+                newlines = self.count_newlines(file_path)
+        except Exception:
+            return 0
+        
+        row_count = max(newlines - 1, 0)  # Exclude header
+        if grown and 'schema_version' in entry:
+            version = entry['schema_version']
+        else:
+            version = schema_version(read_header(file_path) or ())
+        updated = {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'ino': stat.st_ino,
+            'newlines': newlines,
+            'row_count': row_count,
+            'schema_version': version
+        }
+        # Publisher counts track their own position (see count_publishers)
+        for key in ('publishers', 'publishers_size', 'publishers_ino'):
+            if entry and key in entry:
+                updated[key] = entry[key]
+        with self.index_lock:
+            self.load_index()[filename] = updated
+            self.index_dirty = True
+        return row_count
+    
+    def count_publishers(self, filename: str, stat) -> Counter:
+        """
+        Records per publisher ID in a partition (ID 0: rows without one)
+        Counts are cached in the index; when the file only grew, just the
+        appended rows are parsed. Only the publisher_id column is read and
+        aggregated as ints.
+        """
+        with self.index_lock:
+            entry = self.load_index().get(filename) or {}
+        cached = entry.get('publishers')
+        counted = entry.get('publishers_size', 0)
+        same_file = entry.get('publishers_ino') == stat.st_ino
+        if cached is not None and same_file and counted == stat.st_size:
+            return Counter({int(k): v for k, v in cached.items()})
+        
+        counts = Counter()
+        offset = 0
+        if cached is not None and same_file and 0 < counted < stat.st_size:
+            counts.update({int(k): v for k, v in cached.items()})
+            offset = counted
+        
+        file_path = self.get_file_path(filename)
+        header = read_header(file_path) or []
+        column = header.index('publisher_id') if 'publisher_id' in header else -1
+        with open(file_path, 'rb') as raw:
+            raw.seek(offset)
+            reader = csv.reader(io.TextIOWrapper(raw, encoding='utf-8', newline=''))
+            if offset == 0:
+                next(reader, None)
+            for row in reader:
+                if not row:
+                    continue
+                value = row[column] if 0 <= column < len(row) else ''
+                counts[int(value) if value.isdigit() else 0] += 1
+            size = raw.tell()
+        
+        with self.index_lock:
+            index = self.load_index()
+            if filename in index:
+                index[filename].update({
+                    'publishers': {str(k): v for k, v in counts.items()},
+                    'publishers_size': size,
+                    'publishers_ino': stat.st_ino
+                })
+                self.index_dirty = True
+        return counts
+    
+    def get_publisher_counts(self) -> Counter:
+        """Records per publisher ID across all partitions"""
+        totals = Counter()
+        for segments in list_segments(self.data_dir).values():
+            for filename in segments:
+                stat = os.stat(self.get_file_path(filename))
+                # Creates the index entry the counts are cached in
+                self.count_rows(filename, stat)
+                totals.update(self.count_publishers(filename, stat))
+        if self.index_dirty:
+            self.save_index()
+        return totals
+    
+    def get_schema_version(self, filename: str) -> Optional[int]:
+        """Schema version of a partition's header, from the index (after count_rows)"""
+        with self.index_lock:
+            entry = self.load_index().get(filename)
+        if entry and 'schema_version' in entry:
+            return entry['schema_version']
+        
+        version = schema_version(read_header(self.get_file_path(filename)) or ())
+        if entry:
+            # Index written before schema versions were tracked
+            with self.index_lock:
+                entry['schema_version'] = version
+                self.index_dirty = True
+        return version
+    
+    def compact_index(self) -> Dict:
+        """Drop index entries for partitions that no longer exist"""
+        try:
+            with self.index_lock:
+                index = self.load_index()
+                removed = [name for name in index if not os.path.exists(self.get_file_path(name))]
+                for name in removed:
+                    del index[name]
+            self.save_index()
+            return {
+                'success': True,
+                'removed': len(removed),
+                'entries': len(index)
+            }
+        except Exception as e:
+            error_msg = f"Error compacting index: {str(e)}"
+            logger.error(error_msg)
+            return {
+                'success': False,
+                'error': error_msg
+            }
+    
+    def get_csv_data(self, date: str) -> Optional[List[ScanRecord]]:
         """Get CSV data for specific date"""
         try:
-            filename = self.get_daily_filename(date)
-            file_path = self.get_file_path(filename)
-            
-            if not os.path.exists(file_path):
+            if not self.get_segments(date):
                 return None
-            
-            data = []
-            with open(file_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    data.append(dict(row))
-            
-            return data
+            return list(self.iter_csv_rows(date))
             
         except Exception as e:
             logger.error(f"Error reading CSV data for {date}: {str(e)}")
             return None
     
+    def list_partition_dates(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        """List daily partition dates (oldest first), optionally within [start, end]"""
+        dates = []
+        try:
+            for date in list_segments(self.data_dir):
+                if start and date < start:
+                    continue
+                if end and date > end:
+                    continue
+                dates.append(date)
+            dates.sort()
+        except Exception as e:
+            logger.error(f"Error listing partitions: {str(e)}")
+        return dates
+    
+    def iter_file_rows(self, filename: str, publishers: Optional[List[str]] = None,
+                       q: Optional[str] = None, since: Optional[str] = None,
+                       until: Optional[str] = None) -> Iterator[ScanRecord]:
+        """Stream records of one partition file without loading it into memory"""
+        file_path = self.get_file_path(filename)
+        if not os.path.exists(file_path):
+            return
+        with open(file_path, 'r', encoding='utf-8', newline='') as f:
+            for record in read_records(f, publishers, q):
+                if since and record.time_received < since:
+                    continue
+                if until and record.time_received > until:
+                    continue
+                yield record
+    
+    def iter_csv_rows(self, date: str, publishers: Optional[List[str]] = None,
+                      q: Optional[str] = None) -> Iterator[ScanRecord]:
+        """Stream records of a day (all its segments) without loading it into memory"""
+        streams = self.get_partition_streams(date, publishers, q)
+        if len(streams) == 1:
+            yield from streams[0]
+        else:
+            yield from heapq.merge(*streams, key=lambda record: record.time_received)
+    
+    def get_partition_streams(self, date: str, publishers: Optional[List[str]] = None,
+                              q: Optional[str] = None, since: Optional[str] = None,
+                              until: Optional[str] = None) -> List[Iterator[ScanRecord]]:
+        """
+        Record streams that together make up one day
+        Segments are skipped without being opened when their manifest start
+        times show they cannot hold rows within [since, until]
+        """
+        segments = self.get_segments(date)
+        started = read_manifest(self.data_dir, date) if (since or until) and len(segments) > 1 else {}
+        
+        # A segment ends where the next one (by start time) begins
+        timed = sorted((started[name], name) for name in segments if name in started)
+        ends = {name: timed[i + 1][0] for i, (_, name) in enumerate(timed[:-1])}
+        
+        streams = []
+        for filename in segments:
+            if filename in started:
+                lower = datetime.fromisoformat(started[filename]) - SEGMENT_SLACK
+                if until and datetime.fromisoformat(until) < lower:
+                    continue
+                if since and filename in ends:
+                    upper = datetime.fromisoformat(ends[filename]) + SEGMENT_SLACK
+                    if datetime.fromisoformat(since) > upper:
+                        continue
+            streams.append(self.iter_file_rows(filename, publishers, q, since, until))
+        return streams
+    
+    def iter_records(self, start: Optional[str] = None, end: Optional[str] = None,
+                     publishers: Optional[List[str]] = None,
+                     q: Optional[str] = None, since: Optional[str] = None,
+                     until: Optional[str] = None) -> Iterator[ScanRecord]:
+        """
+        Stream records across daily partitions in time_received order
+        A day's files only hold rows received that day, so days are chained
+        in order and only the streams within one day are k-way merged.
+        Memory stays at one row per open stream however wide the range is.
+        since/until (ISO timestamps) bound time_received; segments outside
+        them are not read. start/end are partition dates, which are in the
+        rotation timezone, so since/until are mapped to that zone first.
+        """
+        if since:
+            first = self.writer.partition_date(since)
+            start = max(start or first, first)
+        if until:
+            last = self.writer.partition_date(until)
+            end = min(end or last, last)
+        for date in self.list_partition_dates(start, end):
+            streams = self.get_partition_streams(date, publishers, q, since, until)
+            if not streams:
+                continue
+            if len(streams) == 1:
+                yield from streams[0]
+            else:
+                yield from heapq.merge(*streams, key=lambda record: record.time_received)
+    
     def get_statistics(self) -> Dict:
         """Get statistics about all CSV files"""
         try:
             files = self.list_csv_files()
             total_records = sum(f['row_count'] for f in files)
+            publishers = self.get_publisher_counts()
             
             stats = {
                 'total_files': len(files),
@@ -219,7 +559,12 @@ class FileService:
                     'start': files[-1]['date'] if files else None,
                     'end': files[0]['date'] if files else None
                 },
-                'files': files[:10]  # Latest 10 files
+                'files': files[:10],  # Latest 10 files
+                # Top publishers by ID (0 = not canonicalized)
+                'publishers': [
+                    {'id': publisher_id, 'count': count}
+                    for publisher_id, count in publishers.most_common(10)
+                ]
             }
             
             return stats
@@ -232,10 +577,36 @@ class FileService:
                 'error': str(e)
             }
     
+    def refresh_statistics(self) -> Dict:
+        """Recompute statistics and store them in the cache"""
+        stats = self.get_statistics()
+        self.stats_cache = stats
+        self.stats_cache_time = time.monotonic()
+        return stats
+    
+    def get_cached_statistics(self, max_age: float = 60) -> Dict:
+        """Get statistics from the cache, recomputing when older than max_age seconds"""
+        if self.stats_cache is None or time.monotonic() - self.stats_cache_time > max_age:
+            return self.refresh_statistics()
+        return self.stats_cache
+    
+    def list_export_files(self, names: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Export filenames, without temp files and the .gz download copies
+        made by precompress_file (gzip-format exports themselves are kept)
+        names is a listing of the export directory already taken
+        """
+        names = set(os.listdir(self.export_dir) if names is None else names)
+        return [
+            name for name in names
+            if name.startswith('export_') and not name.endswith('.tmp')
+            and not (name.endswith('.gz') and name[:-3] in names)
+        ]
+    
     def get_export_file_path(self, file_id: str) -> Optional[str]:
         """Get export file path by file ID"""
         try:
-            for filename in os.listdir(self.export_dir):
+            for filename in self.list_export_files():
                 if file_id in filename:
                     return os.path.join(self.export_dir, filename)
             return None
@@ -243,19 +614,23 @@ class FileService:
             logger.error(f"Error finding export file {file_id}: {str(e)}")
             return None
     
-    def cleanup_old_files(self, days_to_keep: int = 30) -> Dict:
-        """Clean up files older than specified days"""
+    def evict_exports(self, max_files: int = 100) -> Dict:
+        """Keep only the newest max_files exports (with their .gz copies)"""
         try:
-            cutoff_date = datetime.now().timestamp() - (days_to_keep * 24 * 60 * 60)
-            deleted_files = []
+            exports = []
+            for filename in self.list_export_files():
+                file_path = os.path.join(self.export_dir, filename)
+                exports.append((os.path.getmtime(file_path), filename))
             
-            for filename in os.listdir(self.data_dir):
-                if filename.endswith('.csv'):
-                    file_path = self.get_file_path(filename)
-                    if os.path.getmtime(file_path) < cutoff_date:
-                        os.remove(file_path)
-                        deleted_files.append(filename)
-                        logger.info(f"Deleted old file: {filename}")
+            exports.sort(reverse=True)
+            deleted_files = []
+            for _, filename in exports[max_files:]:
+                file_path = os.path.join(self.export_dir, filename)
+                for path in (file_path, file_path + '.gz'):
+                    if os.path.exists(path):
+                        os.remove(path)
+                deleted_files.append(filename)
+                logger.info(f"Evicted export file: {filename}")
             
             return {
                 'success': True,
@@ -264,7 +639,7 @@ class FileService:
             }
             
         except Exception as e:
-            error_msg = f"Error cleaning up files: {str(e)}"
+            error_msg = f"Error evicting export files: {str(e)}"
             logger.error(error_msg)
             return {
                 'success': False,
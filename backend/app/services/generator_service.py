@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Generator Service - Synthetic scan history for capacity testing
+Writes N days x M realistic records into daily partitions, reproducibly
+from a seed
+"""
+
+import bisect
+import itertools
+import math
+import os
+import random
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+from app.services.import_service import append_partition_rows
+from app.services.publisher_service import SEED_PUBLISHERS
+
+logger = logging.getLogger(__name__)
+
+TOPICS = [
+    "machine learning", "protein folding", "climate models", "graph neural networks",
+    "quantum error correction", "gene expression", "dark matter", "battery chemistry",
+    "reinforcement learning", "microbiome", "language models", "superconductivity",
+    "epidemiology", "ocean circulation", "computer vision", "crispr screening",
+    "federated learning", "exoplanets", "materials discovery", "neural decoding"
+]
+METHODS = [
+    "A scalable approach to", "Revisiting", "Towards robust", "Efficient", "A benchmark for",
+    "Understanding", "Learning", "Probabilistic", "Large-scale analysis of", "On the limits of"
+]
+WORDS = (
+    "we propose method results show significant improvement data model analysis approach "
+    "performance experiments baseline framework novel evaluate across datasets demonstrate "
+    "accuracy training structure signal network effect samples population measurement "
+    "observed increase reduction compared previous work study using based learning"
+).split()
+FIRST_NAMES = ["Jane", "Wei", "Maria", "Ahmed", "Yuki", "Olga", "Carlos", "Priya", "Lars", "Amara",
+               "Chen", "Sofia", "David", "Fatima", "Minh", "Elena", "Kwame", "Hana", "Lucas", "Ines"]
+LAST_NAMES = ["Smith", "Wang", "Garcia", "Khan", "Tanaka", "Ivanova", "Silva", "Patel", "Nilsen", "Okafor",
+              "Li", "Rossi", "Cohen", "Haddad", "Nguyen", "Popescu", "Mensah", "Sato", "Martin", "Costa"]
+FIELDS = ["Applied", "Computational", "Molecular", "Theoretical", "Environmental", "Clinical",
+          "Quantum", "Cognitive", "Statistical", "Marine"]
+SUBJECTS = ["Physics", "Biology", "Chemistry", "Informatics", "Medicine", "Ecology",
+            "Neuroscience", "Engineering", "Economics", "Geoscience"]
+
+# Article date spellings seen from extractors (what normalize_date handles, and some it cannot)
+DATE_FORMATS = [
+    (0.45, lambda d: d.strftime('%Y-%m-%d')),
+    (0.15, lambda d: d.strftime('%m/%d/%Y')),
+    (0.10, lambda d: d.strftime('%m-%d-%Y')),
+    (0.15, lambda d: d.strftime('%B %d, %Y')),
+    (0.05, lambda d: d.strftime('Published: %Y-%m-%dT08:00:00Z')),
+    (0.05, lambda d: d.strftime('%d %b %Y')),
+    (0.05, lambda d: ''),
+]
+
+# Query strings added to a re-scanned URL (same article after canonicalization)
+TRACKING_SUFFIXES = ["?utm_source=twitter", "?utm_medium=email&utm_campaign=alert", "#abstract", "?ref=feed"]
+
+def zipf_cum_weights(count: int, exponent: float) -> List[float]:
+    """Cumulative Zipf weights of ranks 1..count"""
+    return list(itertools.accumulate(1.0 / (rank ** exponent) for rank in range(1, count + 1)))
+
+class GeneratorService:
+    """
+    Records look like what the extension sends: publishers follow a Zipf
+    distribution over known outlets and generated journals (spelled several
+    ways, sometimes missing), abstracts have log-normal lengths, dates come
+    in mixed formats, and a share of records re-scan an earlier URL. Every
+    record goes through ParseService and is written in the storage format of
+    imports; times received are spread over each day in order.
+    """
+    def __init__(self, file_service, parse_service, seed: int = 42, publishers: int = 200,
+                 zipf_exponent: float = 1.1, duplicate_rate: float = 0.05, batch_size: int = 50000):
+        self.file_service = file_service
+        self.parse_service = parse_service
+        self.rng = random.Random(seed)
+        self.duplicate_rate = duplicate_rate
+        self.batch_size = batch_size
+        # Bulk writes only: days follow its rotation timezone
+        self.writer = file_service.writer
+        self.publishers = self.build_publishers(publishers)
+        self.publisher_weights = zipf_cum_weights(len(self.publishers), zipf_exponent)
+        self.date_weights = list(itertools.accumulate(weight for weight, _ in DATE_FORMATS))
+        # URLs of recent articles, re-scanned as duplicates
+        self.recent_urls = deque(maxlen=10000)
+        self.article_ids = itertools.count(1)
+        # date -> file the day's rows were written to
+        self.written = {}
+
+    def build_publishers(self, count: int) -> List[Tuple[List[str], str]]:
+        """(spellings, domain) per publisher, most popular first"""
+        publishers = []
+        for name, (aliases, domains) in SEED_PUBLISHERS.items():
+            spellings = [name, name.upper()] + [alias.title() for alias in aliases]
+            publishers.append((spellings, domains[-1]))
+        for field, subject in itertools.product(FIELDS, SUBJECTS):
+            name = f"Journal of {field} {subject}"
+            slug = f"j{field[:4]}{subject[:4]}".lower()
+            publishers.append(([name, name.lower(), f"{field} {subject}"], f"{slug}.org"))
+        self.rng.shuffle(publishers)
+        return publishers[:max(count, 1)]
+
+    def pick_date_format(self):
+        index = bisect.bisect_left(self.date_weights, self.rng.random() * self.date_weights[-1])
+        return DATE_FORMATS[min(index, len(DATE_FORMATS) - 1)][1]
+
+    def make_text(self, length: int) -> str:
+        words = []
+        size = 0
+        while size < length:
+            word = self.rng.choice(WORDS)
+            words.append(word)
+            size += len(word) + 1
+        return ' '.join(words).capitalize() + '.'
+
+    def make_item(self, day: datetime) -> Dict:
+        """One raw scan as the extension would send it"""
+        rng = self.rng
+        if self.recent_urls and rng.random() < self.duplicate_rate:
+            # Same article scanned again, sometimes through a tracking link
+            url = rng.choice(self.recent_urls)
+            if rng.random() < 0.5:
+                url += rng.choice(TRACKING_SUFFIXES)
+        else:
+            url = None
+
+        index = bisect.bisect_left(self.publisher_weights, rng.random() * self.publisher_weights[-1])
+        spellings, domain = self.publishers[min(index, len(self.publishers) - 1)]
+        if url is None:
+            article = next(self.article_ids)
+            url = f"https://{'www.' if rng.random() < 0.3 else ''}{domain}/articles/{article:08d}-{rng.getrandbits(32):08x}"
+            self.recent_urls.append(url)
+        # Missing sometimes (publisher then comes from the domain)
+        publisher = rng.choice(spellings) if rng.random() < 0.9 else ''
+
+        published = day - timedelta(days=int(rng.expovariate(1 / 30)))
+        # Log-normal abstract length, median about 900 characters
+        abstract_length = min(int(rng.lognormvariate(math.log(900), 0.5)), 4000)
+        return {
+            'title': f"{rng.choice(METHODS)} {rng.choice(TOPICS)} with {rng.choice(TOPICS)}",
+            'author': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" if rng.random() < 0.85 else '',
+            'publisher': publisher,
+            'date': self.pick_date_format()(published),
+            'abstract': self.make_text(abstract_length) if rng.random() < 0.95 else '',
+            'url': url
+        }
+
+    def write_rows(self, date: str, rows: List, file_path: Optional[str]) -> str:
+        """Append a batch of the day's rows (in order) after the previous batch"""
+        target = os.path.basename(file_path) if file_path else None
+        return append_partition_rows(self.writer, date, rows, target)
+
+    def generate_day(self, day: datetime, count: int) -> int:
+        """Write one day's records (received in order over the day); returns rows written"""
+        date = day.strftime('%Y-%m-%d')
+        offsets = sorted(self.rng.random() * 86400 for _ in range(count))
+        rows = []
+        file_path = None
+        for offset in offsets:
+            record = self.parse_service.clean_scan_data(self.make_item(day))
+            record.time_received = self.writer.local_time(day + timedelta(seconds=offset)).isoformat()
+            rows.append(record.to_row())
+            if len(rows) >= self.batch_size:
+                file_path = self.write_rows(date, rows, file_path)
+                rows = []
+        if rows:
+            file_path = self.write_rows(date, rows, file_path)
+
+        # Age the file like real history so retention sees it as that day's
+        end_of_day = (day + timedelta(days=1)).timestamp() - 1
+        os.utime(file_path, (end_of_day, end_of_day))
+        self.written[date] = file_path
+        return count
+
+    def generate(self, days: int, per_day: int, end_date: Optional[str] = None,
+                 progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Generate days x per_day records ending at end_date (default: yesterday)
+        Returns: {'days', 'records', 'bytes', 'seconds'}
+        """
+        started = time.monotonic()
+        if end_date:
+            end = datetime.strptime(end_date, '%Y-%m-%d')
+        else:
+            end = datetime.strptime(self.writer.get_current_date(), '%Y-%m-%d') - timedelta(days=1)
+        stats = {'days': 0, 'records': 0, 'bytes': 0}
+
+        for offset in range(days - 1, -1, -1):
+            day = end - timedelta(days=offset)
+            stats['records'] += self.generate_day(day, per_day)
+            stats['days'] += 1
+            stats['bytes'] += os.path.getsize(self.written[day.strftime('%Y-%m-%d')])
+            if progress:
+                progress(dict(stats, date=day.strftime('%Y-%m-%d'), seconds=round(time.monotonic() - started, 3)))
+
+        stats['seconds'] = round(time.monotonic() - started, 3)
+        logger.info(f"Generated {stats['records']} records over {stats['days']} days")
+        return stats
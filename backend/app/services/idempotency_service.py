@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Idempotency Service - Seen-key store for retried ingestion requests
+Keys are claimed and their results written through to an on-disk SQLite
+table shared by all workers, with recent results cached in an in-memory
+LRU; every entry expires after a TTL
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+SPILL_FILENAME = "idempotency.db"
+
+# Requests still running after this many seconds no longer block retries
+PENDING_TIMEOUT = 60
+
+def key_digest(key: str) -> bytes:
+    """Fixed-size digest stored instead of the client's key"""
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+
+def request_fingerprint(body: bytes) -> bytes:
+    """Digest of a request body, to detect a key reused for another request"""
+    return hashlib.blake2b(body, digest_size=16).digest()
+
+class IdempotencyService:
+    def __init__(self, data_dir: str = "data", max_entries: int = 10000, ttl: float = 24 * 60 * 60):
+        self.path = os.path.join(data_dir, SPILL_FILENAME)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        # digest -> (expires_at, fingerprint, status, body), oldest first
+        self.entries = OrderedDict()
+        # Keys this worker has claimed for requests still running
+        self.pending = set()
+        self.db = None
+        # Rows in the table as of the last count (other workers add to it too)
+        self.stored = 0
+        self.stats = {'hits': 0, 'misses': 0, 'conflicts': 0, 'written': 0}
+
+    def open_db(self):
+        """Open the shared table on first use (caller holds lock)"""
+        if self.db is None:
+            self.db = sqlite3.connect(self.path, check_same_thread=False)
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute('PRAGMA synchronous=NORMAL')
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS seen_keys ('
+                'digest BLOB PRIMARY KEY, expires_at REAL, fingerprint BLOB, status INTEGER, body TEXT)'
+            )
+            self.stored = self.db.execute('SELECT COUNT(*) FROM seen_keys').fetchone()[0]
+        return self.db
+
+    def lookup(self, digest: bytes, now: float) -> Optional[Tuple]:
+        """Completed entry for a key cached by this worker (caller holds lock)"""
+        entry = self.entries.get(digest)
+        if entry is None:
+            return None
+        if entry[0] > now:
+            self.entries.move_to_end(digest)
+            return entry
+        del self.entries[digest]
+        return None
+
+    def claim(self, digest: bytes, fingerprint: bytes, now: float) -> Tuple[bool, Optional[Tuple]]:
+        """
+        Claim a key in the shared table (caller holds lock)
+        A pending row (no status yet) is inserted unless another worker
+        holds the key; returns (True, None) when claimed, otherwise
+        (False, row) with the live row. Expired rows, including claims of
+        requests running longer than PENDING_TIMEOUT, are taken over.
+        """
+        db = self.open_db()
+        with db:
+            db.execute('DELETE FROM seen_keys WHERE digest = ? AND expires_at <= ?', (digest, now))
+            inserted = db.execute(
+                'INSERT OR IGNORE INTO seen_keys VALUES (?, ?, ?, NULL, NULL)',
+                (digest, now + PENDING_TIMEOUT, fingerprint)
+            ).rowcount
+            if inserted:
+                self.stored += 1
+                return True, None
+            row = db.execute(
+                'SELECT expires_at, fingerprint, status, body FROM seen_keys WHERE digest = ?', (digest,)
+            ).fetchone()
+        return False, tuple(row)
+
+    def cache(self, digest: bytes, entry: Tuple):
+        """Keep an entry in the LRU, dropping the oldest (caller holds lock)"""
+        self.entries[digest] = entry
+        self.entries.move_to_end(digest)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def begin(self, key: str, fingerprint: bytes) -> Tuple[str, Optional[Tuple]]:
+        """
+        Claim a key before running a request
+        The claim is a row in the shared table, so a retry that reaches
+        another worker while the first request runs sees it too.
+        Returns ('new', None), ('replay', (expires_at, fingerprint, status, body)),
+        ('in_progress', None) or ('mismatch', None)
+        """
+        digest = key_digest(key)
+        now = time.time()
+        with self.lock:
+            entry = self.lookup(digest, now)
+            if entry is None:
+                try:
+                    claimed, entry = self.claim(digest, fingerprint, now)
+                except Exception as e:
+                    # Without the table only this worker's cache dedupes
+                    logger.error(f"Error claiming idempotency key: {str(e)}")
+                    claimed = True
+                if claimed:
+                    self.pending.add(digest)
+                    self.stats['misses'] += 1
+                    return 'new', None
+                if entry[2] is None:
+                    self.stats['conflicts'] += 1
+                    return ('in_progress' if entry[1] == fingerprint else 'mismatch'), None
+                self.cache(digest, entry)
+
+            if entry[1] != fingerprint:
+                self.stats['conflicts'] += 1
+                return 'mismatch', None
+            self.stats['hits'] += 1
+            return 'replay', entry
+
+    def complete(self, key: str, fingerprint: bytes, status: int, body: str):
+        """Remember the result of a finished request, replacing its claim"""
+        digest = key_digest(key)
+        entry = (time.time() + self.ttl, fingerprint, status, body)
+        with self.lock:
+            self.pending.discard(digest)
+            self.cache(digest, entry)
+            try:
+                db = self.open_db()
+                with db:
+                    db.execute('INSERT OR REPLACE INTO seen_keys VALUES (?, ?, ?, ?, ?)', (digest,) + entry)
+                self.stats['written'] += 1
+            except Exception as e:
+                # Still answered from memory by this worker
+                logger.error(f"Error storing idempotency key: {str(e)}")
+
+    def release(self, key: str):
+        """Drop the claim of a request that failed, so a retry runs again"""
+        digest = key_digest(key)
+        with self.lock:
+            self.pending.discard(digest)
+            try:
+                db = self.open_db()
+                with db:
+                    self.stored -= db.execute(
+                        'DELETE FROM seen_keys WHERE digest = ? AND status IS NULL', (digest,)
+                    ).rowcount
+            except Exception as e:
+                # The claim expires after PENDING_TIMEOUT
+                logger.error(f"Error releasing idempotency key: {str(e)}")
+
+    def purge(self) -> Dict:
+        """Drop expired entries from memory and disk"""
+        now = time.time()
+        try:
+            with self.lock:
+                expired = [digest for digest, entry in self.entries.items() if entry[0] <= now]
+                for digest in expired:
+                    del self.entries[digest]
+                removed = len(expired)
+                if os.path.exists(self.path):
+                    db = self.open_db()
+                    with db:
+                        removed += db.execute('DELETE FROM seen_keys WHERE expires_at <= ?', (now,)).rowcount
+                    self.stored = db.execute('SELECT COUNT(*) FROM seen_keys').fetchone()[0]
+            return {'success': True, 'removed': removed}
+        except Exception as e:
+            error_msg = f"Error purging idempotency keys: {str(e)}"
+            logger.error(error_msg)
+            return {'success': False, 'error': error_msg}
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            return dict(self.stats, memory=len(self.entries), disk=self.stored, pending=len(self.pending))
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Import Service - Bulk import of external CSV/JSONL datasets
+Streams input files, cleans rows in batches and appends them to daily partitions
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterator, Optional
+import logging
+
+from app.services.partition_writer import DailyPartitionWriter, append_locked, segment_filename
+from app.services.scan_record import SCAN_FIELDS
+
+logger = logging.getLogger(__name__)
+
+RECEIVED_COLUMN = SCAN_FIELDS.index('time_received')
+
+def parse_received(value: str) -> Optional[datetime]:
+    """An ISO date/datetime as naive local time, or None if it is not one"""
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except (AttributeError, TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        # Stored times are naive server-local time
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+def open_input(path: str):
+    """Open a (possibly gzip-compressed) input file as text"""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+def detect_format(path: str) -> str:
+    """'csv' or 'jsonl' from the file extension"""
+    name = path[:-3] if path.endswith('.gz') else path
+    if name.endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    return 'csv'
+
+def iter_input_rows(path: str, input_format: Optional[str] = None) -> Iterator[Dict]:
+    """Stream raw rows (dicts) from a CSV or JSONL input"""
+    input_format = input_format or detect_format(path)
+    with open_input(path) as f:
+        if input_format == 'jsonl':
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.warning(f"{path}:{line_number}: skipping invalid JSON ({str(e)})")
+                    continue
+                if isinstance(item, dict) and isinstance(item.get('data'), dict):
+                    item = item['data']
+                if isinstance(item, dict):
+                    yield item
+        else:
+            yield from csv.DictReader(f)
+
+def append_partition_rows(writer: DailyPartitionWriter, date: str, rows,
+                          target: Optional[str] = None) -> str:
+    """
+    Append rows (SCAN_FIELDS order, sorted by time_received) to a partition
+    of date in one row-aligned write. Readers merge a day's files assuming
+    each is in time_received order, so rows go to target (a file this
+    import wrote earlier rows to, passed only when these rows come after
+    them), else to a new whole-day file, else to a new import segment
+    (YYYY-MM-DD.iNNNN.csv). The current day always gets its own segment,
+    since live appends continue in the whole-day file.
+    Returns: path of the file written
+    """
+    file_path = os.path.join(writer.data_dir, target) if target else writer.get_file_path(date)
+    if target is None and (date >= writer.get_current_date() or not writer.create_partition(file_path)):
+        number = 1
+        while True:
+            file_path = os.path.join(writer.data_dir, segment_filename(date, f"i{number:04d}"))
+            if writer.create_partition(file_path):
+                break
+            number += 1
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    # Locked like live appends, so rows stay whole next to the workers
+    append_locked(file_path, buffer.getvalue().encode('utf-8'))
+    return file_path
+
+class ImportService:
+    def __init__(self, file_service, parse_service, batch_size: int = 50000):
+        self.file_service = file_service
+        self.parse_service = parse_service
+        self.batch_size = batch_size
+        self.seen_keys = set()
+        self.buffers = {}
+        self.buffered = 0
+        # date -> (file this import appends to, its last time_received)
+        self.targets = {}
+        # Bulk writes only: partition dates follow its rotation timezone
+        self.writer = file_service.writer
+
+    def record_key(self, record) -> int:
+        """Dedup key: canonical URL, or title + date when there is no URL"""
+        if record.url:
+            return hash(self.parse_service.canonicalize_url(record.url))
+        return hash((record.title.lower(), record.date))
+
+    def load_existing_keys(self) -> int:
+        """Collect dedup keys of everything already stored"""
+        count = 0
+        for record in self.file_service.iter_records():
+            self.seen_keys.add(self.record_key(record))
+            count += 1
+        return count
+
+    def received_time(self, item: Dict, record) -> str:
+        """time_received for an imported row (input value, else article date, else now)"""
+        for value in (item.get('time_received'), item.get('timestamp'), record.date):
+            parsed = parse_received(value) if isinstance(value, str) and value.strip() else None
+            if parsed is not None:
+                return parsed.isoformat()
+        return datetime.now().isoformat()
+
+    def flush(self):
+        """Append all buffered rows, one large row-aligned write per partition"""
+        for date, rows in self.buffers.items():
+            rows.sort(key=lambda row: row[RECEIVED_COLUMN])
+            # Keep filling this import's file of the day while rows stay in order
+            target, last = self.targets.get(date, (None, ''))
+            if target and rows[0][RECEIVED_COLUMN] < last:
+                target = None
+            file_path = append_partition_rows(self.writer, date, rows, target)
+            self.targets[date] = (os.path.basename(file_path), rows[-1][RECEIVED_COLUMN])
+        self.buffers = {}
+        self.buffered = 0
+
+    def import_file(self, path: str, input_format: Optional[str] = None,
+                    progress: Optional[Callable[[Dict], None]] = None,
+                    progress_every: int = 100000) -> Dict:
+        """
+        Import one input file
+        Returns: {'file', 'rows_read', 'imported', 'duplicates', 'invalid', 'partitions', 'seconds'}
+        """
+        started = time.monotonic()
+        stats = {'file': path, 'rows_read': 0, 'imported': 0, 'duplicates': 0, 'invalid': 0}
+        partitions = set()
+
+        for item in iter_input_rows(path, input_format):
+            stats['rows_read'] += 1
+            # Same requirement as validate_scan_data: a title or a URL
+            if not (item.get('title') or item.get('url')):
+                stats['invalid'] += 1
+                continue
+            record = self.parse_service.clean_scan_data(item)
+
+            key = self.record_key(record)
+            if key in self.seen_keys:
+                stats['duplicates'] += 1
+                continue
+            self.seen_keys.add(key)
+
+            record.time_received = self.received_time(item, record)
+            date = self.writer.partition_date(record.time_received)
+            self.buffers.setdefault(date, []).append(record.to_row())
+            partitions.add(date)
+            self.buffered += 1
+            stats['imported'] += 1
+
+            if self.buffered >= self.batch_size:
+                self.flush()
+            if progress and stats['rows_read'] % progress_every == 0:
+                progress(dict(stats, seconds=round(time.monotonic() - started, 3)))
+
+        self.flush()
+        stats['partitions'] = len(partitions)
+        stats['seconds'] = round(time.monotonic() - started, 3)
+        logger.info(f"Imported {stats['imported']} rows from {path}")
+        return stats
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Write-Ahead Journal - Durable log of appended rows
+Rows are journaled before they reach their CSV partition, so partitions can
+be written without fsync and rebuilt after a crash by replaying the journal
+"""
+
+import csv
+import glob
+import io
+import json
+import os
+import struct
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from typing import Dict, Iterator, List, Tuple
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows: no ownership check, single-process only
+    fcntl = None
+
+from app.services.partition_writer import append_locked, repair_torn_tail, write_all
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_MAGIC = b"SSJRNL02"
+
+# Journals written before partitions could be segmented (still replayed)
+JOURNAL_MAGIC_V1 = b"SSJRNL01"
+
+# Record header: payload length, CRC32 of kind + payload, kind
+RECORD_HEADER = struct.Struct('<IIB')
+
+RECORD_ROW = 1          # payload: partition filename + NUL + encoded CSV row (v1: 10-byte date + row)
+RECORD_CHECKPOINT = 2   # payload: JSON {filename: size} of partitions known durable
+RECORD_OFFSET = 3       # payload: JSON {filename: size} of a partition before its first journaled row
+
+# Upper bound on a single record, guards replay against garbage lengths
+MAX_RECORD_SIZE = 64 * 1024 * 1024
+
+def journal_path(data_dir: str) -> str:
+    """New journal file for one writer (each worker process appends to its own)"""
+    return os.path.join(data_dir, f"journal.{os.getpid()}.{uuid.uuid4().hex[:8]}.wal")
+
+def encode_record(kind: int, payload: bytes) -> bytes:
+    checksum = zlib.crc32(payload, zlib.crc32(bytes((kind,))))
+    return RECORD_HEADER.pack(len(payload), checksum, kind) + payload
+
+def decode_row(payload: bytes, version: int) -> Tuple[str, bytes]:
+    """(partition filename, encoded CSV row) of a row record"""
+    if version == 1:
+        return f"{payload[:10].decode('ascii')}.csv", payload[10:]
+    filename, _, row = payload.partition(b'\0')
+    return filename.decode('ascii'), row
+
+def read_records(data: bytes) -> Tuple[List[Tuple[int, bytes]], int]:
+    """
+    Decode journal records, stopping at the first torn or corrupt one
+    Returns: (records as (kind, payload), bytes of valid journal)
+    """
+    if not data.startswith((JOURNAL_MAGIC, JOURNAL_MAGIC_V1)):
+        return [], 0
+    records = []
+    position = len(JOURNAL_MAGIC)
+    while position + RECORD_HEADER.size <= len(data):
+        length, checksum, kind = RECORD_HEADER.unpack_from(data, position)
+        start = position + RECORD_HEADER.size
+        end = start + length
+        if length > MAX_RECORD_SIZE or end > len(data):
+            break
+        payload = data[start:end]
+        if zlib.crc32(payload, zlib.crc32(bytes((kind,)))) != checksum:
+            break
+        records.append((kind, payload))
+        position = end
+    return records, position
+
+def parse_rows(data: bytes) -> Iterator[Tuple[str, ...]]:
+    """CSV records of encoded partition rows"""
+    for row in csv.reader(io.StringIO(data.decode('utf-8', errors='replace'), newline='')):
+        yield tuple(row)
+
+def replay_journal(data_dir: str, data: bytes) -> int:
+    """
+    Re-append journaled rows missing from their partitions
+    Rows already present past the partition's offset (from the last
+    checkpoint, or recorded before its first journaled row since) are
+    matched as parsed CSV records and skipped, so replaying a journal twice
+    never duplicates rows and only the tail written since is read
+    Returns: number of rows appended
+    """
+    records, _ = read_records(data)
+    version = 1 if data.startswith(JOURNAL_MAGIC_V1) else 2
+    offsets = {}
+    rows = {}
+    for kind, payload in records:
+        if kind == RECORD_CHECKPOINT:
+            offsets = json.loads(payload.decode('utf-8'))
+            rows = {}
+        elif kind == RECORD_OFFSET:
+            for filename, offset in json.loads(payload.decode('utf-8')).items():
+                offsets.setdefault(filename, offset)
+        elif kind == RECORD_ROW:
+            filename, row = decode_row(payload, version)
+            rows.setdefault(filename, []).append(row)
+
+    replayed = 0
+    for filename, journaled in rows.items():
+        file_path = os.path.join(data_dir, filename)
+        if not os.path.exists(file_path):
+            logger.warning(f"Skipping {len(journaled)} journaled rows for missing partition {filename}")
+            continue
+        repair_torn_tail(file_path)
+        with open(file_path, 'rb') as f:
+            # Start at the first line boundary at or after the offset (the
+            # byte before it ends the previous line when it is a boundary)
+            f.seek(max(min(offsets.get(filename, 0), os.path.getsize(file_path)) - 1, 0))
+            if f.tell():
+                f.readline()
+            # Compare parsed records: a quoted field may span several lines
+            existing = Counter(parse_rows(f.read()))
+        missing = []
+        for row in journaled:
+            record = next(parse_rows(row), None)
+            if existing[record] > 0:
+                existing[record] -= 1
+            else:
+                missing.append(row)
+        if missing:
+            append_locked(file_path, b''.join(missing))
+            logger.warning(f"Replayed {len(missing)} journaled rows into {filename}")
+        replayed += len(missing)
+    return replayed
+
+class WriteAheadJournal:
+    """
+    Append-only journal of one worker process
+    Records are length-prefixed and CRC32-checked; fsyncs follow the same
+    policies as the partition writer and are shared between threads (a
+    thread whose record was covered by another thread's fsync skips its own)
+    """
+    def __init__(self, data_dir: str, fsync_policy: str = 'interval', fsync_batch_size: int = 100,
+                 fsync_interval: float = 1.0, max_size: int = 64 * 1024 * 1024):
+        self.data_dir = data_dir
+        self.path = journal_path(data_dir)
+        self.fsync_policy = fsync_policy
+        self.fsync_batch_size = max(int(fsync_batch_size), 1)
+        self.fsync_interval = float(fsync_interval)
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.file = None
+        self.size = 0
+        # Partitions whose replay offset is recorded since the last checkpoint
+        self.offsets = {}
+        # Sequence numbers of the last written and last fsynced record
+        self.written = 0
+        self.synced = 0
+        self.last_fsync = time.monotonic()
+        self.stats = {'records': 0, 'fsyncs': 0, 'checkpoints': 0, 'replayed': 0}
+
+    def recover(self) -> int:
+        """
+        Replay journals left behind by processes that are no longer running
+        (a live process holds a lock on its own journal)
+        Returns: number of rows replayed
+        """
+        replayed = 0
+        for path in sorted(glob.glob(os.path.join(self.data_dir, 'journal.*.wal'))):
+            try:
+                with open(path, 'rb') as f:
+                    if fcntl is not None:
+                        try:
+                            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        except BlockingIOError:
+                            continue
+                    replayed += replay_journal(self.data_dir, f.read())
+                    os.remove(path)
+            except FileNotFoundError:
+                # Recovered by another worker starting at the same time
+                continue
+            except Exception as e:
+                logger.error(f"Error replaying journal {path}: {str(e)}")
+        self.stats['replayed'] += replayed
+        return replayed
+
+    def open(self):
+        """Start this process's journal (run recover() first)"""
+        with self.lock:
+            self.file = open(self.path, 'xb', buffering=0)
+            if fcntl is not None:
+                # Held for the lifetime of the process
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+            self.reset({})
+
+    def reset(self, offsets: Dict[str, int]):
+        """Truncate to a single checkpoint record (caller holds lock)"""
+        self.file.truncate(0)
+        self.file.seek(0)
+        data = JOURNAL_MAGIC + encode_record(RECORD_CHECKPOINT, json.dumps(offsets).encode('utf-8'))
+        write_all(self.file, data)
+        os.fsync(self.file.fileno())
+        self.size = len(data)
+        self.offsets = dict(offsets)
+        self.synced = self.written
+        self.last_fsync = time.monotonic()
+
+    def mark(self, filename: str, offset: int):
+        """
+        Record a partition's size before this journal's first row for it
+        since the last checkpoint (caller holds the partition's file lock),
+        so replay only reads the partition from there
+        """
+        record = encode_record(RECORD_OFFSET, json.dumps({filename: offset}).encode('utf-8'))
+        with self.lock:
+            write_all(self.file, record)
+            self.size += len(record)
+            self.offsets[filename] = offset
+
+    def append(self, filename: str, row: bytes) -> int:
+        """
+        Journal one encoded CSV row for a partition file
+        Returns: sequence number to pass to sync()
+        """
+        record = encode_record(RECORD_ROW, filename.encode('ascii') + b'\0' + row)
+        with self.lock:
+            write_all(self.file, record)
+            self.size += len(record)
+            self.written += 1
+            self.stats['records'] += 1
+            return self.written
+
+    def sync(self, sequence: int):
+        """Fsync according to the policy so that record sequence is durable"""
+        if self.fsync_policy == 'always':
+            should_sync = True
+        elif self.fsync_policy == 'batch':
+            should_sync = sequence - self.synced >= self.fsync_batch_size
+        elif self.fsync_policy == 'interval':
+            should_sync = time.monotonic() - self.last_fsync >= self.fsync_interval
+        else:
+            should_sync = False
+        if not should_sync:
+            return
+
+        with self.sync_lock:
+            if self.synced >= sequence:
+                return
+            target = self.written
+            os.fsync(self.file.fileno())
+            self.synced = max(self.synced, target)
+            self.last_fsync = time.monotonic()
+            self.stats['fsyncs'] += 1
+
+    def needs_checkpoint(self) -> bool:
+        return self.size >= self.max_size
+
+    def checkpoint(self, offsets: Dict[str, int]):
+        """
+        Drop journaled rows once their partitions are fsynced
+        offsets maps each partition to a size it had reached when fsynced;
+        replay only looks for missing rows past it
+        """
+        with self.lock:
+            self.reset(offsets)
+            self.stats['checkpoints'] += 1
+
+    def close(self):
+        """Close and delete the journal (partitions must be fsynced first)"""
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.close()
+            self.file = None
+            os.remove(self.path)
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats, size=self.size, unsynced=self.written - self.synced)
@@ -6,14 +6,43 @@ Handles text cleaning, validation, and data normalization
 
 import re
 import html
+import json
 from typing import Dict, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 from datetime import datetime
 import logging
+import sys
+
+from app.services.scan_record import SCAN_FIELDS, ScanRecord
 
 logger = logging.getLogger(__name__)
 
+# Query parameters that only track the visit, never select content
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    'ref', 'ref_src', 'ref_url', 'referrer', 'spm', 'cmpid', '_ga', '_gl',
+    'amp', 'outputtype'
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'hsa_', 'oly_', 'vero_')
+
+# Host prefixes of mobile/AMP mirrors of the same page
+MIRROR_HOST_PREFIXES = ('www.', 'm.', 'mobile.', 'amp.')
+
+# Request fields that are transport metadata, not article data
+METADATA_FIELDS = {'data', 'extra', 'record_id', 'sources', 'timestamp', 'time_received'}
+
+# Limits for extra fields kept in the 'extra' column
+MAX_EXTRA_FIELDS = 20
+MAX_EXTRA_SIZE = 4000
+
+# Extra field keeping the publisher name as received when it was canonicalized
+RAW_PUBLISHER_FIELD = 'raw_publisher'
+
 class ParseService:
-    def __init__(self):
+    def __init__(self, publishers=None):
+        # Optional PublisherService mapping raw publishers to canonical ones
+        self.publishers = publishers
+        
         # Common patterns for cleaning
         self.whitespace_pattern = re.compile(r'\s+')
         self.special_chars_pattern = re.compile(r'[^\w\s\-.,;:!?()\[\]{}"\'/]')
@@ -45,9 +74,10 @@ class ParseService:
             # Remove control characters but keep basic punctuation
             # text = self.special_chars_pattern.sub('', text)
             
-            # Truncate if max_length specified
+            # Truncate if max_length specified (result, '...' included, fits
+            # max_length so cleaning already-clean text is a no-op)
             if max_length and len(text) > max_length:
-                text = text[:max_length].rsplit(' ', 1)[0] + '...'
+                text = text[:max_length - 3].rsplit(' ', 1)[0] + '...'
             
             return text
             
@@ -83,6 +113,44 @@ class ParseService:
             logger.warning(f"Error cleaning URL: {str(e)}")
             return str(url)
     
+    def canonicalize_url(self, url: str) -> str:
+        """
+        Canonical form of a URL for duplicate detection
+        Lowercases scheme/host, treats http as https, drops www/m/amp host
+        prefixes, default ports, fragments, tracking parameters, AMP path
+        markers and trailing slashes, and sorts the remaining query.
+        """
+        if not url or not isinstance(url, str):
+            return ""
+        
+        try:
+            parts = urlsplit(self.clean_url(url))
+            host = (parts.hostname or '').lower()
+            for prefix in MIRROR_HOST_PREFIXES:
+                if host.startswith(prefix):
+                    host = host[len(prefix):]
+                    break
+            if parts.port and parts.port not in (80, 443):
+                host = f"{host}:{parts.port}"
+            
+            path = parts.path or '/'
+            segments = [seg for seg in path.split('/') if seg and seg.lower() != 'amp']
+            path = '/' + '/'.join(segments)
+            for suffix in ('.amp', '.amp.html'):
+                if path.lower().endswith(suffix):
+                    path = path[:-len(suffix)]
+            
+            query = sorted(
+                (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+            )
+            
+            return urlunsplit(('https', host, path, urlencode(query), ''))
+            
+        except Exception as e:
+            logger.warning(f"Error canonicalizing URL '{url}': {str(e)}")
+            return url.strip()
+    
     def normalize_date(self, date_str: str) -> str:
         """Normalize date to YYYY-MM-DD format"""
         if not date_str or not isinstance(date_str, str):
@@ -131,41 +199,118 @@ class ParseService:
             # Remove www prefix
             domain = re.sub(r'^www\.', '', domain)
             
-            return domain
+            # Domains repeat across many records
+            return sys.intern(domain)
             
         except Exception as e:
             logger.warning(f"Error extracting domain from '{url}': {str(e)}")
             return ""
     
-    def validate_required_fields(self, data: Dict) -> Dict:
+    def validate_required_fields(self, data: Dict) -> ScanRecord:
         """Validate and ensure required fields exist"""
-        validated = {}
-        
         # Title is most important
-        validated['title'] = self.clean_text(data.get('title', ''), 200)
-        if not validated['title']:
-            validated['title'] = "Untitled"
+        title = self.clean_text(data.get('title', ''), 200)
+        if not title:
+            title = "Untitled"
         
         # Author
-        validated['author'] = self.clean_text(data.get('author', ''), 100)
+        author = self.clean_text(data.get('author', ''), 100)
         
-        # Publisher with fallback to domain
-        validated['publisher'] = self.clean_text(data.get('publisher', ''), 100)
-        if not validated['publisher'] and data.get('url'):
-            validated['publisher'] = self.extract_domain(data.get('url', ''))
+        # Publisher with fallback to domain, canonicalized when a dictionary is set;
+        # a stored record is resolved again from the name it was received with
+        extra = self.stored_extra(data)
+        raw_publisher = extra.get(RAW_PUBLISHER_FIELD)
+        if not isinstance(raw_publisher, str) or not raw_publisher:
+            raw_publisher = data.get('publisher', '')
+        publisher = self.clean_text(raw_publisher, 100)
+        raw_publisher = publisher
+        domain = self.extract_domain(data.get('url', '')) if data.get('url') else ''
+        publisher_id = ''
+        if self.publishers is not None and (publisher or domain):
+            canonical_id, publisher = self.publishers.resolve(publisher, domain)
+            publisher_id = str(canonical_id) if canonical_id else ''
+        elif not publisher:
+            publisher = domain
+        # Kept only when canonicalization replaced a name
+        if raw_publisher in (publisher, domain):
+            raw_publisher = ''
         
-        # Date
-        validated['date'] = self.normalize_date(data.get('date', ''))
+        abstract = self.clean_text(data.get('abstract', ''), 500)
         
-        # Abstract
-        validated['abstract'] = self.clean_text(data.get('abstract', ''), 500)
+        # Derived columns are computed once here and stored with the record
+        text = f"{data.get('title') or ''} {data.get('abstract') or ''}"
+        language = self.clean_text(data.get('language', ''), 10).lower()
+        if not language:
+            language = self.detect_language(text)
+        keywords = data.get('keywords')
+        if isinstance(keywords, list):
+            keywords = [self.clean_text(k, 50) for k in keywords if isinstance(k, str)]
+        elif isinstance(keywords, str) and keywords.strip():
+            keywords = [self.clean_text(k, 50) for k in re.split(r'[;,]', keywords)]
+        else:
+            keywords = self.extract_keywords(text)
         
-        # URL
-        validated['url'] = self.clean_url(data.get('url', ''))
+        return ScanRecord(
+            title=title,
+            author=author,
+            publisher=publisher,
+            date=self.normalize_date(data.get('date', '')),
+            abstract=abstract,
+            url=self.clean_url(data.get('url', '')),
+            language=language,
+            keywords='; '.join(k for k in keywords if k),
+            extra=self.collect_extra(data, extra, raw_publisher),
+            publisher_id=publisher_id
+        )
+    
+    def stored_extra(self, data: Dict) -> Dict:
+        """Extra fields of a stored record (a JSON string) or sent as an object"""
+        stored = data.get('extra')
+        if isinstance(stored, str) and stored:
+            try:
+                stored = json.loads(stored)
+            except ValueError:
+                stored = None
+        return dict(stored) if isinstance(stored, dict) else {}
+    
+    def collect_extra(self, data: Dict, stored: Dict, raw_publisher: str = "") -> str:
+        """
+        Keep fields outside the storage schema (DOI, citation count, ...) as a
+        JSON object; values must be scalars or lists of scalars. raw_publisher
+        is the publisher name as received when it differs from the canonical one.
+        """
+        extra = {RAW_PUBLISHER_FIELD: raw_publisher} if raw_publisher else {}
+        extra.update((key, value) for key, value in stored.items() if key != RAW_PUBLISHER_FIELD)
+        
+        for key, value in data.items():
+            if key not in SCAN_FIELDS and key not in METADATA_FIELDS and key != RAW_PUBLISHER_FIELD:
+                extra[key] = value
         
-        return validated
+        cleaned = {}
+        for key, value in extra.items():
+            if len(cleaned) >= MAX_EXTRA_FIELDS:
+                break
+            if not isinstance(key, str) or not key.strip() or len(key) > 64:
+                continue
+            if isinstance(value, str):
+                value = self.clean_text(value, 500)
+            elif isinstance(value, list):
+                value = [v for v in value if isinstance(v, (str, int, float, bool))][:50]
+            elif value is not None and not isinstance(value, (int, float, bool)):
+                continue
+            if value in (None, '', []):
+                continue
+            cleaned[key.strip()] = value
+        
+        if not cleaned:
+            return ""
+        encoded = json.dumps(cleaned, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+        if len(encoded) > MAX_EXTRA_SIZE:
+            logger.warning(f"Dropping extra fields ({len(encoded)} bytes > {MAX_EXTRA_SIZE})")
+            return ""
+        return encoded
     
-    def clean_scan_data(self, data: Dict) -> Dict:
+    def clean_scan_data(self, data: Dict) -> ScanRecord:
         """Main method to clean and validate scan data"""
         try:
             if not data or not isinstance(data, dict):
@@ -184,16 +329,9 @@ class ParseService:
             logger.error(f"Error cleaning scan data: {str(e)}")
             return self.get_empty_data()
     
-    def get_empty_data(self) -> Dict:
+    def get_empty_data(self) -> ScanRecord:
         """Return empty data structure"""
-        return {
-            'title': 'Data Processing Error',
-            'author': '',
-            'publisher': '',
-            'date': '',
-            'abstract': '',
-            'url': ''
-        }
+        return ScanRecord(title='Data Processing Error')
     
     def detect_language(self, text: str) -> str:
         """Simple language detection (optional feature)"""
@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+Partition Writer - Crash-safe appends to daily CSV partitions
+Keeps the current day's file open and rotates it at the day boundary.
+A day can optionally be split into hourly or size-capped segments.
+"""
+
+import csv
+import io
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import logging
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process deployments only
+    fcntl = None
+
+from app.services.scan_record import SCHEMA_VERSION, read_header
+
+logger = logging.getLogger(__name__)
+
+FSYNC_POLICIES = ('always', 'batch', 'interval', 'never')
+
+# How a day is split: one file, one file per hour, or files of at most N bytes
+SEGMENT_SCHEMES = ('daily', 'hourly', 'size')
+
+# YYYY-MM-DD.csv (whole day), YYYY-MM-DD.HH.csv (hourly), YYYY-MM-DD.NNNN.csv (size),
+# YYYY-MM-DD.iNNNN.csv (rows imported into a day that already had a file); a
+# 'vN' suffix marks the continuation of a file written under an older schema
+SEGMENT_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2})(?:\.((?:\d{2}|\d{4}|i\d{4})(?:v\d+)?|v\d+))?\.csv$')
+
+def segment_filename(date: str, segment: Optional[str] = None) -> str:
+    return f"{date}.{segment}.csv" if segment else f"{date}.csv"
+
+def parse_segment(filename: str) -> Optional[Tuple[str, Optional[str]]]:
+    """(date, segment) of a partition filename (segment None for a whole-day file)"""
+    match = SEGMENT_PATTERN.match(filename)
+    return (match.group(1), match.group(2)) if match else None
+
+def list_segments(data_dir: str) -> Dict[str, List[str]]:
+    """Partition files grouped by day; a whole-day file first, then segments in order"""
+    days = {}
+    for filename in os.listdir(data_dir):
+        parsed = parse_segment(filename)
+        if parsed:
+            days.setdefault(parsed[0], []).append((parsed[1] or '', filename))
+    return {date: [filename for _, filename in sorted(files)] for date, files in days.items()}
+
+def manifest_path(data_dir: str, date: str) -> str:
+    return os.path.join(data_dir, f"{date}.manifest")
+
+def read_manifest(data_dir: str, date: str) -> Dict[str, str]:
+    """
+    Start time of each segment of a day, from its manifest
+    The manifest is JSON lines ({"file", "started"}) appended when a segment
+    is created; a missing or damaged manifest just means fewer known times
+    """
+    started = {}
+    try:
+        with open(manifest_path(data_dir, date), 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    started.setdefault(entry['file'], entry['started'])
+                except (ValueError, KeyError, TypeError):
+                    continue
+    except FileNotFoundError:
+        pass
+    return started
+
+def fsync_directory(directory: str):
+    """Persist a directory entry (new/renamed file) where the OS supports it"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+@contextmanager
+def file_lock(f):
+    """
+    Hold an exclusive advisory lock on an open partition
+    Every process appending to (or repairing) a partition takes this lock,
+    so rows from different workers never interleave or get truncated
+    """
+    if fcntl is None:
+        yield
+        return
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def write_all(f, data: bytes):
+    """Write bytes to an unbuffered file, retrying short writes"""
+    view = memoryview(data)
+    while view:
+        view = view[f.write(view):]
+
+def append_locked(file_path: str, data: bytes, fsync: bool = True):
+    """Append pre-formatted rows to a partition in one locked critical section"""
+    with open(file_path, 'ab', buffering=0) as f:
+        with file_lock(f):
+            write_all(f, data)
+        if fsync:
+            os.fsync(f.fileno())
+
+def truncate_torn_tail(f) -> int:
+    """Truncate an open partition to its last complete line"""
+    size = f.seek(0, os.SEEK_END)
+    if size == 0:
+        return 0
+    f.seek(size - 1)
+    if f.read(1) == b'\n':
+        return 0
+
+    # Walk backwards to the last complete line
+    new_size = 0
+    position = size
+    while position > 0:
+        start = max(0, position - 64 * 1024)
+        f.seek(start)
+        index = f.read(position - start).rfind(b'\n')
+        if index != -1:
+            new_size = start + index + 1
+            break
+        position = start
+
+    f.truncate(new_size)
+    f.flush()
+    os.fsync(f.fileno())
+    return size - new_size
+
+def repair_torn_tail(file_path: str, lock: bool = True) -> int:
+    """
+    Truncate a partial last line left by a crash mid-append
+    Takes the partition lock unless the caller already holds it, so a row
+    another process is still writing is never mistaken for a torn one
+    Returns: number of bytes removed
+    """
+    with open(file_path, 'r+b') as f:
+        if lock:
+            with file_lock(f):
+                return truncate_torn_tail(f)
+        return truncate_torn_tail(f)
+
+class DailyPartitionWriter:
+    def __init__(self, data_dir: str, headers: List[str], timezone: Optional[str] = None,
+                 fsync_policy: str = 'interval', fsync_batch_size: int = 100,
+                 fsync_interval: float = 1.0):
+        self.data_dir = data_dir
+        self.headers = headers
+        self.lock = threading.Lock()
+        self.file = None
+        self.current_date = None
+        self.current_file = None
+        self.journal = None
+        self.rotate_at = 0.0
+        self.pending = 0
+        self.last_fsync = time.monotonic()
+        self.configure(timezone, fsync_policy, fsync_batch_size, fsync_interval)
+
+    def configure(self, timezone: Optional[str] = None, fsync_policy: str = 'interval',
+                  fsync_batch_size: int = 100, fsync_interval: float = 1.0,
+                  segments: str = 'daily', segment_max_bytes: int = 64 * 1024 * 1024):
+        """
+        Set rotation timezone, fsync policy ('always', 'batch', 'interval',
+        'never') and how days are split ('daily', 'hourly', 'size')
+        """
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync_policy}'. Use one of: {', '.join(FSYNC_POLICIES)}")
+        if segments not in SEGMENT_SCHEMES:
+            raise ValueError(f"Unknown segment scheme '{segments}'. Use one of: {', '.join(SEGMENT_SCHEMES)}")
+        if timezone and ZoneInfo is None:
+            raise ValueError('Rotation timezone requires Python 3.9+ (zoneinfo)')
+
+        with self.lock:
+            self.timezone = ZoneInfo(timezone) if timezone else None
+            self.fsync_policy = fsync_policy
+            self.fsync_batch_size = max(int(fsync_batch_size), 1)
+            self.fsync_interval = float(fsync_interval)
+            self.segments = segments
+            self.segment_max_bytes = max(int(segment_max_bytes), 1)
+            # Force the boundary to be recomputed in the new timezone
+            self.rotate_at = 0.0
+
+    def attach_journal(self, journal):
+        """
+        Journal rows before they reach the partition
+        The fsync policy then applies to the journal; partitions are only
+        fsynced at checkpoints and when they are closed
+        """
+        with self.lock:
+            self.journal = journal
+
+    def now(self) -> datetime:
+        """Current time at the rotation timezone (local time if unset)"""
+        return datetime.now(self.timezone) if self.timezone else datetime.now()
+
+    def get_current_date(self) -> str:
+        """Partition date that a write made now would go to"""
+        return self.now().strftime('%Y-%m-%d')
+
+    def partition_date(self, timestamp: str) -> str:
+        """
+        Partition date of a time_received (naive server-local ISO time)
+        Partitions are named by the date in the rotation timezone, which can
+        differ from the local date near midnight
+        """
+        if self.timezone is None:
+            return timestamp[:10]
+        return datetime.fromisoformat(timestamp).astimezone(self.timezone).strftime('%Y-%m-%d')
+
+    def local_time(self, moment: datetime) -> datetime:
+        """Naive server-local time of a naive wall time in the rotation timezone"""
+        if self.timezone is None:
+            return moment
+        return moment.replace(tzinfo=self.timezone).astimezone().replace(tzinfo=None)
+
+    def get_file_path(self, date: str) -> str:
+        """Whole-day file of a date (bulk imports always write here)"""
+        return os.path.join(self.data_dir, segment_filename(date))
+
+    def target_segment(self, date: str) -> str:
+        """Filename a write made now should go to (caller holds lock)"""
+        if self.segments == 'daily':
+            return segment_filename(date)
+        if self.segments == 'hourly':
+            return segment_filename(date, self.now().strftime('%H'))
+
+        # Size-capped: stay on the open segment until it is full
+        if self.file is not None and self.current_date == date:
+            if os.fstat(self.file.fileno()).st_size < self.segment_max_bytes:
+                return self.current_file
+        # Reopening (startup, new day): continue the day's last segment unless full
+        numbers = []
+        for filename in os.listdir(self.data_dir):
+            parsed = parse_segment(filename)
+            if parsed and parsed[0] == date and parsed[1] and len(parsed[1]) == 4:
+                numbers.append(int(parsed[1]))
+        number = max(numbers, default=0)
+        last = os.path.join(self.data_dir, segment_filename(date, f"{number:04d}"))
+        if os.path.exists(last) and os.path.getsize(last) >= self.segment_max_bytes:
+            number += 1
+        return segment_filename(date, f"{number:04d}")
+
+    def next_boundary(self, now: datetime) -> datetime:
+        """Next time the target segment changes by the clock (midnight, or the hour)"""
+        if self.segments == 'hourly':
+            return (now + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
+        return (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def register_segment(self, date: str, filename: str):
+        """Record a newly created segment in its day's manifest"""
+        entry = json.dumps({'file': filename, 'started': datetime.now().isoformat()})
+        append_locked(manifest_path(self.data_dir, date), (entry + '\n').encode('utf-8'))
+
+    def format_row(self, row: List[str]) -> str:
+        """Render one CSV row so it is written with a single write() call"""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(row)
+        return buffer.getvalue()
+
+    def create_partition(self, file_path: str) -> bool:
+        """
+        Atomically create a partition that already contains the header
+        The header is written to a temp file and hard-linked into place, so
+        concurrent creators can never both write a header
+        Returns: True if this call created the file
+        """
+        tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+                f.write(self.format_row(self.headers))
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                os.link(tmp_path, file_path)
+                created = True
+            except FileExistsError:
+                created = False
+            except OSError:
+                # Filesystem without hard links: exclusive create instead
+                try:
+                    fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+                except FileExistsError:
+                    created = False
+                else:
+                    with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                        f.write(self.format_row(self.headers))
+                    created = True
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        if created:
+            fsync_directory(self.data_dir)
+            logger.info(f"Created new CSV file: {file_path}")
+        return created
+
+    def open_partition(self, date: str, filename: Optional[str] = None):
+        """Open (creating or repairing) a partition segment of date (caller holds lock)"""
+        filename = filename or segment_filename(date)
+        file_path = os.path.join(self.data_dir, filename)
+        header = read_header(file_path)
+        if header and tuple(header) != tuple(self.headers):
+            # Written by an older schema: continue in a file with the current
+            # header rather than dropping the new columns for the rest of the day
+            parsed = parse_segment(filename)
+            segment = f"{parsed[1] or ''}v{SCHEMA_VERSION}" if parsed else f"v{SCHEMA_VERSION}"
+            logger.info(f"{file_path} has an older schema; continuing in {segment_filename(date, segment)}")
+            filename = segment_filename(date, segment)
+            file_path = os.path.join(self.data_dir, filename)
+        created = self.create_partition(file_path)
+        if created and filename != segment_filename(date):
+            self.register_segment(date, filename)
+        # Unbuffered: each row goes to the file in a single write() call
+        self.file = open(file_path, 'ab', buffering=0)
+        if not created:
+            with file_lock(self.file):
+                removed = repair_torn_tail(file_path, lock=False)
+                if removed:
+                    logger.warning(f"Removed {removed} bytes of torn data from {file_path}")
+                if os.path.getsize(file_path) == 0:
+                    write_all(self.file, self.format_row(self.headers).encode('utf-8'))
+        self.current_date = date
+        self.current_file = filename
+
+        # Epoch time of the next day (or hour) boundary in the rotation timezone
+        now = self.now()
+        self.rotate_at = time.time() + (self.next_boundary(now) - now).total_seconds()
+
+    def close_partition(self):
+        """Flush, fsync and close the open partition (caller holds lock)"""
+        if self.file is None:
+            return
+        try:
+            if self.fsync_policy != 'never' or self.journal is not None:
+                os.fsync(self.file.fileno())
+        finally:
+            self.file.close()
+            self.file = None
+            self.current_date = None
+            self.current_file = None
+            self.pending = 0
+
+    def sync(self):
+        """Fsync according to the policy (caller holds lock)"""
+        self.pending += 1
+        now = time.monotonic()
+        if self.fsync_policy == 'always':
+            should_sync = True
+        elif self.fsync_policy == 'batch':
+            should_sync = self.pending >= self.fsync_batch_size
+        elif self.fsync_policy == 'interval':
+            should_sync = now - self.last_fsync >= self.fsync_interval
+        else:
+            should_sync = False
+
+        if should_sync:
+            os.fsync(self.file.fileno())
+            self.pending = 0
+            self.last_fsync = now
+
+    def append(self, row) -> str:
+        """
+        Append a row to the current day's partition (or its current segment)
+        row may be a callable returning the row: it is called under the
+        partition lock, so values it stamps (time_received) are in file
+        order across threads and worker processes
+        Returns: filename the row was written to
+        """
+        with self.lock:
+            if self.file is None or time.time() >= self.rotate_at:
+                date = self.get_current_date()
+                filename = self.target_segment(date)
+                if self.file is None or filename != self.current_file:
+                    self.close_partition()
+                    self.open_partition(date, filename)
+                else:
+                    # Boundary reached early by clock skew; check again shortly
+                    self.rotate_at = time.time() + 1
+
+            sequence = None
+            # Other worker processes append to the same partition
+            with file_lock(self.file):
+                values = row() if callable(row) else row
+                data = self.format_row(values).encode('utf-8')
+                if self.journal is not None:
+                    if self.current_file not in self.journal.offsets:
+                        self.journal.mark(self.current_file, os.fstat(self.file.fileno()).st_size)
+                    sequence = self.journal.append(self.current_file, data)
+                write_all(self.file, data)
+            if sequence is None:
+                self.sync()
+            filename = self.current_file
+            if self.segments == 'size' and os.fstat(self.file.fileno()).st_size >= self.segment_max_bytes:
+                # Full: the next append moves on to a new segment
+                self.rotate_at = 0.0
+
+        if sequence is not None:
+            # Outside the writer lock so concurrent appends share one fsync
+            self.journal.sync(sequence)
+            if self.journal.needs_checkpoint():
+                self.checkpoint()
+        return filename
+
+    def checkpoint(self):
+        """Fsync the open partition and truncate the journal"""
+        with self.lock:
+            if self.journal is None:
+                return
+            offsets = {}
+            if self.file is not None:
+                os.fsync(self.file.fileno())
+                offsets[self.current_file] = os.fstat(self.file.fileno()).st_size
+            self.journal.checkpoint(offsets)
+
+    def flush(self):
+        """Force buffered rows to disk"""
+        with self.lock:
+            if self.file is not None:
+                os.fsync(self.file.fileno())
+                self.pending = 0
+                self.last_fsync = time.monotonic()
+
+    def close(self):
+        with self.lock:
+            self.close_partition()
+            if self.journal is not None:
+                # Everything journaled is in fsynced partitions now
+                self.journal.close()
+                self.journal = None
+
+    def recover(self) -> int:
+        """Repair torn final lines in the newest day's partition files (run at startup)"""
+        try:
+            days = list_segments(self.data_dir)
+        except FileNotFoundError:
+            return 0
+        if not days:
+            return 0
+
+        removed = 0
+        for filename in days[max(days)]:
+            file_path = os.path.join(self.data_dir, filename)
+            with self.lock:
+                if self.file is not None and os.path.abspath(self.file.name) == os.path.abspath(file_path):
+                    continue
+                torn = repair_torn_tail(file_path)
+            if torn:
+                logger.warning(f"Removed {torn} bytes of torn data from {file_path}")
+            removed += torn
+        return removed
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Profile Service - Per-domain extraction profiles
+Aggregates which fields each domain yields (and which extractor found them)
+from ingested data, and publishes compact, versioned hints for clients
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import logging
+
+from app.services.partition_writer import file_lock
+
+logger = logging.getLogger(__name__)
+
+PROFILES_FILENAME = "profiles.json"
+
+# Bump when the published profile layout changes
+PROFILE_FORMAT = 1
+
+# Fields the extension has to discover on each page
+PROFILE_FIELDS = ("title", "author", "publisher", "date", "abstract")
+
+# Values the extension sends for fields it could not extract
+MISSING_VALUES = ("", "null")
+
+# Distinct extractor names tracked per field
+MAX_SOURCES = 8
+
+def has_value(value) -> bool:
+    return isinstance(value, str) and value.strip() not in MISSING_VALUES
+
+def profile_etag(profile: Dict) -> str:
+    """
+    Cache validator of a published profile, hashed from its hints
+    Workers merge their samples into the shared file only when they save,
+    so versions differ between workers; equal hints give the same ETag
+    whichever worker answers
+    """
+    content = json.dumps([profile['domain'], profile['format'], profile['fields']], sort_keys=True)
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=8).hexdigest()
+
+def new_entry() -> Dict:
+    return {'samples': 0, 'hits': {}, 'sources': {}, 'version': 0, 'hints': None, 'updated': None}
+
+def add_counts(entry: Dict, counts: Dict):
+    """Add sample, hit and extractor counts to an entry (or to a delta)"""
+    entry['samples'] += counts['samples']
+    for field, hits in counts['hits'].items():
+        entry['hits'][field] = entry['hits'].get(field, 0) + hits
+    for field, field_sources in counts['sources'].items():
+        totals = entry['sources'].setdefault(field, {})
+        for source, hits in field_sources.items():
+            if source in totals or len(totals) < MAX_SOURCES:
+                totals[source] = totals.get(source, 0) + hits
+
+class ProfileService:
+    def __init__(self, data_dir: str = "data", max_domains: int = 10000, min_samples: int = 3):
+        self.path = os.path.join(data_dir, PROFILES_FILENAME)
+        self.lock_path = self.path + '.lock'
+        self.max_domains = max_domains
+        self.min_samples = min_samples
+        self.lock = threading.Lock()
+        # Counts observed since the last save, merged into the file by save()
+        self.pending = {}
+        # Counts from rebuild(), only kept if no other worker seeded the file first
+        self.seed = {}
+        data = self.read()
+        self.domains = data['domains']
+        # Stores that start empty are seeded from history by rebuild()
+        self.created_at = datetime.now().isoformat()
+        self.seeded = data['seeded'] or bool(self.domains)
+
+    def read(self) -> Dict:
+        """Read persisted profiles (missing or unreadable file starts empty)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('format') == PROFILE_FORMAT:
+                return {'seeded': data.get('seeded', False), 'domains': OrderedDict(data.get('domains', {}))}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable profiles {self.path}: {str(e)}")
+        return {'seeded': False, 'domains': OrderedDict()}
+
+    def save(self) -> Dict:
+        """
+        Merge the counts observed since the last save into the file
+        Workers share profiles.json, so the file is re-read under a lock and
+        only this worker's new counts are added before the atomic replace;
+        the merged store then replaces the in-memory one.
+        """
+        with self.lock:
+            if not self.pending and not self.seed:
+                return {'success': True, 'saved': False, 'domains': len(self.domains)}
+            pending, self.pending = self.pending, {}
+            seed, self.seed = self.seed, {}
+
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(self.lock_path, 'a+b') as lock_file, file_lock(lock_file):
+                data = self.read()
+                domains = data['domains']
+                # Another worker already seeded the file from the same history
+                if data['seeded']:
+                    seed = {}
+                self.merge(domains, seed)
+                self.merge(domains, pending)
+                seeded = data['seeded'] or bool(seed)
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(json.dumps({'format': PROFILE_FORMAT, 'seeded': seeded, 'domains': domains}))
+                os.replace(tmp_path, self.path)
+        except Exception as e:
+            with self.lock:
+                # Keep the unsaved counts for the next attempt
+                for source, target in ((pending, self.pending), (seed, self.seed)):
+                    for domain, counts in source.items():
+                        add_counts(target.setdefault(domain, new_entry()), counts)
+            error_msg = f"Error saving profiles: {str(e)}"
+            logger.error(error_msg)
+            return {'success': False, 'error': error_msg}
+
+        with self.lock:
+            # Counts observed while the file was written stay pending
+            self.merge(domains, self.seed)
+            self.merge(domains, self.pending)
+            self.domains = domains
+            return {'success': True, 'saved': True, 'domains': len(domains)}
+
+    def merge(self, domains: OrderedDict, deltas: Dict):
+        """Add per-domain counts to a store, republishing hints that change"""
+        for domain, counts in deltas.items():
+            entry = domains.get(domain)
+            if entry is None:
+                entry = new_entry()
+                domains[domain] = entry
+            else:
+                domains.move_to_end(domain)
+            add_counts(entry, counts)
+            self.refresh_hints(entry)
+        while len(domains) > self.max_domains:
+            domains.popitem(last=False)
+
+    def refresh_hints(self, entry: Dict):
+        """Only publish a new version when the rounded hints change"""
+        hints = self.build_hints(entry)
+        if hints != entry['hints']:
+            entry['hints'] = hints
+            entry['version'] += 1
+            entry['updated'] = datetime.now().isoformat()
+
+    def observe(self, domain: str, data: Dict, sources: Optional[Dict] = None, seed: bool = False):
+        """
+        Count one ingested record for its domain
+        data holds the fields as the client sent them; sources optionally
+        names the extractor that found each field (e.g. 'meta:author')
+        """
+        if not domain:
+            return
+        domain = domain.lower()
+        sources = sources if isinstance(sources, dict) else {}
+
+        counts = {'samples': 1, 'hits': {}, 'sources': {}}
+        for field in PROFILE_FIELDS:
+            if not has_value(data.get(field)):
+                continue
+            counts['hits'][field] = 1
+            source = sources.get(field)
+            if isinstance(source, str) and source and len(source) <= 100:
+                counts['sources'][field] = {source: 1}
+
+        with self.lock:
+            deltas = self.seed if seed else self.pending
+            add_counts(deltas.setdefault(domain, new_entry()), counts)
+            self.merge(self.domains, {domain: counts})
+
+    def build_hints(self, entry: Dict) -> Dict:
+        """Compact per-field hints: hit rate (2 decimals) and best extractor"""
+        samples = entry['samples']
+        hints = {}
+        for field in PROFILE_FIELDS:
+            hint = {'rate': round(entry['hits'].get(field, 0) / samples, 2)}
+            counts = entry['sources'].get(field)
+            if counts:
+                hint['source'] = max(counts.items(), key=lambda item: item[1])[0]
+            hints[field] = hint
+        return hints
+
+    def get_profile(self, domain: str) -> Optional[Dict]:
+        """Published profile of a domain (None if unknown or too few samples)"""
+        domain = (domain or '').lower()
+        if domain.startswith('www.'):
+            domain = domain[4:]
+        with self.lock:
+            entry = self.domains.get(domain)
+            if entry is None or entry['samples'] < self.min_samples:
+                return None
+            return {
+                'domain': domain,
+                'format': PROFILE_FORMAT,
+                'version': entry['version'],
+                'samples': entry['samples'],
+                'updated': entry['updated'],
+                'fields': entry['hints']
+            }
+
+    def list_profiles(self, limit: int = 100) -> List[Dict]:
+        """Domains with published profiles (most samples first)"""
+        with self.lock:
+            profiles = [
+                {'domain': domain, 'version': entry['version'], 'samples': entry['samples']}
+                for domain, entry in self.domains.items() if entry['samples'] >= self.min_samples
+            ]
+        profiles.sort(key=lambda p: p['samples'], reverse=True)
+        return profiles[:limit]
+
+    def rebuild(self, file_service, parse_service, days: int = 30) -> int:
+        """
+        Seed a store that started empty from stored records
+        Records received after the store was created are counted live, so
+        they are skipped here. The stored publisher falls back to the
+        domain, so it only counts as a hit when it differs from the domain.
+        """
+        with self.lock:
+            if self.seeded:
+                return 0
+            self.seeded = True
+
+        start = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        count = 0
+        for record in file_service.iter_records(start):
+            if record.time_received >= self.created_at:
+                continue
+            domain = parse_service.extract_domain(record.url)
+            data = record.to_dict()
+            if data['publisher'] == domain:
+                data['publisher'] = ''
+            self.observe(domain, data, seed=True)
+            count += 1
+        logger.info(f"Profiles rebuilt from {count} stored records")
+        return count
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Profiler Service - Opt-in sampling profiler for live requests
+Profiles a fraction of requests and aggregates hot functions and collapsed
+stacks (flamegraph input) per route
+"""
+
+import cProfile
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROFILING_MODES = ('sampler', 'cprofile')
+
+# Collapsed stacks start at Flask's dispatch; frames below it are the server loop
+STACK_ROOT = 'full_dispatch_request'
+
+# Stands in for new stacks once a route holds max_stacks distinct ones
+TRUNCATED_STACK = '[truncated]'
+
+def frame_label(code) -> str:
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def collapse_stack(frame, max_depth: int = 64) -> str:
+    """Stack of a frame in collapsed format: root;...;leaf (innermost max_depth frames)"""
+    labels = []
+    while frame is not None:
+        if frame.f_code.co_name == STACK_ROOT:
+            break
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return ';'.join(labels[-max_depth:])
+
+def cprofile_label(func) -> str:
+    filename, line, name = func
+    if filename == '~':
+        # Built-in functions: name is e.g. "<built-in method posix.fsync>"
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+class ProfilerService:
+    """
+    Two modes:
+    - 'sampler' (default): a background thread snapshots the stacks of
+      threads serving sampled requests every interval seconds. Overhead is
+      independent of how much Python code the request runs; produces
+      collapsed stacks and hot functions by sample counts.
+    - 'cprofile': sampled requests run under cProfile for exact call counts
+      and times per function (heavier; no stacks).
+    """
+    def __init__(self, mode: str = 'sampler', sample_rate: float = 0.01, interval: float = 0.005,
+                 max_stacks: int = 2000, max_depth: int = 64):
+        if mode not in PROFILING_MODES:
+            raise ValueError(f"Unknown profiling mode '{mode}'. Use one of: {', '.join(PROFILING_MODES)}")
+        self.mode = mode
+        self.sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+        self.interval = float(interval)
+        self.max_stacks = max_stacks
+        self.max_depth = max_depth
+        self.lock = threading.Lock()
+        self.routes: Dict[str, Dict] = {}
+        # Sampler mode: thread id -> route of requests being sampled
+        self.active: Dict[int, str] = {}
+        self.wakeup = threading.Event()
+        self.sampler = None
+        self.started_at = time.time()
+
+    def configure(self, sample_rate: float):
+        """Change the sampled fraction of requests at runtime (0 pauses profiling)"""
+        self.sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+        logger.info(f"Profiling sample rate set to {self.sample_rate}")
+
+    def route_entry(self, route: str) -> Dict:
+        """Aggregates of a route (caller holds lock)"""
+        entry = self.routes.get(route)
+        if entry is None:
+            entry = {'requests': 0, 'seconds': 0.0, 'samples': 0, 'stacks': Counter(), 'functions': {}}
+            self.routes[route] = entry
+        return entry
+
+    def start(self, route: str):
+        """
+        Begin profiling the current request if it is sampled
+        Returns: token to pass to stop(), or None
+        """
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+
+        started = time.perf_counter()
+        if self.mode == 'cprofile':
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler is active (Python 3.12+ allows only one)
+                return None
+            return (route, started, profiler)
+
+        thread_id = threading.get_ident()
+        with self.lock:
+            if self.sampler is None:
+                self.sampler = threading.Thread(target=self.run_sampler, name='profiler-sampler', daemon=True)
+                self.sampler.start()
+            self.active[thread_id] = route
+            self.wakeup.set()
+        return (route, started, thread_id)
+
+    def stop(self, token):
+        """Finish a sampled request and fold its profile into the route"""
+        route, started, handle = token
+        elapsed = time.perf_counter() - started
+
+        functions = None
+        if self.mode == 'cprofile':
+            handle.disable()
+            functions = pstats.Stats(handle).stats
+        with self.lock:
+            if self.mode != 'cprofile':
+                self.active.pop(handle, None)
+                if not self.active:
+                    self.wakeup.clear()
+            entry = self.route_entry(route)
+            entry['requests'] += 1
+            entry['seconds'] += elapsed
+            if functions:
+                totals = entry['functions']
+                for func, (_, calls, tottime, cumtime, _) in functions.items():
+                    total = totals.setdefault(func, [0, 0.0, 0.0])
+                    total[0] += calls
+                    total[1] += tottime
+                    total[2] += cumtime
+
+    def run_sampler(self):
+        """Snapshot the stacks of sampled requests until the process exits"""
+        while True:
+            self.wakeup.wait()
+            # Jittered so samples do not line up with the start of requests
+            time.sleep(random.uniform(0, 2 * self.interval))
+            with self.lock:
+                active = dict(self.active)
+            frames = sys._current_frames()
+            stacks = []
+            for thread_id, route in active.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stacks.append((route, collapse_stack(frame, self.max_depth)))
+            # Frames keep every local of the sampled threads alive
+            del frames
+            with self.lock:
+                for route, stack in stacks:
+                    entry = self.route_entry(route)
+                    entry['samples'] += 1
+                    if stack not in entry['stacks'] and len(entry['stacks']) >= self.max_stacks:
+                        stack = TRUNCATED_STACK
+                    entry['stacks'][stack] += 1
+
+    def collapsed(self, route: Optional[str] = None) -> str:
+        """Collapsed stacks ("route;frame;...;frame count" per line) for flamegraph tools"""
+        with self.lock:
+            lines = [
+                f"{name};{stack} {count}" if stack else f"{name} {count}"
+                for name, entry in self.routes.items() if route is None or name == route
+                for stack, count in entry['stacks'].items()
+            ]
+        lines.sort()
+        return '\n'.join(lines) + ('\n' if lines else '')
+
+    def top_functions(self, route: Optional[str] = None, limit: int = 30) -> List[Dict]:
+        """Hottest functions, by self time (cprofile) or by samples at the top of the stack (sampler)"""
+        with self.lock:
+            entries = [entry for name, entry in self.routes.items() if route is None or name == route]
+            if self.mode == 'cprofile':
+                totals = {}
+                for entry in entries:
+                    for func, (calls, tottime, cumtime) in entry['functions'].items():
+                        total = totals.setdefault(func, [0, 0.0, 0.0])
+                        total[0] += calls
+                        total[1] += tottime
+                        total[2] += cumtime
+            else:
+                samples = sum(entry['samples'] for entry in entries)
+                self_counts = Counter()
+                total_counts = Counter()
+                for entry in entries:
+                    for stack, count in entry['stacks'].items():
+                        frames = stack.split(';') if stack else []
+                        if frames:
+                            self_counts[frames[-1]] += count
+                        for frame in set(frames):
+                            total_counts[frame] += count
+
+        if self.mode == 'cprofile':
+            ranked = sorted(totals.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+            return [
+                {'function': cprofile_label(func), 'calls': calls,
+                 'self_seconds': round(tottime, 6), 'total_seconds': round(cumtime, 6)}
+                for func, (calls, tottime, cumtime) in ranked
+            ]
+        return [
+            {'function': frame, 'self_samples': count, 'total_samples': total_counts[frame],
+             'self_percent': round(100 * count / samples, 2) if samples else 0.0,
+             'total_percent': round(100 * total_counts[frame] / samples, 2) if samples else 0.0}
+            for frame, count in self_counts.most_common(limit)
+        ]
+
+    def get_report(self, route: Optional[str] = None, limit: int = 30) -> Dict:
+        """Per-route summary plus the top functions (of one route, or all)"""
+        with self.lock:
+            routes = [
+                {'route': name, 'requests': entry['requests'],
+                 'mean_ms': round(1000 * entry['seconds'] / entry['requests'], 3) if entry['requests'] else 0.0,
+                 'samples': entry['samples'], 'stacks': len(entry['stacks'])}
+                for name, entry in self.routes.items() if route is None or name == route
+            ]
+        routes.sort(key=lambda r: r['requests'], reverse=True)
+        return {
+            'mode': self.mode,
+            'sample_rate': self.sample_rate,
+            'interval': self.interval if self.mode == 'sampler' else None,
+            'since': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+            'routes': routes,
+            'top_functions': self.top_functions(route, limit)
+        }
+
+    def reset(self):
+        """Drop collected profiles (requests in flight still finish normally)"""
+        with self.lock:
+            self.routes = {}
+            self.started_at = time.time()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Publisher Service - Canonical publisher dictionary
+Maps raw publisher names and source domains to one canonical publisher with
+a small integer ID, so an outlet is stored and aggregated under one name
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from app.services.partition_writer import file_lock, write_all
+
+logger = logging.getLogger(__name__)
+
+STORE_FILENAME = "publishers.jsonl"
+
+# Built-in outlets: canonical name -> (name aliases, domains)
+SEED_PUBLISHERS = {
+    "Nature": (("nature publishing group", "nature portfolio", "nature research"), ("nature.com",)),
+    "Science": (("science magazine", "aaas", "american association for the advancement of science"),
+                ("science.org", "sciencemag.org")),
+    "Springer": (("springerlink", "springer link", "springer verlag", "springer science and business media"),
+                 ("springer.com", "link.springer.com")),
+    "Elsevier": (("sciencedirect", "science direct", "elsevier bv", "elsevier ltd"),
+                 ("elsevier.com", "sciencedirect.com")),
+    "IEEE": (("ieee xplore", "institute of electrical and electronics engineers"),
+             ("ieee.org", "ieeexplore.ieee.org")),
+    "ACM": (("acm digital library", "association for computing machinery"), ("acm.org", "dl.acm.org")),
+    "arXiv": (("arxiv org",), ("arxiv.org",)),
+    "PLOS ONE": (("plos", "plosone", "public library of science"), ("plos.org", "journals.plos.org")),
+    "Wiley": (("john wiley and sons", "wiley online library", "wiley blackwell"),
+              ("wiley.com", "onlinelibrary.wiley.com")),
+    "Taylor & Francis": (("taylor and francis online", "tandfonline"), ("tandfonline.com",)),
+    "MDPI": (("multidisciplinary digital publishing institute",), ("mdpi.com",)),
+    "Frontiers": (("frontiers media",), ("frontiersin.org",)),
+}
+
+# Corporate suffixes that do not tell outlets apart
+NAME_SUFFIXES = ("inc", "ltd", "llc", "plc", "gmbh", "co", "corp", "bv", "sa")
+
+# Host prefixes of mirrors of the same site
+DOMAIN_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+
+# Seconds between checks for entries other processes appended
+REFRESH_INTERVAL = 1.0
+
+def canonical_key(name: str) -> str:
+    """Lookup key of a publisher name: case, accents, punctuation and suffixes folded"""
+    if not name:
+        return ""
+    text = unicodedata.normalize('NFKD', name)
+    text = ''.join(c for c in text if not unicodedata.combining(c)).casefold()
+    text = text.replace('&', ' and ')
+    words = re.sub(r'[^\w]+', ' ', text).split()
+    if words and words[0] == 'the':
+        words = words[1:]
+    while len(words) > 1 and words[-1] in NAME_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+def domain_key(domain: str) -> str:
+    """Lookup key of a host name (lowercase, no port or mirror prefix)"""
+    domain = (domain or "").strip().lower().split(':')[0].rstrip('.')
+    for prefix in DOMAIN_PREFIXES:
+        if domain.startswith(prefix):
+            domain = domain[len(prefix):]
+            break
+    return domain
+
+def has_name(name: str, domain: str = "") -> bool:
+    """Whether a raw publisher is a name (stored records fall back to the domain)"""
+    return bool(canonical_key(name)) and domain_key(name) != domain_key(domain)
+
+class PublisherService:
+    """
+    The dictionary is an append-only JSON lines log shared by all worker
+    processes: publishers ({"id", "name"}), name aliases ({"alias", "id"})
+    and domains ({"domain", "id"}). New IDs are assigned under a file lock
+    after reading what other processes appended, so an ID means the same
+    publisher everywhere. Lookups on the ingest path go through an LRU cache,
+    which is dropped whenever entries from other processes are read (the
+    log is checked for them at most every REFRESH_INTERVAL seconds).
+    """
+    def __init__(self, data_dir: str = "data", cache_size: int = 4096):
+        self.path = os.path.join(data_dir, STORE_FILENAME)
+        self.lock = threading.Lock()
+        self.names: Dict[int, str] = {}
+        self.aliases: Dict[str, int] = {}
+        self.domains: Dict[str, int] = {}
+        # Bytes of the log applied so far
+        self.offset = 0
+        self.next_refresh = 0.0
+        self.stats = {'registered': 0, 'aliases_added': 0}
+        self.cached_resolve = lru_cache(maxsize=cache_size)(self.resolve_uncached)
+        self.load()
+
+    def apply(self, entry: Dict):
+        """Apply one log entry (caller holds lock)"""
+        publisher_id = int(entry['id'])
+        if 'name' in entry:
+            self.names[publisher_id] = entry['name']
+            self.aliases.setdefault(canonical_key(entry['name']), publisher_id)
+        elif 'alias' in entry:
+            self.aliases[entry['alias']] = publisher_id
+        elif 'domain' in entry:
+            self.domains[entry['domain']] = publisher_id
+
+    def catch_up(self, f):
+        """Apply entries appended since the last read (caller holds lock and file lock)"""
+        f.seek(self.offset)
+        data = f.read()
+        # A line without its newline is still being written
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            try:
+                self.apply(json.loads(line))
+            except (ValueError, KeyError, TypeError):
+                logger.warning(f"Skipping unreadable line in {self.path}")
+        self.offset += end
+        if end:
+            # Cached lookups may now resolve differently
+            self.cached_resolve.cache_clear()
+
+    def refresh(self):
+        """Read entries other processes appended (a stat, at most every REFRESH_INTERVAL)"""
+        now = time.monotonic()
+        if now < self.next_refresh:
+            return
+        self.next_refresh = now + REFRESH_INTERVAL
+        try:
+            if os.path.getsize(self.path) <= self.offset:
+                return
+        except OSError:
+            return
+        with self.lock, open(self.path, 'a+b') as f, file_lock(f):
+            self.catch_up(f)
+
+    def append(self, f, entries: List[Dict]):
+        """Write entries to the log and apply them (caller holds lock and file lock)"""
+        data = ''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries).encode('utf-8')
+        f.seek(0, os.SEEK_END)
+        write_all(f, data)
+        f.flush()
+        os.fsync(f.fileno())
+        for entry in entries:
+            self.apply(entry)
+        self.offset += len(data)
+
+    def load(self):
+        """Read the log, seeding the built-in outlets into a new one"""
+        with self.lock, open(self.path, 'a+b') as f, file_lock(f):
+            self.catch_up(f)
+            if not self.names:
+                entries = []
+                for publisher_id, (name, (aliases, domains)) in enumerate(SEED_PUBLISHERS.items(), 1):
+                    entries.append({'id': publisher_id, 'name': name})
+                    entries.extend({'alias': alias, 'id': publisher_id} for alias in aliases)
+                    entries.extend({'domain': domain, 'id': publisher_id} for domain in domains)
+                self.append(f, entries)
+        logger.info(f"Publisher dictionary loaded with {len(self.names)} publishers")
+
+    def lookup(self, name: str = "", domain: str = "") -> Optional[int]:
+        """
+        ID of a known publisher by name, or by domain (or a parent domain)
+        when there is no name; journals sharing a host stay apart
+        """
+        if has_name(name, domain):
+            return self.aliases.get(canonical_key(name))
+        host = domain_key(domain)
+        while host:
+            if host in self.domains:
+                return self.domains[host]
+            _, _, host = host.partition('.')
+            if '.' not in host:
+                break
+        return None
+
+    def resolve(self, name: str = "", domain: str = "") -> Tuple[int, str]:
+        """Cached resolve_uncached(), current with other processes' entries"""
+        self.refresh()
+        return self.cached_resolve(name, domain)
+
+    def resolve_uncached(self, name: str = "", domain: str = "") -> Tuple[int, str]:
+        """
+        Canonical (ID, name) for a raw publisher name and source domain
+        A name resolves by its aliases only; an unknown one becomes a new
+        publisher (add an alias to fold it into another). The domain is used
+        when there is no name, and an unknown domain becomes a publisher
+        named after it. (0, name) when there is nothing to resolve.
+        """
+        publisher_id = self.lookup(name, domain)
+        if publisher_id is None:
+            if has_name(name, domain):
+                publisher_id = self.register(name)
+            elif canonical_key(domain_key(domain)):
+                publisher_id = self.register(domain_key(domain), domain)
+            else:
+                return 0, name
+        return publisher_id, self.names[publisher_id]
+
+    def register(self, name: str, domain: str = "") -> int:
+        """
+        ID of a publisher name, assigning a new one if no process has yet
+        A domain is only given for publishers known by their domain alone;
+        the new publisher then owns it
+        """
+        with self.lock, open(self.path, 'a+b') as f, file_lock(f):
+            self.catch_up(f)
+            publisher_id = self.lookup('', domain) if domain_key(domain) else None
+            if publisher_id is None:
+                publisher_id = self.aliases.get(canonical_key(name))
+            if publisher_id is not None:
+                return publisher_id
+            publisher_id = max(self.names, default=0) + 1
+            entries = [{'id': publisher_id, 'name': name}]
+            if domain_key(domain):
+                entries.append({'domain': domain_key(domain), 'id': publisher_id})
+            self.append(f, entries)
+            self.stats['registered'] += 1
+        logger.info(f"New publisher {publisher_id}: {name}")
+        return publisher_id
+
+    def add_alias(self, publisher_id: int, alias: str = "", domain: str = "") -> Dict:
+        """
+        Map another name and/or domain to an existing publisher
+        Returns: {'success': bool, 'publisher': dict, 'error': str}
+        """
+        try:
+            entries = []
+            with self.lock, open(self.path, 'a+b') as f, file_lock(f):
+                self.catch_up(f)
+                if publisher_id not in self.names:
+                    return {'success': False, 'error': f"Unknown publisher: {publisher_id}"}
+                if canonical_key(alias):
+                    entries.append({'alias': canonical_key(alias), 'id': publisher_id})
+                if domain_key(domain):
+                    entries.append({'domain': domain_key(domain), 'id': publisher_id})
+                if not entries:
+                    return {'success': False, 'error': 'alias or domain is required'}
+                self.append(f, entries)
+                self.stats['aliases_added'] += len(entries)
+            # Cached lookups may now resolve differently
+            self.cached_resolve.cache_clear()
+            return {'success': True, 'publisher': self.get_publisher(publisher_id), 'error': None}
+        except Exception as e:
+            error_msg = f"Error adding publisher alias: {str(e)}"
+            logger.error(error_msg)
+            return {'success': False, 'error': error_msg}
+
+    def get_name(self, publisher_id: int) -> Optional[str]:
+        return self.names.get(publisher_id)
+
+    def get_publisher(self, publisher_id: int) -> Optional[Dict]:
+        with self.lock:
+            if publisher_id not in self.names:
+                return None
+            return {
+                'id': publisher_id,
+                'name': self.names[publisher_id],
+                'aliases': sorted(k for k, v in self.aliases.items() if v == publisher_id),
+                'domains': sorted(k for k, v in self.domains.items() if v == publisher_id)
+            }
+
+    def list_publishers(self) -> List[Dict]:
+        with self.lock:
+            ids = sorted(self.names)
+        return [self.get_publisher(publisher_id) for publisher_id in ids]
+
+    def get_stats(self) -> Dict:
+        cache = self.cached_resolve.cache_info()
+        return dict(self.stats, publishers=len(self.names), cache_hits=cache.hits,
+                    cache_misses=cache.misses, cache_size=cache.currsize)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Recent Service - In-memory ring buffer of the latest ingested records
+Serves "what's new" reads (popup, dashboards) without touching the CSV files
+"""
+
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from app.services.scan_record import ScanRecord
+
+logger = logging.getLogger(__name__)
+
+def parse_cursor(cursor: Optional[str]) -> Tuple[Optional[str], int]:
+    """Split an 'epoch.sequence' cursor (None epoch if missing or malformed)"""
+    if not cursor:
+        return None, 0
+    epoch, _, sequence = cursor.rpartition('.')
+    if not epoch or not sequence.isdigit():
+        return None, 0
+    return epoch, int(sequence)
+
+class RecentService:
+    """
+    Fixed-size ring buffer of the most recent records
+    Every record gets a sequence number; readers pass back the cursor of
+    their last read and only get newer records. Cursors carry an epoch that
+    changes on restart (and differs between worker processes), so a stale
+    cursor is answered with a reset instead of a wrong delta.
+    """
+    def __init__(self, capacity: int = 1000):
+        self.capacity = max(int(capacity), 1)
+        self.records: List[Optional[ScanRecord]] = [None] * self.capacity
+        self.sequence = 0
+        self.epoch = uuid.uuid4().hex[:12]
+        self.lock = threading.Lock()
+        # Records received before this are loaded by warm(), later ones by add()
+        self.created_at = datetime.now().isoformat()
+
+    def push(self, record: ScanRecord) -> int:
+        """Store a record, overwriting the oldest once full; returns its sequence"""
+        with self.lock:
+            self.sequence += 1
+            self.records[self.sequence % self.capacity] = record
+            return self.sequence
+
+    def add(self, record: ScanRecord) -> Optional[int]:
+        """Store a newly saved record"""
+        if record.time_received < self.created_at:
+            return None
+        return self.push(record)
+
+    def warm(self, records) -> int:
+        """Seed the buffer with stored records (oldest first) received before creation"""
+        count = 0
+        for record in records:
+            if record.time_received < self.created_at:
+                self.push(record)
+                count += 1
+        logger.info(f"Recent records warmed with {count} records")
+        return count
+
+    def cursor(self, sequence: int) -> str:
+        return f"{self.epoch}.{sequence}"
+
+    def since(self, cursor: Optional[str] = None, limit: int = 100) -> Dict:
+        """
+        Records newer than cursor, oldest first (at most limit)
+        Without a cursor, or with a stale one, returns the latest limit
+        records with reset=True so the client replaces its list
+        Returns: {'records', 'cursor', 'reset', 'more'}
+        """
+        epoch, after = parse_cursor(cursor)
+        with self.lock:
+            latest = self.sequence
+            oldest = max(latest - self.capacity + 1, 1)
+            reset = epoch != self.epoch or after > latest or after < oldest - 1
+            if reset:
+                after = max(latest - limit, oldest - 1)
+            end = min(latest, after + limit)
+            records = [self.records[seq % self.capacity] for seq in range(after + 1, end + 1)]
+
+        return {
+            'records': records,
+            'cursor': self.cursor(end),
+            'reset': reset,
+            'more': end < latest
+        }
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            return {
+                'capacity': self.capacity,
+                'size': min(self.sequence, self.capacity),
+                'sequence': self.sequence,
+                'epoch': self.epoch
+            }
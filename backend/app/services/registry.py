@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Service Registry - App-scoped service singletons
+Services are registered as factories in create_app and built on first use
+"""
+
+import threading
+from typing import Any, Callable, Dict
+import logging
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+class ServiceRegistry:
+    def __init__(self):
+        self.factories = {}
+        self.instances = {}
+        self.lock = threading.RLock()
+
+    def register(self, name: str, factory: Callable[['ServiceRegistry'], Any]):
+        """Register a factory; it receives the registry to resolve dependencies"""
+        with self.lock:
+            self.factories[name] = factory
+            self.instances.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        """Return the service, creating it on first use"""
+        instance = self.instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self.lock:
+            if name not in self.instances:
+                if name not in self.factories:
+                    raise KeyError(f"Unknown service '{name}'")
+                self.instances[name] = self.factories[name](self)
+                logger.debug(f"Service '{name}' initialized")
+            return self.instances[name]
+
+    def is_initialized(self, name: str) -> bool:
+        return name in self.instances
+
+    def get_status(self) -> Dict[str, bool]:
+        """Registered services and whether each has been created"""
+        with self.lock:
+            return {name: name in self.instances for name in self.factories}
+
+def get_service(name: str) -> Any:
+    """Service from the current app's registry"""
+    return current_app.extensions['services'].get(name)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Reprocess Service - Re-run cleaning rules over stored history
+Re-cleans and re-validates daily partitions in parallel worker processes
+"""
+
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import logging
+
+from app.services.file_service import FileService
+from app.services.parse_service import ParseService
+from app.services.partition_writer import fsync_directory, list_segments
+from app.services.publisher_service import PublisherService
+from app.services.scan_record import SCAN_FIELDS, read_records
+from app.utils.validators import SCAN_VALIDATOR
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILENAME = "reprocess_checkpoint.json"
+
+def reprocess_file(file_path: str, parse_service: ParseService, stats: Dict, chunk_size: int = 5000,
+                   drop_invalid: bool = False, dry_run: bool = False):
+    """Re-clean one partition file in place, adding its counts to stats"""
+    tmp_path = file_path + '.reprocess.tmp'
+    try:
+        with open(file_path, 'r', encoding='utf-8', newline='') as src, \
+                open(os.devnull if dry_run else tmp_path, 'w', encoding='utf-8', newline='') as dst:
+            writer = csv.writer(dst)
+            writer.writerow(SCAN_FIELDS)
+            chunk = []
+
+            for original in read_records(src):
+                stats['rows_in'] += 1
+                record = parse_service.clean_scan_data(original.to_dict())
+                record.time_received = original.time_received
+
+                if not SCAN_VALIDATOR.is_valid(record):
+                    stats['invalid'] += 1
+                    if drop_invalid:
+                        continue
+                if record != original:
+                    stats['changed'] += 1
+
+                chunk.append(record.to_row())
+                if len(chunk) >= chunk_size:
+                    writer.writerows(chunk)
+                    stats['rows_out'] += len(chunk)
+                    chunk = []
+
+            writer.writerows(chunk)
+            stats['rows_out'] += len(chunk)
+            dst.flush()
+            if not dry_run:
+                os.fsync(dst.fileno())
+
+        if not dry_run:
+            os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def reprocess_partition(data_dir: str, date: str, chunk_size: int = 5000,
+                        drop_invalid: bool = False, dry_run: bool = False) -> Dict:
+    """
+    Re-clean one daily partition, every segment of it (runs inside a worker process)
+    Rows are streamed and written in chunks of chunk_size, so memory stays
+    bounded; each file is replaced atomically.
+    Returns: {'date', 'rows_in', 'rows_out', 'changed', 'invalid', 'seconds'}
+    """
+    started = time.monotonic()
+    parse_service = ParseService(PublisherService(data_dir))
+    stats = {'date': date, 'rows_in': 0, 'rows_out': 0, 'changed': 0, 'invalid': 0}
+
+    segments = list_segments(data_dir).get(date)
+    if not segments:
+        raise FileNotFoundError(f"No partition files for {date}")
+    for filename in segments:
+        reprocess_file(os.path.join(data_dir, filename), parse_service, stats,
+                       chunk_size, drop_invalid, dry_run)
+    if not dry_run:
+        fsync_directory(data_dir)
+
+    stats['seconds'] = round(time.monotonic() - started, 3)
+    return stats
+
+class ReprocessService:
+    def __init__(self, data_dir: str = "data", file_service: Optional[FileService] = None):
+        self.data_dir = data_dir
+        self.file_service = file_service or FileService(data_dir)
+        self.checkpoint_path = os.path.join(data_dir, CHECKPOINT_FILENAME)
+
+    def load_checkpoint(self) -> Dict:
+        """Load the checkpoint of completed partitions"""
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'partitions': {}}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.checkpoint_path}: {str(e)}")
+            return {'partitions': {}}
+
+    def save_checkpoint(self, checkpoint: Dict):
+        """Write the checkpoint atomically"""
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def reset_checkpoint(self):
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def plan(self, dates: List[str], resume: bool = True) -> List[str]:
+        """Partitions still to process (skips completed ones when resuming)"""
+        if not resume:
+            return list(dates)
+        done = self.load_checkpoint().get('partitions', {})
+        return [date for date in dates if done.get(date, {}).get('status') != 'done']
+
+    def run(self, dates: List[str], workers: Optional[int] = None, chunk_size: int = 5000,
+            drop_invalid: bool = False, dry_run: bool = False, resume: bool = True,
+            progress: Optional[Callable[[Dict, int, int], None]] = None) -> Dict:
+        """
+        Reprocess partitions with one partition per worker process
+        Returns: {'success': bool, 'processed': int, 'skipped': int, 'failed': list, 'totals': dict}
+        """
+        pending = self.plan(dates, resume)
+        checkpoint = self.load_checkpoint() if resume else {'partitions': {}}
+        checkpoint.setdefault('partitions', {})
+        totals = {'rows_in': 0, 'rows_out': 0, 'changed': 0, 'invalid': 0}
+        failed = []
+        started = time.monotonic()
+
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            futures = {
+                executor.submit(reprocess_partition, self.data_dir, date, chunk_size, drop_invalid, dry_run): date
+                for date in pending
+            }
+            for done_count, future in enumerate(as_completed(futures), 1):
+                date = futures[future]
+                if not dry_run:
+                    # Cached row counts, sizes and schema versions of rewritten
+                    # files are stale, even when the partition failed halfway
+                    self.file_service.drop_index_entries(list_segments(self.data_dir).get(date, []))
+                try:
+                    stats = future.result()
+                except Exception as e:
+                    logger.error(f"Error reprocessing {date}: {str(e)}")
+                    failed.append({'date': date, 'error': str(e)})
+                    stats = {'date': date, 'error': str(e)}
+                else:
+                    for key in totals:
+                        totals[key] += stats[key]
+                    if not dry_run:
+                        checkpoint['partitions'][date] = {
+                            'status': 'done',
+                            'finished_at': datetime.now().isoformat(),
+                            **{key: stats[key] for key in totals}
+                        }
+                        self.save_checkpoint(checkpoint)
+
+                if progress:
+                    progress(stats, done_count, len(pending))
+
+        totals['seconds'] = round(time.monotonic() - started, 3)
+        return {
+            'success': not failed,
+            'processed': len(pending) - len(failed),
+            'skipped': len(dates) - len(pending),
+            'failed': failed,
+            'totals': totals
+        }
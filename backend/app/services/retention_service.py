@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Retention Service - Age out daily partitions, exports and index entries
+Ages come from the dates in filenames; deletion runs in throttled batches
+and can archive partitions first
+"""
+
+import gzip
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import logging
+
+from app.services.partition_writer import file_lock, fsync_directory, parse_segment
+
+logger = logging.getLogger(__name__)
+
+RETENTION_KINDS = ('data', 'exports', 'indexes')
+
+# data/archive/YYYY/<partition file>.gz
+ARCHIVE_DIRNAME = "archive"
+
+# export_YYYYMMDD_HHMMSS_<id>.<ext>
+EXPORT_DATE_PATTERN = re.compile(r'^export_(\d{4})(\d{2})(\d{2})_')
+
+# Plan items listed in a response; the totals always cover the whole plan
+PLAN_SAMPLE = 100
+
+CHUNK_SIZE = 1024 * 1024
+
+def export_date(filename: str) -> Optional[str]:
+    """Creation date (YYYY-MM-DD) in an export filename"""
+    match = EXPORT_DATE_PATTERN.match(filename)
+    return '-'.join(match.groups()) if match else None
+
+def archive_file(file_path: str, archive_path: str):
+    """gzip a file to archive_path (written under a temp name, then renamed)"""
+    os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+    tmp_path = archive_path + '.tmp'
+    try:
+        with open(file_path, 'rb') as src, open(tmp_path, 'wb') as raw:
+            with gzip.GzipFile(filename=os.path.basename(file_path), mode='wb', fileobj=raw) as dst:
+                while True:
+                    chunk = src.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_path, archive_path)
+        fsync_directory(os.path.dirname(archive_path))
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def summarize(items: List[Dict]) -> Dict:
+    """Files and bytes per kind of plan items (plus orphaned index entries)"""
+    summary = {kind: {'files': 0, 'bytes': 0} for kind in RETENTION_KINDS}
+    summary['indexes']['entries'] = 0
+    for item in items:
+        summary[item['kind']]['files'] += len(item['files'])
+        summary[item['kind']]['bytes'] += item['bytes']
+        if item['kind'] == 'indexes':
+            summary['indexes']['entries'] += len(item['entries'])
+    return summary
+
+def describe_item(item: Dict) -> Dict:
+    """Plan item for a response (index entries as a count, no per-file sizes)"""
+    described = {key: value for key, value in item.items() if key not in ('entries', 'sizes')}
+    if 'entries' in item:
+        described['entries'] = len(item['entries'])
+    return described
+
+class RetentionService:
+    """
+    Three policies, each judged by the date in the filename rather than the
+    modification time (a late append does not keep an old day alive):
+    - data: daily partitions (all segments and the manifest of a day) older
+      than data_days; the current day is never touched
+    - exports: export files created more than export_days ago
+    - indexes: index.json entries and manifests whose partition is gone
+    A plan is built from one listing of the data directory with sizes from
+    the index, so a dry run costs no per-file stat of partitions (exports
+    are listed once with their sizes). Applying it removes files in batches
+    of batch_size, pausing batch_pause seconds between batches and, when
+    max_bytes_per_second is set, long enough to stay under that rate.
+    """
+    def __init__(self, file_service, data_days: int = 30, export_days: int = 30, indexes: bool = True,
+                 archive: bool = False, batch_size: int = 100, batch_pause: float = 0.05,
+                 max_bytes_per_second: int = 0):
+        self.file_service = file_service
+        self.data_days = data_days
+        self.export_days = export_days
+        self.indexes = indexes
+        self.archive = archive
+        self.batch_size = max(int(batch_size), 1)
+        self.batch_pause = float(batch_pause)
+        self.max_bytes_per_second = int(max_bytes_per_second)
+        self.archive_dir = os.path.join(file_service.data_dir, ARCHIVE_DIRNAME)
+        # One run at a time (scheduler and /api/cleanup)
+        self.run_lock = threading.Lock()
+        self.stats = {'runs': 0, 'deleted_files': 0, 'archived_files': 0, 'deleted_bytes': 0,
+                      'errors': 0, 'last_run': None}
+
+    def cutoff(self, days: Optional[int]) -> Optional[str]:
+        """Oldest date kept when keeping days days (None: policy disabled)"""
+        if not days or days <= 0:
+            return None
+        today = datetime.strptime(self.file_service.writer.get_current_date(), '%Y-%m-%d')
+        return (today - timedelta(days=days)).strftime('%Y-%m-%d')
+
+    def scan(self):
+        """Partition files per date and manifests per date, from one listing of data_dir"""
+        days = {}
+        manifests = {}
+        for filename in os.listdir(self.file_service.data_dir):
+            if filename.endswith('.manifest'):
+                manifests[filename[:-len('.manifest')]] = filename
+                continue
+            parsed = parse_segment(filename)
+            if parsed:
+                days.setdefault(parsed[0], []).append(filename)
+        return days, manifests
+
+    def file_size(self, index: Dict, filename: str) -> int:
+        """Size of a partition from the index, stat only for files not indexed yet"""
+        entry = index.get(filename)
+        if entry and 'size' in entry:
+            return entry['size']
+        try:
+            return os.path.getsize(self.file_service.get_file_path(filename))
+        except OSError:
+            return 0
+
+    def scan_exports(self) -> Dict[str, int]:
+        """Size of every file in the export directory, from one listing"""
+        sizes = {}
+        try:
+            with os.scandir(self.file_service.export_dir) as entries:
+                for entry in entries:
+                    try:
+                        sizes[entry.name] = entry.stat().st_size
+                    except FileNotFoundError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return sizes
+
+    def plan(self, data_days: Optional[int] = None, export_days: Optional[int] = None,
+             indexes: Optional[bool] = None) -> Dict:
+        """
+        What a run would remove, oldest first; arguments override the policies
+        Returns: {'cutoffs': dict, 'items': [{'kind', 'date', 'files', 'bytes', 'sizes'}]}
+        where sizes maps each file to the bytes its removal frees
+        """
+        data_cutoff = self.cutoff(self.data_days if data_days is None else data_days)
+        export_cutoff = self.cutoff(self.export_days if export_days is None else export_days)
+        indexes = self.indexes if indexes is None else indexes
+        today = self.file_service.writer.get_current_date()
+
+        days, manifests = self.scan()
+        with self.file_service.index_lock:
+            index = dict(self.file_service.load_index())
+
+        items = []
+        if data_cutoff:
+            for date in sorted(days):
+                if date >= data_cutoff or date >= today:
+                    break
+                files = sorted(days[date])
+                sizes = {filename: self.file_size(index, filename) for filename in files}
+                if date in manifests:
+                    files.append(manifests[date])
+                items.append({'kind': 'data', 'date': date, 'files': files,
+                              'bytes': sum(sizes.values()), 'sizes': sizes})
+
+        if export_cutoff:
+            export_sizes = self.scan_exports()
+            for filename in sorted(self.file_service.list_export_files(export_sizes)):
+                date = export_date(filename)
+                if not date or date >= export_cutoff:
+                    continue
+                # With the .gz download copy made by precompress_file, if any
+                sizes = {name: export_sizes[name] for name in (filename, filename + '.gz') if name in export_sizes}
+                items.append({'kind': 'exports', 'date': date, 'files': list(sizes),
+                              'bytes': sum(sizes.values()), 'sizes': sizes})
+
+        if indexes:
+            stored = {filename for files in days.values() for filename in files}
+            entries = sorted(name for name in index if name not in stored)
+            orphans = sorted(name for date, name in manifests.items() if date not in days)
+            if entries or orphans:
+                items.append({'kind': 'indexes', 'date': None, 'files': orphans,
+                              'entries': entries, 'bytes': 0, 'sizes': {}})
+
+        return {
+            'cutoffs': {'data': data_cutoff, 'exports': export_cutoff},
+            'items': items
+        }
+
+    def remove(self, kind: str, filename: str, archive: bool):
+        """Remove one file of a plan item (partitions and manifests archived first if asked)"""
+        if kind == 'exports':
+            os.remove(os.path.join(self.file_service.export_dir, filename))
+            return
+        file_path = self.file_service.get_file_path(filename)
+        archive_path = os.path.join(self.archive_dir, filename[:4], filename + '.gz')
+        if filename.endswith('.manifest'):
+            if archive and kind == 'data':
+                archive_file(file_path, archive_path)
+            os.remove(file_path)
+            return
+        with open(file_path, 'rb') as f, file_lock(f):
+            # Appenders hold the same lock, so the archive has every row
+            if archive:
+                archive_file(file_path, archive_path)
+            os.remove(file_path)
+
+    def apply(self, plan: Dict, archive: Optional[bool] = None) -> Dict:
+        """
+        Carry out a plan in throttled batches; returns counts per kind
+        Bytes count only files this run removed, as they are removed, so the
+        rate limit works from what was actually freed
+        """
+        archive = self.archive if archive is None else archive
+        summary = summarize([])
+        archived = 0
+        errors = 0
+        dropped_entries = []
+        started = time.monotonic()
+        removed_bytes = 0
+        in_batch = 0
+
+        for item in plan['items']:
+            kind = item['kind']
+            for filename in item['files']:
+                try:
+                    self.remove(kind, filename, archive)
+                    size = item['sizes'].get(filename, 0)
+                    summary[kind]['files'] += 1
+                    summary[kind]['bytes'] += size
+                    removed_bytes += size
+                    if archive and kind == 'data':
+                        archived += 1
+                except FileNotFoundError:
+                    # Removed by another worker's run in the meantime
+                    pass
+                except Exception as e:
+                    errors += 1
+                    logger.error(f"Retention could not remove {filename}: {str(e)}")
+                    continue
+                if kind == 'data' and not filename.endswith('.manifest'):
+                    dropped_entries.append(filename)
+
+                in_batch += 1
+                if in_batch >= self.batch_size:
+                    in_batch = 0
+                    delay = self.batch_pause
+                    if self.max_bytes_per_second:
+                        # Sleep until the bytes removed so far fit the rate
+                        delay = max(delay, removed_bytes / self.max_bytes_per_second
+                                    - (time.monotonic() - started))
+                    if delay > 0:
+                        time.sleep(delay)
+            if kind == 'indexes':
+                dropped_entries.extend(item['entries'])
+                summary[kind]['entries'] += len(item['entries'])
+            else:
+                logger.info(f"Retention removed {kind} of {item['date']} ({len(item['files'])} files)")
+
+        if dropped_entries:
+            self.file_service.drop_index_entries(dropped_entries)
+
+        return {
+            'summary': summary,
+            'archived': archived,
+            'errors': errors,
+            'seconds': round(time.monotonic() - started, 3)
+        }
+
+    def run(self, data_days: Optional[int] = None, export_days: Optional[int] = None,
+            indexes: Optional[bool] = None, archive: Optional[bool] = None, dry_run: bool = False) -> Dict:
+        """
+        Plan and (unless dry_run) apply retention
+        Returns: {'success': bool, 'dry_run', 'cutoffs', 'summary', 'count', 'bytes',
+                  'items' (first PLAN_SAMPLE), 'truncated', 'error': str}
+        """
+        try:
+            with self.run_lock:
+                plan = self.plan(data_days, export_days, indexes)
+                items = plan['items']
+                result = {
+                    'success': True,
+                    'dry_run': dry_run,
+                    'archive': self.archive if archive is None else archive,
+                    'cutoffs': plan['cutoffs'],
+                    'items': [describe_item(item) for item in items[:PLAN_SAMPLE]],
+                    'truncated': len(items) > PLAN_SAMPLE
+                }
+                if dry_run:
+                    summary = summarize(items)
+                    result['summary'] = summary
+                else:
+                    applied = self.apply(plan, archive)
+                    result.update(applied)
+                    summary = applied['summary']
+                    self.stats['runs'] += 1
+                    self.stats['deleted_files'] += sum(s['files'] for s in summary.values())
+                    self.stats['deleted_bytes'] += sum(s['bytes'] for s in summary.values())
+                    self.stats['archived_files'] += applied['archived']
+                    self.stats['errors'] += applied['errors']
+                    self.stats['last_run'] = datetime.now().isoformat()
+
+                result['count'] = sum(s['files'] for s in summary.values())
+                result['bytes'] = sum(s['bytes'] for s in summary.values())
+                for kind in ('data', 'exports'):
+                    dates = [item['date'] for item in items if item['kind'] == kind]
+                    summary[kind]['oldest'] = min(dates) if dates else None
+                    summary[kind]['newest'] = max(dates) if dates else None
+                return result
+        except Exception as e:
+            error_msg = f"Error applying retention: {str(e)}"
+            logger.error(error_msg)
+            return {
+                'success': False,
+                'error': error_msg
+            }
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats, data_days=self.data_days, export_days=self.export_days,
+                    archive=self.archive)
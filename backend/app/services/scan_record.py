@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Scan Record - Compact record type for scanned articles
+Replaces per-row dicts in parsing, storage and export
+"""
+
+import csv
+import json
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Storage schema versions, each mapped to its CSV header. A partition's
+# version is identified by its header row; columns are only ever added, and
+# readers map columns by name, so old files are never rewritten.
+SCHEMA_VERSIONS = {
+    1: (
+        "title",
+        "author",
+        "publisher",
+        "date",
+        "abstract",
+        "url",
+        "time_received"
+    ),
+    2: (
+        "title",
+        "author",
+        "publisher",
+        "date",
+        "abstract",
+        "url",
+        "time_received",
+        "language",   # computed at ingest unless supplied
+        "keywords",   # '; '-separated, computed at ingest unless supplied
+        "extra"       # JSON object with any other fields the client sent
+    ),
+    3: (
+        "title",
+        "author",
+        "publisher",     # canonical name (see PublisherService)
+        "date",
+        "abstract",
+        "url",
+        "time_received",
+        "language",
+        "keywords",
+        "extra",
+        "publisher_id"   # small integer ID of the canonical publisher
+    ),
+}
+SCHEMA_VERSION = max(SCHEMA_VERSIONS)
+
+# Storage column order of new partitions (the current CSV header)
+SCAN_FIELDS = SCHEMA_VERSIONS[SCHEMA_VERSION]
+
+# Fields whose values repeat heavily across records
+INTERNED_FIELDS = ("author", "publisher", "date", "language", "publisher_id")
+
+def intern_text(value) -> str:
+    """Intern a repeated string so equal values share one object"""
+    return sys.intern(value) if isinstance(value, str) else ""
+
+class ScanRecord:
+    """
+    One scanned article
+    Uses __slots__ (no per-instance dict) and interns author, publisher,
+    date, language and publisher_id.
+    Supports read-only dict-style access (record['title'], record.get())
+    so code written against the old dict rows keeps working.
+    """
+    __slots__ = SCAN_FIELDS
+
+    def __init__(self, title: str = "", author: str = "", publisher: str = "",
+                 date: str = "", abstract: str = "", url: str = "",
+                 time_received: str = "", language: str = "", keywords: str = "",
+                 extra: str = "", publisher_id: str = ""):
+        self.title = title or ""
+        self.author = intern_text(author or "")
+        self.publisher = intern_text(publisher or "")
+        self.date = intern_text(date or "")
+        self.abstract = abstract or ""
+        self.url = url or ""
+        self.time_received = time_received or ""
+        self.language = intern_text(language or "")
+        self.keywords = keywords or ""
+        self.extra = extra or ""
+        self.publisher_id = intern_text(publisher_id or "")
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ScanRecord':
+        """Build a record from a dict (missing fields become empty strings)"""
+        return cls(*(data.get(field, "") for field in SCAN_FIELDS))
+
+    @classmethod
+    def from_row(cls, row, indexes: Optional[Tuple[int, ...]] = None) -> 'ScanRecord':
+        """
+        Build a record from a CSV row
+        indexes maps each SCAN_FIELDS entry to a column (-1 if absent, e.g.
+        columns added after the partition's schema version); without it the
+        row must already be in SCAN_FIELDS order
+        """
+        if indexes is None:
+            if len(row) == len(SCAN_FIELDS):
+                return cls(*row)
+            indexes = tuple(range(len(SCAN_FIELDS)))
+        size = len(row)
+        return cls(*(row[i] if 0 <= i < size else "" for i in indexes))
+
+    def to_row(self) -> Tuple[str, ...]:
+        """Values in storage column order (shares the string objects)"""
+        return (self.title, self.author, self.publisher, self.date,
+                self.abstract, self.url, self.time_received,
+                self.language, self.keywords, self.extra, self.publisher_id)
+
+    def to_dict(self) -> Dict[str, str]:
+        """Dict view for JSON serialization"""
+        return dict(zip(SCAN_FIELDS, self.to_row()))
+
+    def get_extra(self) -> Dict:
+        """Extra fields as a dict (empty if none or unreadable)"""
+        if not self.extra:
+            return {}
+        try:
+            value = json.loads(self.extra)
+        except ValueError:
+            return {}
+        return value if isinstance(value, dict) else {}
+
+    def get(self, key: str, default=None):
+        if key in SCAN_FIELDS:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key: str):
+        if key not in SCAN_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in SCAN_FIELDS
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ScanRecord):
+            return NotImplemented
+        return self.to_row() == other.to_row()
+
+    def __repr__(self) -> str:
+        return f"ScanRecord(title={self.title!r}, url={self.url!r})"
+
+def schema_version(header: Iterable[str]) -> Optional[int]:
+    """Schema version of a partition header (None if it matches no version)"""
+    header = tuple(header)
+    for version, fields in SCHEMA_VERSIONS.items():
+        if header == fields:
+            return version
+    return None
+
+def read_header(file_path: str) -> Optional[List[str]]:
+    """Header row of a partition file (None if missing or empty)"""
+    try:
+        with open(file_path, 'r', encoding='utf-8', newline='') as f:
+            return next(csv.reader(f), None)
+    except FileNotFoundError:
+        return None
+
+def header_indexes(header: Iterable[str]) -> Tuple[int, ...]:
+    """Map SCAN_FIELDS to column positions of a CSV header (-1 if missing)"""
+    positions = {name: i for i, name in enumerate(header)}
+    return tuple(positions.get(field, -1) for field in SCAN_FIELDS)
+
+def build_row_filter(indexes: Tuple[int, ...], publishers: Optional[Iterable[str]] = None,
+                     q: Optional[str] = None):
+    """
+    Build a predicate over raw CSV rows so filters run before any record
+    is built. publishers match case-insensitively; q is a case-insensitive
+    substring of title or abstract. Returns None when there is nothing to filter.
+    """
+    publisher_set = {p.lower() for p in publishers} if publishers else None
+    q = q.lower() if q else None
+    if not publisher_set and not q:
+        return None
+
+    publisher_index = indexes[SCAN_FIELDS.index("publisher")]
+    title_index = indexes[SCAN_FIELDS.index("title")]
+    abstract_index = indexes[SCAN_FIELDS.index("abstract")]
+
+    def column(row, index):
+        return row[index] if 0 <= index < len(row) else ""
+
+    def row_filter(row) -> bool:
+        if publisher_set and column(row, publisher_index).lower() not in publisher_set:
+            return False
+        if q and q not in column(row, title_index).lower() and q not in column(row, abstract_index).lower():
+            return False
+        return True
+
+    return row_filter
+
+def read_records(f, publishers: Optional[Iterable[str]] = None,
+                 q: Optional[str] = None) -> Iterator[ScanRecord]:
+    """Stream ScanRecords from an open CSV file (first line is the header)"""
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return
+    indexes = header_indexes(header)
+    row_filter = build_row_filter(indexes, publishers, q)
+    if indexes == tuple(range(len(SCAN_FIELDS))) and len(header) == len(SCAN_FIELDS):
+        indexes = None
+    for row in reader:
+        if row and (row_filter is None or row_filter(row)):
+            yield ScanRecord.from_row(row, indexes)
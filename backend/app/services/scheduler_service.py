@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Scheduler Service - In-process periodic maintenance
+Runs tasks such as retention and export eviction off the request path
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ScheduledTask:
+    """A periodic task with its own interval, jitter and single-flight lock"""
+
+    def __init__(self, name: str, func: Callable, interval: float, jitter: float = 0.1):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.lock = threading.Lock()
+        self.next_run = 0.0
+        self.runs = 0
+        self.skipped = 0
+        self.last_run = None
+        self.last_duration = None
+        self.last_result = None
+        self.last_error = None
+
+    def schedule_next(self, now: float):
+        """Schedule the next run, spreading it by +/- jitter of the interval"""
+        spread = self.interval * self.jitter
+        self.next_run = now + self.interval + random.uniform(-spread, spread)
+
+    def get_status(self) -> Dict:
+        """Snapshot of the task state for /status"""
+        return {
+            'interval': self.interval,
+            'running': self.lock.locked(),
+            'runs': self.runs,
+            'skipped': self.skipped,
+            'last_run': self.last_run,
+            'last_duration': self.last_duration,
+            'last_result': self.last_result,
+            'last_error': self.last_error,
+            'next_run_in': round(max(self.next_run - time.monotonic(), 0), 1)
+        }
+
+class SchedulerService:
+    def __init__(self, max_workers: int = 2):
+        self.tasks = {}
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.max_workers = max_workers
+        self.executor = None
+
+    def add_task(self, name: str, func: Callable, interval: float,
+                 jitter: float = 0.1, initial_delay: Optional[float] = None):
+        """Register a periodic task (first run after initial_delay, default one interval)"""
+        task = ScheduledTask(name, func, interval, jitter)
+        if initial_delay is None:
+            task.schedule_next(time.monotonic())
+        else:
+            task.next_run = time.monotonic() + initial_delay
+        self.tasks[name] = task
+        return task
+
+    def start(self):
+        """Start the scheduler loop in a daemon thread"""
+        if self.thread and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='maintenance')
+        self.thread = threading.Thread(target=self.run_loop, name='scheduler', daemon=True)
+        self.thread.start()
+        logger.info(f"Scheduler started with tasks: {', '.join(self.tasks)}")
+
+    def stop(self):
+        """Stop the scheduler loop"""
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        if self.executor:
+            self.executor.shutdown(wait=False)
+
+    def is_running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def run_loop(self):
+        """Dispatch due tasks to the worker pool"""
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            for task in self.tasks.values():
+                if task.next_run <= now:
+                    task.schedule_next(now)
+                    self.executor.submit(self.run_task, task.name)
+
+            next_run = min((t.next_run for t in self.tasks.values()), default=now + 60)
+            self.stop_event.wait(min(max(next_run - time.monotonic(), 0.1), 60))
+
+    def run_task(self, name: str) -> Dict:
+        """
+        Run a task now unless it is already running (single-flight)
+        Returns: {'success': bool, 'skipped': bool, 'result': any, 'error': str}
+        """
+        task = self.tasks.get(name)
+        if task is None:
+            return {'success': False, 'skipped': False, 'result': None, 'error': f'Unknown task: {name}'}
+
+        if not task.lock.acquire(blocking=False):
+            task.skipped += 1
+            logger.info(f"Skipping task {name}: previous run still in progress")
+            return {'success': False, 'skipped': True, 'result': None, 'error': None}
+
+        started = time.monotonic()
+        try:
+            task.last_run = datetime.now().isoformat()
+            result = task.func()
+            task.last_result = result
+            task.last_error = None
+            return {'success': True, 'skipped': False, 'result': result, 'error': None}
+        except Exception as e:
+            task.last_error = str(e)
+            logger.error(f"Scheduled task {name} failed: {str(e)}")
+            return {'success': False, 'skipped': False, 'result': None, 'error': str(e)}
+        finally:
+            task.runs += 1
+            task.last_duration = round(time.monotonic() - started, 4)
+            task.lock.release()
+
+    def get_status(self) -> Dict:
+        """Status of the scheduler and each task"""
+        return {
+            'running': self.is_running(),
+            'tasks': {name: task.get_status() for name, task in self.tasks.items()}
+        }
@@ -3,8 +3,21 @@ Utilities package for SurfScan Backend
 Helper functions and utilities
 """
 
-from .auth import validate_api_key
-from .validators import validate_scan_data
-from .helpers import format_response, get_current_timestamp
+import importlib
 
-__all__ = ['validate_api_key', 'validate_scan_data', 'format_response', 'get_current_timestamp']
+# Exported names are imported from their module on first access
+_EXPORTS = {
+    'validate_api_key': '.auth',
+    'validate_scan_data': '.validators',
+    'format_response': '.helpers',
+    'get_current_timestamp': '.helpers',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,135 @@
+"""
+Compression utilities for SurfScan Backend
+Request body decompression and response compression helpers
+"""
+
+from io import BytesIO
+from typing import Optional
+import gzip
+import logging
+import os
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# zlib window bits for each supported Content-Encoding
+DECODE_WBITS = {
+    'gzip': 16 + zlib.MAX_WBITS,
+    'x-gzip': 16 + zlib.MAX_WBITS,
+    'deflate': zlib.MAX_WBITS,
+}
+
+COMPRESSIBLE_MIMETYPES = (
+    'application/json',
+    'text/csv',
+    'text/plain',
+)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class BodyTooLarge(Exception):
+    """Raised when a decompressed body exceeds the configured limit"""
+
+
+def decompress_body(stream, encoding: str, max_size: int) -> bytes:
+    """
+    Inflate a gzip/deflate encoded request body
+
+    Args:
+        stream: File-like object with the encoded body
+        encoding: Value of the Content-Encoding header
+        max_size: Maximum number of decompressed bytes allowed
+
+    Returns:
+        bytes: Decompressed body
+
+    Raises:
+        BodyTooLarge: If the inflated body exceeds max_size
+        ValueError: If the encoding is unsupported or the body is corrupt
+    """
+    encoding = (encoding or '').strip().lower()
+    if encoding not in DECODE_WBITS:
+        raise ValueError(f"Unsupported Content-Encoding: {encoding}")
+
+    wbits = DECODE_WBITS[encoding]
+    decompressor = zlib.decompressobj(wbits)
+    output = BytesIO()
+    first_chunk = True
+
+    try:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+
+            # Some clients send raw deflate without the zlib header
+            if first_chunk and encoding == 'deflate' and (chunk[0] & 0x0F) != 8:
+                decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            first_chunk = False
+
+            # Never inflate more than the remaining budget + 1 byte
+            remaining = max_size - output.tell()
+            output.write(decompressor.decompress(chunk, remaining + 1))
+            if output.tell() > max_size or decompressor.unconsumed_tail:
+                raise BodyTooLarge(f"Decompressed body exceeds {max_size} bytes")
+
+        output.write(decompressor.flush())
+        if output.tell() > max_size:
+            raise BodyTooLarge(f"Decompressed body exceeds {max_size} bytes")
+    except zlib.error as e:
+        raise ValueError(f"Invalid {encoding} body: {str(e)}")
+
+    return output.getvalue()
+
+
+def accepts_gzip(request) -> bool:
+    """Check whether the client accepts gzip encoded responses"""
+    return request.accept_encodings['gzip'] > 0
+
+
+def should_compress_response(response, min_size: int) -> bool:
+    """Check whether a response is worth compressing"""
+    if response.direct_passthrough or response.status_code != 200:
+        return False
+    if 'Content-Encoding' in response.headers:
+        return False
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return False
+    length = response.calculate_content_length()
+    return length is not None and length >= min_size
+
+
+def compress_response(response, level: int = 6):
+    """Gzip a buffered response in place"""
+    data = gzip.compress(response.get_data(), compresslevel=level)
+    response.set_data(data)
+    response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Content-Length'] = str(len(data))
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def precompress_file(file_path: str, level: int = 6) -> Optional[str]:
+    """
+    Write a gzip copy of a file next to it (file_path + '.gz')
+
+    Returns:
+        str: Path of the compressed file, or None on failure
+    """
+    gz_path = file_path + '.gz'
+    tmp_path = gz_path + '.tmp'
+    try:
+        with open(file_path, 'rb') as src, gzip.open(tmp_path, 'wb', compresslevel=level) as dst:
+            while True:
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                dst.write(chunk)
+        os.replace(tmp_path, gz_path)
+        return gz_path
+    except Exception as e:
+        logger.error(f"Error pre-compressing {file_path}: {str(e)}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
@@ -4,11 +4,156 @@ Input validation and data structure validation
 """
 
 import re
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Declarative schema for scan records. None and missing_values count as
+# missing (the extension sends 'null' for fields it could not extract); at
+# least one of the required_any fields must be present.
+SCAN_RECORD_SCHEMA = {
+    'required_any': ('title', 'url'),
+    'missing_values': ('', 'null'),
+    'fields': {
+        'title': {'label': 'Title', 'type': str, 'max_length': 500},
+        'author': {'label': 'Author', 'type': str, 'max_length': 200},
+        'publisher': {'label': 'Publisher', 'type': str, 'max_length': 200},
+        'date': {
+            'label': 'Date',
+            'type': str,
+            'pattern': (
+                r'^(?:\d{4}-\d{1,2}-\d{1,2}(?:[T ]\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?'  # YYYY-MM-DD[THH:MM[:SS][Z]]
+                r'|\d{1,2}/\d{1,2}/\d{4}'  # MM/DD/YYYY
+                r'|\d{1,2}-\d{1,2}-\d{4}'  # MM-DD-YYYY
+                r'|[A-Z][a-z]+ \d{1,2}, \d{4})$'  # Month DD, YYYY
+            ),
+            'pattern_error': 'Date format not recognized. Use YYYY-MM-DD, MM/DD/YYYY, MM-DD-YYYY, or Month DD, YYYY'
+        },
+        'abstract': {'label': 'Abstract', 'type': str, 'max_length': 2000},
+        'url': {
+            'label': 'URL',
+            'type': str,
+            'max_length': 1000,
+            'pattern': r'^https?://[^\s<>"{}|\\^`\[\]]+$',
+            'pattern_error': 'URL format is invalid'
+        },
+    }
+}
+
+TYPE_NAMES = {str: 'a string', int: 'an integer', float: 'a number', bool: 'a boolean', list: 'an array'}
+
+class SchemaValidator:
+    """
+    Validator compiled once from a declarative schema
+    Each field becomes a flat tuple of checks with precompiled regexes, and
+    errors are appended to a caller-supplied list only when a check fails
+    """
+
+    def __init__(self, schema: Dict[str, Any]):
+        self.required_any = tuple(schema.get('required_any', ()))
+        self.missing_values = frozenset(schema.get('missing_values', ('',)))
+        self.required_error = (
+            f"At least one of the following fields is required: {', '.join(self.required_any)}"
+        )
+
+        checks = []
+        for name, spec in schema['fields'].items():
+            label = spec.get('label', name)
+            field_type = spec.get('type', str)
+            max_length = spec.get('max_length')
+            pattern = spec.get('pattern')
+            checks.append((
+                name,
+                field_type,
+                f"{label} must be {TYPE_NAMES.get(field_type, field_type.__name__)}",
+                max_length,
+                f"{label} is too long (max {max_length} characters)" if max_length else None,
+                re.compile(pattern).match if pattern else None,
+                spec.get('pattern_error', f"{label} format is invalid")
+            ))
+        self.checks = tuple(checks)
+        self.fields = {check[0]: check for check in self.checks}
+
+    def collect_errors(self, data, errors: List[str]) -> bool:
+        """Append errors for one record to errors; returns True if the record is valid"""
+        if not isinstance(data, dict) and not hasattr(data, 'get'):
+            errors.append('Data must be a JSON object')
+            return False
+
+        count = len(errors)
+        get = data.get
+        missing = self.missing_values
+        if self.required_any:
+            for field in self.required_any:
+                value = get(field)
+                if value and not (isinstance(value, str) and value in missing):
+                    break
+            else:
+                errors.append(self.required_error)
+        for name, field_type, type_error, max_length, length_error, match, pattern_error in self.checks:
+            value = get(name)
+            if value is None or (isinstance(value, str) and value in missing):
+                continue
+            if not isinstance(value, field_type):
+                errors.append(type_error)
+            elif max_length is not None and len(value) > max_length:
+                errors.append(length_error)
+            elif match is not None and not match(value.strip()):
+                errors.append(pattern_error)
+        return len(errors) == count
+
+    def is_valid(self, data) -> bool:
+        return self.collect_errors(data, [])
+
+    def validate(self, data) -> Dict[str, Any]:
+        """Validate one record; returns {'valid': bool, 'errors': list}"""
+        errors = []
+        return {'valid': self.collect_errors(data, errors), 'errors': errors}
+
+    def validate_field(self, name: str, value: Any) -> Dict[str, Any]:
+        """Validate a single field value (missing values pass)"""
+        errors = []
+        _, field_type, type_error, max_length, length_error, match, pattern_error = self.fields[name]
+        if value is None or (isinstance(value, str) and value in self.missing_values):
+            pass
+        elif not isinstance(value, field_type):
+            errors.append(type_error)
+        elif max_length is not None and len(value) > max_length:
+            errors.append(length_error)
+        elif match is not None and not match(value.strip()):
+            errors.append(pattern_error)
+        return {'valid': not errors, 'errors': errors}
+
+    def validate_batch(self, records, max_errors: Optional[int] = 100) -> Dict[str, Any]:
+        """
+        Validate every record in one pass
+        Returns: {'valid': bool, 'errors': list, 'checked': int, 'invalid_count': int}
+        At most max_errors messages are kept; invalid_count covers all records
+        """
+        errors = []
+        scratch = []
+        checked = 0
+        invalid_count = 0
+        collect = self.collect_errors
+
+        for checked, record in enumerate(records, 1):
+            if collect(record, scratch):
+                continue
+            invalid_count += 1
+            if max_errors is None or len(errors) < max_errors:
+                errors.append(f"Record {checked}: {', '.join(scratch)}")
+            scratch.clear()
+
+        return {
+            'valid': invalid_count == 0,
+            'errors': errors,
+            'checked': checked,
+            'invalid_count': invalid_count
+        }
+
+SCAN_VALIDATOR = SchemaValidator(SCAN_RECORD_SCHEMA)
+
 def validate_scan_data(data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Validate scan data structure and content
@@ -19,195 +164,71 @@ def validate_scan_data(data: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Dict with 'valid' boolean and 'errors' list
     """
-    errors = []
-    
-    if not isinstance(data, dict):
-        return {
-            'valid': False,
-            'errors': ['Data must be a JSON object']
-        }
-    
-    # Check required fields (at least one should be present)
-    required_fields = ['title', 'url']
-    has_required = any(data.get(field) for field in required_fields)
-    
-    if not has_required:
-        errors.append('At least one of the following fields is required: title, url')
-    
-    # Validate individual fields if present
-    if 'title' in data:
-        title_validation = validate_title(data['title'])
-        if not title_validation['valid']:
-            errors.extend(title_validation['errors'])
-    
-    if 'author' in data:
-        author_validation = validate_author(data['author'])
-        if not author_validation['valid']:
-            errors.extend(author_validation['errors'])
-    
-    if 'publisher' in data:
-        publisher_validation = validate_publisher(data['publisher'])
-        if not publisher_validation['valid']:
-            errors.extend(publisher_validation['errors'])
-    
-    if 'date' in data:
-        date_validation = validate_date(data['date'])
-        if not date_validation['valid']:
-            errors.extend(date_validation['errors'])
-    
-    if 'abstract' in data:
-        abstract_validation = validate_abstract(data['abstract'])
-        if not abstract_validation['valid']:
-            errors.extend(abstract_validation['errors'])
-    
-    if 'url' in data:
-        url_validation = validate_url(data['url'])
-        if not url_validation['valid']:
-            errors.extend(url_validation['errors'])
-    
-    return {
-        'valid': len(errors) == 0,
-        'errors': errors
-    }
+    return SCAN_VALIDATOR.validate(data)
 
 def validate_title(title: Any) -> Dict[str, Any]:
     """Validate title field"""
-    errors = []
-    
-    if not isinstance(title, str):
-        errors.append('Title must be a string')
-    elif len(title.strip()) == 0:
-        errors.append('Title cannot be empty')
-    elif len(title) > 500:
-        errors.append('Title is too long (max 500 characters)')
-    
-    return {
-        'valid': len(errors) == 0,
-        'errors': errors
-    }
+    return SCAN_VALIDATOR.validate_field('title', title)
 
 def validate_author(author: Any) -> Dict[str, Any]:
     """Validate author field"""
-    errors = []
-    
-    if author is not None and not isinstance(author, str):
-        errors.append('Author must be a string')
-    elif isinstance(author, str) and len(author) > 200:
-        errors.append('Author is too long (max 200 characters)')
-    
-    return {
-        'valid': len(errors) == 0,
-        'errors': errors
-    }
+    return SCAN_VALIDATOR.validate_field('author', author)
 
 def validate_publisher(publisher: Any) -> Dict[str, Any]:
     """Validate publisher field"""
-    errors = []
-    
-    if publisher is not None and not isinstance(publisher, str):
-        errors.append('Publisher must be a string')
-    elif isinstance(publisher, str) and len(publisher) > 200:
-        errors.append('Publisher is too long (max 200 characters)')
-    
-    return {
-        'valid': len(errors) == 0,
-        'errors': errors
-    }
+    return SCAN_VALIDATOR.validate_field('publisher', publisher)
 
 def validate_date(date: Any) -> Dict[str, Any]:
     """Validate date field"""
-    errors = []
-    
-    if date is not None and not isinstance(date, str):
-        errors.append('Date must be a string')
-    elif isinstance(date, str) and date.strip():
-        # Basic date format validation
-        date_patterns = [
-            r'^\d{4}-\d{1,2}-\d{1,2}$',  # YYYY-MM-DD
-            r'^\d{1,2}/\d{1,2}/\d{4}$',   # MM/DD/YYYY
-            r'^\d{1,2}-\d{1,2}-\d{4}$',   # MM-DD-YYYY
-            r'^[A-Z][a-z]+ \d{1,2}, \d{4}$'  # Month DD, YYYY
-        ]
-        
-        if not any(re.match(pattern, date.strip()) for pattern in date_patterns):
-            errors.append('Date format not recognized. Use YYYY-MM-DD, MM/DD/YYYY, MM-DD-YYYY, or Month DD, YYYY')
-    
-    return {
-        'valid': len(errors) == 0,
-        'errors': errors
-    }
+    return SCAN_VALIDATOR.validate_field('date', date)
 
 def validate_abstract(abstract: Any) -> Dict[str, Any]:
     """Validate abstract field"""
-    errors = []
-    
-    if abstract is not None and not isinstance(abstract, str):
-        errors.append('Abstract must be a string')
-    elif isinstance(abstract, str) and len(abstract) > 2000:
-        errors.append('Abstract is too long (max 2000 characters)')
-    
-    return {
-        'valid': len(errors) == 0,
-        'errors': errors
-    }
+    return SCAN_VALIDATOR.validate_field('abstract', abstract)
 
 def validate_url(url: Any) -> Dict[str, Any]:
     """Validate URL field"""
-    errors = []
-    
-    if not isinstance(url, str):
-        errors.append('URL must be a string')
-    elif len(url.strip()) == 0:
-        errors.append('URL cannot be empty')
-    else:
-        # Basic URL validation
-        url_pattern = r'^https?://[^\s<>"{}|\\^`\[\]]+$'
-        if not re.match(url_pattern, url.strip()):
-            errors.append('URL format is invalid')
-        elif len(url) > 1000:
-            errors.append('URL is too long (max 1000 characters)')
-    
-    return {
-        'valid': len(errors) == 0,
-        'errors': errors
-    }
+    return SCAN_VALIDATOR.validate_field('url', url)
 
-def validate_export_data(data: List[Dict[str, Any]]) -> Dict[str, Any]:
+def validate_export_data(data: List[Dict[str, Any]], max_records: Optional[int] = 10000,
+                         max_errors: Optional[int] = 100) -> Dict[str, Any]:
     """
     Validate export data array
     
     Args:
         data: List of dictionaries containing scan data
+        max_records: Maximum number of records (None for no limit)
+        max_errors: Maximum number of per-record error messages kept
         
     Returns:
-        Dict with 'valid' boolean and 'errors' list
+        Dict with 'valid' boolean, 'errors' list and 'invalid_count'
     """
-    errors = []
-    
     if not isinstance(data, list):
         return {
             'valid': False,
-            'errors': ['Export data must be an array']
+            'errors': ['Export data must be an array'],
+            'invalid_count': 0
         }
     
     if len(data) == 0:
         return {
             'valid': False,
-            'errors': ['Export data cannot be empty']
+            'errors': ['Export data cannot be empty'],
+            'invalid_count': 0
         }
     
-    if len(data) > 10000:
-        errors.append('Too many records to export (max 10000)')
+    errors = []
+    if max_records is not None and len(data) > max_records:
+        errors.append(f'Too many records to export (max {max_records})')
     
-    # Validate each record
-    for i, record in enumerate(data[:100]):  # Only validate first 100 for performance
-        record_validation = validate_scan_data(record)
-        if not record_validation['valid']:
-            errors.append(f"Record {i+1}: {', '.join(record_validation['errors'])}")
+    # Validate every record
+    batch = SCAN_VALIDATOR.validate_batch(data, max_errors)
+    errors.extend(batch['errors'])
     
     return {
         'valid': len(errors) == 0,
-        'errors': errors
+        'errors': errors,
+        'invalid_count': batch['invalid_count']
     }
 
 def sanitize_filename(filename: str) -> str:
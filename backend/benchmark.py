@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Benchmark script for SurfScan Backend
+Measures memory and throughput of the storage layer
+"""
+
+import csv
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Make the app package importable when run from the backend directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.scan_record import SCAN_FIELDS, read_records
+
+PUBLISHERS = ["Nature", "Science", "Springer", "Elsevier", "IEEE", "ACM", "arXiv", "PLOS ONE"]
+AUTHORS = [f"Author {i}" for i in range(200)]
+
+def write_sample_day(file_path: str, rows: int, seed: int = 42):
+    """Write a daily CSV with realistic repetition of publishers/authors"""
+    rng = random.Random(seed)
+    with open(file_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(SCAN_FIELDS)
+        for i in range(rows):
+            publisher = rng.randrange(len(PUBLISHERS))
+            writer.writerow([
+                f"Article {i} on topic {rng.randint(1, 500)}",
+                rng.choice(AUTHORS),
+                PUBLISHERS[publisher],
+                "2025-10-09",
+                "Abstract text " * rng.randint(5, 30),
+                f"https://example.com/article/{i}",
+                "2025-10-09T12:00:00",
+                "en",
+                "article; topic",
+                "",
+                str(publisher + 1)
+            ])
+
+def measure(load):
+    """Return (seconds, peak traced bytes, result length) for a loader"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, len(result)
+
+def bench_record_memory(rows: int = 200000):
+    """Compare dict rows (csv.DictReader copies) with ScanRecord for one large day"""
+    work_dir = tempfile.mkdtemp(prefix="surfscan_bench_")
+    file_path = os.path.join(work_dir, "2025-10-09.csv")
+    try:
+        write_sample_day(file_path, rows)
+
+        def load_dicts():
+            with open(file_path, "r", encoding="utf-8", newline="") as f:
+                return [dict(row) for row in csv.DictReader(f)]
+
+        def load_records():
+            with open(file_path, "r", encoding="utf-8", newline="") as f:
+                return list(read_records(f))
+
+        dict_time, dict_peak, dict_count = measure(load_dicts)
+        record_time, record_peak, record_count = measure(load_records)
+
+        print(f"Rows: {rows} ({os.path.getsize(file_path) / (1024 * 1024):.1f} MB on disk)")
+        print(f"  dict rows:   {dict_peak / (1024 * 1024):8.1f} MB peak, {dict_time:.2f}s")
+        print(f"  ScanRecord:  {record_peak / (1024 * 1024):8.1f} MB peak, {record_time:.2f}s")
+        print(f"  ratio:       {record_peak / dict_peak:.2f}x memory")
+        return dict_count == record_count and record_peak < dict_peak
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def bench_validation(rows: int = 200000):
+    """Validate a large export batch with the compiled scan schema"""
+    from app.utils.validators import SCAN_VALIDATOR
+
+    rng = random.Random(42)
+    records = [
+        {
+            "title": f"Article {i} on topic {rng.randint(1, 500)}",
+            "author": rng.choice(AUTHORS),
+            "publisher": rng.choice(PUBLISHERS),
+            "date": "2025-10-09",
+            "abstract": "Abstract text " * rng.randint(5, 30),
+            "url": f"https://example.com/article/{i}" if i % 1000 else "not-a-url"
+        }
+        for i in range(rows)
+    ]
+
+    started = time.perf_counter()
+    result = SCAN_VALIDATOR.validate_batch(records)
+    elapsed = time.perf_counter() - started
+
+    print(f"Rows: {rows}, invalid: {result['invalid_count']}")
+    print(f"  validate_batch: {elapsed:.2f}s ({rows / elapsed:,.0f} records/s)")
+    return result['checked'] == rows and result['invalid_count'] == rows // 1000
+
+def bench_dedup(entries: int = 100000, probes: int = 2000):
+    """Duplicate checks against a full index (default DEDUP settings)"""
+    from app.services.dedup_service import DuplicateService
+
+    rng = random.Random(42)
+    words = [f"term{i}" for i in range(3000)]
+    records = [
+        {
+            "title": f"Article {i}",
+            "abstract": " ".join(rng.choice(words) for _ in range(150)),
+            "url": f"https://example.com/article/{i}",
+            "time_received": f"2025-10-09T12:00:00.{i:06d}"
+        }
+        for i in range(entries + probes)
+    ]
+    service = DuplicateService(max_entries=entries)
+    for record in records[:entries]:
+        service.add(record, record["url"])
+
+    started = time.perf_counter()
+    for record in records[entries:]:
+        service.fingerprint(record)
+    fingerprint_time = (time.perf_counter() - started) / probes
+
+    started = time.perf_counter()
+    for record in records[entries:]:
+        service.add(record, record["url"])
+    add_time = (time.perf_counter() - started) / probes
+
+    # A re-scan with a slightly edited abstract is still found
+    edited = dict(records[-1], url="https://example.com/edited", time_received="2025-10-10T00:00:00")
+    edited["abstract"] += " revised"
+    found = service.add(edited, edited["url"])
+
+    print(f"Index: {entries} entries, {service.get_stats()['bands']} band keys")
+    print(f"  fingerprint: {fingerprint_time * 1000:.3f}ms")
+    print(f"  add:         {add_time * 1000:.3f}ms (fingerprint included)")
+    return found["duplicate"] and found["reason"] == "content"
+
+def bench_journal(rows: int = 2000, threads: int = 8):
+    """Acked appends with FSYNC_POLICY=always, with and without the journal"""
+    from concurrent.futures import ThreadPoolExecutor
+    from app.services.file_service import FileService
+
+    def run(journal: bool) -> float:
+        work_dir = tempfile.mkdtemp(prefix="surfscan_bench_")
+        try:
+            service = FileService(work_dir)
+            service.configure_writer({'FSYNC_POLICY': 'always', 'JOURNAL_ENABLED': journal})
+            record = {"title": "Article", "url": "https://example.com/article", "abstract": "Abstract text " * 20}
+            started = time.perf_counter()
+            with ThreadPoolExecutor(threads) as pool:
+                list(pool.map(lambda _: service.save_scan_data(dict(record)), range(rows)))
+            elapsed = time.perf_counter() - started
+            service.writer.close()
+            return elapsed
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    logging.disable(logging.INFO)
+    try:
+        plain = run(False)
+        journaled = run(True)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    print(f"Rows: {rows}, threads: {threads}")
+    print(f"  partition fsync: {rows / plain:10,.0f} rows/s")
+    print(f"  journal fsync:   {rows / journaled:10,.0f} rows/s")
+    return True
+
+def bench_segmented_reads(rows: int = 240000):
+    """One-hour /api/records window over a day stored whole vs. in hourly segments"""
+    import json
+    from app.services.file_service import FileService
+    from app.services.partition_writer import manifest_path, segment_filename
+
+    def write_day(work_dir: str, hourly: bool):
+        files = {}
+        per_hour = rows // 24
+        try:
+            for i in range(rows):
+                hour = min(i // per_hour, 23)
+                filename = segment_filename("2025-10-09", f"{hour:02d}" if hourly else None)
+                if filename not in files:
+                    f = open(os.path.join(work_dir, filename), "w", encoding="utf-8", newline="")
+                    csv.writer(f).writerow(SCAN_FIELDS)
+                    files[filename] = (f, csv.writer(f))
+                    if hourly:
+                        with open(manifest_path(work_dir, "2025-10-09"), "a", encoding="utf-8") as m:
+                            m.write(json.dumps({"file": filename, "started": f"2025-10-09T{hour:02d}:00:00"}) + "\n")
+                second = (i % per_hour) * 3600 // per_hour
+                files[filename][1].writerow([
+                    f"Article {i}", "Author", "Nature", "2025-10-09", "Abstract text " * 10,
+                    f"https://example.com/article/{i}",
+                    f"2025-10-09T{hour:02d}:{second // 60:02d}:{second % 60:02d}", "en", "", "", "1"
+                ])
+        finally:
+            for f, _ in files.values():
+                f.close()
+
+    results = {}
+    for hourly in (False, True):
+        work_dir = tempfile.mkdtemp(prefix="surfscan_bench_")
+        try:
+            write_day(work_dir, hourly)
+            service = FileService(work_dir)
+            started = time.perf_counter()
+            count = sum(1 for _ in service.iter_records(since="2025-10-09T12:00:00", until="2025-10-09T12:59:59"))
+            results[hourly] = (time.perf_counter() - started, count)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"Rows per day: {rows}, one-hour window")
+    print(f"  daily file:       {results[False][0]:.3f}s ({results[False][1]} rows)")
+    print(f"  hourly segments:  {results[True][0]:.3f}s ({results[True][1]} rows)")
+    return results[False][1] == results[True][1]
+
+def bench_publisher_rollup(rows: int = 200000):
+    """Records per publisher: group-by over parsed names vs. the publisher_id column"""
+    from collections import Counter
+    from app.services.file_service import FileService
+
+    work_dir = tempfile.mkdtemp(prefix="surfscan_bench_")
+    try:
+        filename = "2025-10-09.csv"
+        write_sample_day(os.path.join(work_dir, filename), rows)
+        service = FileService(work_dir)
+
+        started = time.perf_counter()
+        by_name = Counter(record.publisher for record in service.iter_csv_rows("2025-10-09"))
+        names_time = time.perf_counter() - started
+
+        stat = os.stat(os.path.join(work_dir, filename))
+        service.count_rows(filename, stat)
+        started = time.perf_counter()
+        by_id = service.count_publishers(filename, stat)
+        ids_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        service.count_publishers(filename, stat)
+        cached_time = time.perf_counter() - started
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"Rows: {rows}, publishers: {len(by_id)}")
+    print(f"  group by name (records):  {names_time:.3f}s")
+    print(f"  group by publisher_id:    {ids_time:.3f}s")
+    print(f"  cached in index:          {cached_time * 1000:.2f}ms")
+    return sorted(by_name.values()) == sorted(by_id.values())
+
+def read_status_kb(field: str):
+    """A kB figure of /proc/self/status (None off Linux)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def reset_peak_rss() -> bool:
+    """Reset VmHWM to the current RSS (Linux 4.0+)"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def peak_rss_kb() -> int:
+    """Peak RSS of this process: VmHWM, or ru_maxrss where /proc is missing"""
+    import resource
+    peak = read_status_kb("VmHWM")
+    return peak if peak is not None else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def run_export_format(export_format: str, rows: int, work_dir: str):
+    """
+    Write rows with one export writer (run in a spawned child)
+    Returns seconds, peak RSS, RSS growth over the baseline before the
+    export, and the file size
+    """
+    from app.services.export_formats import get_export_writer
+
+    rng = random.Random(42)
+    writer_class = get_export_writer(export_format)
+    file_path = os.path.join(work_dir, f"export{writer_class.extension}")
+    # Baseline after imports, so the growth is what the writer itself needs;
+    # with the peak reset it is the current RSS, else the peak so far
+    if reset_peak_rss():
+        baseline = read_status_kb("VmRSS")
+    else:
+        baseline = peak_rss_kb()
+
+    started = time.perf_counter()
+    writer = writer_class(file_path, list(SCAN_FIELDS))
+    for i in range(rows):
+        writer.write_row({
+            "title": f"Article {i} on topic {rng.randint(1, 500)}",
+            "author": rng.choice(AUTHORS),
+            "publisher": rng.choice(PUBLISHERS),
+            "date": "2025-10-09",
+            "abstract": "Abstract text " * rng.randint(5, 30),
+            "url": f"https://example.com/article/{i}",
+            "time_received": "2025-10-09T12:00:00"
+        })
+    writer.close()
+    elapsed = time.perf_counter() - started
+
+    peak = peak_rss_kb()
+    return {"seconds": elapsed, "rss_kb": peak, "rss_growth_kb": peak - baseline,
+            "size": os.path.getsize(file_path)}
+
+def bench_export_formats(rows: int = 200000):
+    """Rows/s and peak RSS of every export format (each in a freshly spawned process)"""
+    import multiprocessing
+    from app.services.export_formats import EXPORT_WRITERS
+
+    # spawn, not fork: a forked child would inherit this process's memory
+    context = multiprocessing.get_context("spawn")
+    work_dir = tempfile.mkdtemp(prefix="surfscan_bench_")
+    ok = True
+    try:
+        print(f"Rows: {rows}")
+        for export_format in EXPORT_WRITERS:
+            try:
+                with context.Pool(1) as pool:
+                    result = pool.apply(run_export_format, (export_format, rows, work_dir))
+            except Exception as e:
+                print(f"  {export_format:9} failed: {str(e)}")
+                ok = False
+                continue
+            print(f"  {export_format:9} {rows / result['seconds']:10,.0f} rows/s, "
+                  f"peak RSS {result['rss_kb'] / 1024:6.1f} MB (+{result['rss_growth_kb'] / 1024:.1f} MB), "
+                  f"{result['size'] / (1024 * 1024):7.1f} MB file")
+        return ok
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def bench_history_scaling(days: int = 60, per_day: int = 2000):
+    """Listing, stats and retention over a generated multi-month history"""
+    from app.services.file_service import FileService
+    from app.services.generator_service import GeneratorService
+    from app.services.parse_service import ParseService
+    from app.services.publisher_service import PublisherService
+    from app.services.retention_service import RetentionService
+
+    work_dir = tempfile.mkdtemp(prefix="surfscan_bench_")
+    try:
+        service = FileService(work_dir)
+        retention = RetentionService(service, data_days=30, batch_pause=0)
+        generator = GeneratorService(service, ParseService(PublisherService(work_dir)), seed=42)
+        stats = generator.generate(days, per_day)
+        print(f"Generated {stats['records']} records over {stats['days']} days in {stats['seconds']}s")
+
+        timings = []
+        for label, run in [
+            ("list (cold index)", service.list_csv_files),
+            ("list (warm index)", service.list_csv_files),
+            ("statistics", service.get_statistics),
+            ("retention plan (dry run)", lambda: retention.run(dry_run=True)),
+            ("retention (keep 30 days)", retention.run),
+        ]:
+            started = time.perf_counter()
+            result = run()
+            timings.append((label, time.perf_counter() - started, result))
+        for label, seconds, _ in timings:
+            print(f"  {label + ':':<26}{seconds:.3f}s")
+
+        deleted = timings[4][2]['summary']['data']['files']
+        print(f"  Deleted {deleted} daily files")
+        return timings[2][2].get('total_records') == stats['records'] and deleted == days - 30
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def main():
+    """Run all benchmarks"""
+    print("⏱️  Benchmarking SurfScan Backend")
+    print("=" * 40)
+
+    benchmarks = [
+        ("Record Memory", bench_record_memory),
+        ("Validation", bench_validation),
+        ("Duplicate Detection", bench_dedup),
+        ("Write-Ahead Journal", bench_journal),
+        ("Segmented Reads", bench_segmented_reads),
+        ("Publisher Rollup", bench_publisher_rollup),
+        ("Export Formats", bench_export_formats),
+        ("History Scaling", bench_history_scaling),
+    ]
+
+    for name, func in benchmarks:
+        print(f"\n🔍 {name}...")
+        result = func()
+        print(f"{'✅' if result else '❌'} {name}")
+
+if __name__ == "__main__":
+    main()
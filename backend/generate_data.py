@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic SurfScan history for performance baselines
+Usage: python generate_data.py --days 30 --records 10000 [--seed 42]
+"""
+
+import argparse
+import os
+import sys
+
+from app.services.file_service import FileService
+from app.services.generator_service import GeneratorService
+from app.services.parse_service import ParseService
+from app.services.publisher_service import PublisherService
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Write N days x M synthetic scan records into a data directory")
+    parser.add_argument('--data-dir', default=os.environ.get('DATA_DIR', 'data'), help="Data directory")
+    parser.add_argument('--days', type=int, default=30, help="Number of days")
+    parser.add_argument('--records', type=int, default=1000, help="Records per day")
+    parser.add_argument('--end', help="Last day (YYYY-MM-DD, default: yesterday)")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed (same seed, same data)")
+    parser.add_argument('--publishers', type=int, default=200, help="Number of distinct publishers")
+    parser.add_argument('--zipf', type=float, default=1.1, help="Zipf exponent of publisher popularity")
+    parser.add_argument('--duplicate-rate', type=float, default=0.05, help="Share of records re-scanning a URL")
+    parser.add_argument('--batch-size', type=int, default=50000, help="Rows buffered per write batch")
+    return parser.parse_args()
+
+def print_progress(stats):
+    rate = stats['records'] / stats['seconds'] if stats['seconds'] else 0
+    print(f"  ... {stats['date']}: {stats['records']} records, "
+          f"{stats['bytes'] / 1024 / 1024:.1f} MB ({rate:.0f} records/s)")
+
+def main():
+    args = parse_args()
+    if args.days < 1 or args.records < 1:
+        print("❌ --days and --records must be at least 1")
+        return 1
+    os.makedirs(args.data_dir, exist_ok=True)
+
+    file_service = FileService(args.data_dir)
+    # Same day boundaries as the server
+    file_service.writer.configure(timezone=os.environ.get('ROTATION_TIMEZONE') or None)
+    existing = [name for name in os.listdir(args.data_dir) if name.endswith('.csv')]
+    if existing:
+        print(f"⚠️  {args.data_dir} already has {len(existing)} CSV files; generated rows are appended")
+
+    parse_service = ParseService(PublisherService(args.data_dir))
+    service = GeneratorService(file_service, parse_service, seed=args.seed, publishers=args.publishers,
+                               zipf_exponent=args.zipf, duplicate_rate=args.duplicate_rate,
+                               batch_size=args.batch_size)
+
+    print("🧪 SurfScan Data Generator")
+    print("=" * 50)
+    print(f"📂 Data directory: {args.data_dir}")
+    print(f"🎲 Seed {args.seed}: {args.days} days x {args.records} records")
+    print()
+
+    stats = service.generate(args.days, args.records, args.end, progress=print_progress)
+    rate = stats['records'] / stats['seconds'] if stats['seconds'] else 0
+    print(f"✅ {stats['records']} records in {stats['days']} daily files "
+          f"({stats['bytes'] / 1024 / 1024:.1f} MB) in {stats['seconds']}s ({rate:.0f} records/s)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Bulk import external article lists into SurfScan daily CSV files
+Usage: python import_data.py articles.csv more.jsonl.gz [--batch-size N]
+"""
+
+import argparse
+import os
+import sys
+
+from app.services.file_service import FileService
+from app.services.import_service import ImportService
+from app.services.parse_service import ParseService
+from app.services.publisher_service import PublisherService
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Import CSV/JSONL (optionally .gz) datasets into SurfScan")
+    parser.add_argument('inputs', nargs='+', help="Input files (.csv, .jsonl, .ndjson, optionally .gz)")
+    parser.add_argument('--data-dir', default=os.environ.get('DATA_DIR', 'data'), help="Data directory")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help="Input format (default: from extension)")
+    parser.add_argument('--batch-size', type=int, default=50000, help="Rows buffered per write batch")
+    parser.add_argument('--no-dedup', action='store_true', help="Do not skip rows already stored")
+    return parser.parse_args()
+
+def print_progress(stats):
+    rate = stats['rows_read'] / stats['seconds'] if stats['seconds'] else 0
+    print(f"  ... {stats['rows_read']} rows read, {stats['imported']} imported, "
+          f"{stats['duplicates']} duplicates ({rate:.0f} rows/s)")
+
+def main():
+    args = parse_args()
+    missing = [path for path in args.inputs if not os.path.exists(path)]
+    if missing:
+        print(f"❌ Input not found: {', '.join(missing)}")
+        return 1
+
+    file_service = FileService(args.data_dir)
+    # Same day boundaries as the server
+    file_service.writer.configure(timezone=os.environ.get('ROTATION_TIMEZONE') or None)
+    parse_service = ParseService(PublisherService(args.data_dir))
+    service = ImportService(file_service, parse_service, args.batch_size)
+
+    print("📥 SurfScan Import")
+    print("=" * 50)
+    print(f"📂 Data directory: {args.data_dir}")
+    if not args.no_dedup:
+        existing = service.load_existing_keys()
+        print(f"🔑 Loaded {existing} existing records for dedup")
+    print()
+
+    for path in args.inputs:
+        print(f"📄 {path}")
+        stats = service.import_file(path, args.format, progress=print_progress)
+        rate = stats['rows_read'] / stats['seconds'] if stats['seconds'] else 0
+        print(f"✅ {stats['imported']} imported into {stats['partitions']} partitions, "
+              f"{stats['duplicates']} duplicates, {stats['invalid']} invalid "
+              f"in {stats['seconds']}s ({rate:.0f} rows/s)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
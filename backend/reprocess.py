@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Re-run ParseService cleaning rules over stored daily CSV files
+Usage: python reprocess.py [--from YYYY-MM-DD] [--to YYYY-MM-DD] [--workers N]
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+from app.services.partition_writer import list_segments
+from app.services.reprocess_service import ReprocessService
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Re-clean and re-validate stored SurfScan data")
+    parser.add_argument('--data-dir', default=os.environ.get('DATA_DIR', 'data'), help="Data directory")
+    parser.add_argument('--from', dest='date_from', help="First partition date (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='date_to', help="Last partition date (YYYY-MM-DD)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="Rows per write batch")
+    parser.add_argument('--drop-invalid', action='store_true', help="Drop rows that fail validation")
+    parser.add_argument('--dry-run', action='store_true', help="Report changes without rewriting files")
+    parser.add_argument('--restart', action='store_true', help="Ignore the checkpoint and start over")
+    parser.add_argument('--include-today', action='store_true',
+                        help="Also rewrite today's file (only when the server is stopped)")
+    return parser.parse_args()
+
+def list_dates(data_dir, date_from, date_to, include_today):
+    """Partition dates to reprocess (oldest first)"""
+    today = datetime.now().strftime("%Y-%m-%d")
+    dates = []
+    for date in list_segments(data_dir):
+        if (date_from and date < date_from) or (date_to and date > date_to):
+            continue
+        # The running server keeps today's file open for appends
+        if date == today and not include_today:
+            continue
+        dates.append(date)
+    return sorted(dates)
+
+def print_progress(stats, done, total):
+    if 'error' in stats:
+        print(f"  [{done}/{total}] {stats['date']}: ❌ {stats['error']}")
+        return
+    rate = stats['rows_in'] / stats['seconds'] if stats['seconds'] else 0
+    print(f"  [{done}/{total}] {stats['date']}: {stats['rows_in']} rows, "
+          f"{stats['changed']} changed, {stats['invalid']} invalid ({rate:.0f} rows/s)")
+
+def main():
+    args = parse_args()
+    if not os.path.isdir(args.data_dir):
+        print(f"❌ Data directory not found: {args.data_dir}")
+        return 1
+
+    service = ReprocessService(args.data_dir)
+    if args.restart:
+        service.reset_checkpoint()
+
+    dates = list_dates(args.data_dir, args.date_from, args.date_to, args.include_today)
+    pending = service.plan(dates)
+    print("🔁 SurfScan Reprocess")
+    print("=" * 50)
+    print(f"📂 Data directory: {args.data_dir}")
+    print(f"📅 Partitions: {len(dates)} ({len(dates) - len(pending)} already done)")
+    print(f"⚙️  Workers: {args.workers}, chunk size: {args.chunk_size}"
+          f"{', dry run' if args.dry_run else ''}")
+    print()
+
+    result = service.run(
+        dates,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        drop_invalid=args.drop_invalid,
+        dry_run=args.dry_run,
+        progress=print_progress
+    )
+
+    totals = result['totals']
+    rate = totals['rows_in'] / totals['seconds'] if totals['seconds'] else 0
+    print()
+    print(f"✅ Processed {result['processed']} partitions, skipped {result['skipped']}, "
+          f"failed {len(result['failed'])}")
+    print(f"   {totals['rows_in']} rows in, {totals['rows_out']} out, {totals['changed']} changed, "
+          f"{totals['invalid']} invalid in {totals['seconds']}s ({rate:.0f} rows/s)")
+    return 0 if result['success'] else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,15 +5,6 @@ from app import create_app
 # Get current directory
 current_dir = Path(__file__).parent
 
-def validate_environment():
-    required_dirs = ['data', 'data/exports', 'logs']
-    for dir_path in required_dirs:
-        full_path = current_dir / dir_path
-        full_path.mkdir(parents=True, exist_ok=True)
-        print(f"📁 Directory ready: {dir_path}")
-    
-    return True
-
 def get_server_config():
     """Get server configuration from environment variables"""
     config = {
@@ -53,7 +44,6 @@ def printStartupInfo(config):
 
 def main():
     try:
-        validate_environment()
         config = get_server_config()
         printStartupInfo(config)
         app = create_app(config['env'])